@@ -19,6 +19,7 @@ class Launcher:
         self.structural_efficiency = structural_efficiency
         self.number_of_stages = number_of_stages
 
+        # equal split, for identical stages this is also the payload-optimal one
         self.delta_v_per_stage = self.delta_v / self.number_of_stages
     
     def final_payload_mass(self, Ve=3400, structural_efficiency=0.07, verbose=True):  
@@ -42,38 +43,44 @@ class Launcher:
 
         return current_m0
     
-    def optimal_Ve(self, target_payload):
-
-        current_Ve = self.Ve
- 
-        payload = self.final_payload_mass(Ve=current_Ve, verbose=False)
-        
-        # Use a tiny tolerance to avoid infinite loop
-        while abs(payload - target_payload) > 1e-3:
-            payload = self.final_payload_mass(Ve=current_Ve, verbose=False)
-            if payload >= target_payload:
-                break
-
-            current_Ve += 1
-
-        print(f"Optimal Ve (approx) = {current_Ve} m/s (payload ~ {payload:.1f} kg)")
+    # Every stage keeps the same fraction f = (1/K - e) / (1 - e) of its start mass, so the
+    # payload is total_mass * f**n and can be inverted in closed form for Ve, e or total_mass
+    def payload_fraction(self, target_payload):
+        # f per stage needed for target_payload
+        return (target_payload / self.total_mass) ** (1 / self.number_of_stages)
+
+    def optimal_Ve(self, target_payload, structural_efficiency=0.07):
+        f = self.payload_fraction(target_payload)
+        inv_K = f * (1 - structural_efficiency) + structural_efficiency
+        if not 0 < inv_K < 1:
+            print("Could not achieve the desired payload with any exhaust velocity.")
+            return None
+        Ve = -self.delta_v_per_stage / np.log(inv_K)
+        payload = self.final_payload_mass(Ve=Ve, structural_efficiency=structural_efficiency, verbose=False)
+
+        print(f"Optimal Ve = {Ve:.2f} m/s (payload ~ {payload:.1f} kg)")
+        return Ve
 
     def optimal_efficiency(self, target_payload):
-
-        current_structure_efficiency = self.structural_efficiency
-        current_Ve = self.Ve
-        
-
-        payload = self.final_payload_mass(Ve=current_Ve, structural_efficiency=current_structure_efficiency, verbose=False)
-        
-        while abs(payload - target_payload) > 1e-3:
-            payload = self.final_payload_mass(Ve=current_Ve, structural_efficiency=current_structure_efficiency, verbose=False)
-            if payload >= target_payload:
-                break
-            current_structure_efficiency -= 0.01
-
-        print(f"Optimal structural efficiency (approx) = {current_structure_efficiency:.2f}"
+        f = self.payload_fraction(target_payload)
+        inv_K = np.exp(-self.delta_v_per_stage / self.Ve)
+        if not f < inv_K:
+            print("Could not achieve the desired payload with any structural efficiency.")
+            return None
+        structural_efficiency = (inv_K - f) / (1 - f)
+        payload = self.final_payload_mass(Ve=self.Ve, structural_efficiency=structural_efficiency, verbose=False)
+
+        print(f"Optimal structural efficiency = {structural_efficiency:.4f}"
               f" (payload ~ {payload:.1f} kg)")
+        return structural_efficiency
+
+    def required_total_mass(self, target_payload, Ve=3400, structural_efficiency=0.07):
+        inv_K = np.exp(-self.delta_v_per_stage / Ve)
+        f = (inv_K - structural_efficiency) / (1 - structural_efficiency)
+        if f <= 0:
+            print("Could not achieve the desired payload with any lift-off mass.")
+            return None
+        return target_payload / f ** self.number_of_stages
 
 
 if __name__ == "__main__":
@@ -87,6 +94,7 @@ if __name__ == "__main__":
     print('----------------------  Optimal Value Finder --------------------------------')
     launcher.optimal_Ve(6500)
     launcher.optimal_efficiency(6500)
+    print(f"Lift-off mass for 6500 kg (e=0.07, Ve=3400) = {launcher.required_total_mass(6500):.1f} kg")
 
     print()
 
@@ -1,12 +1,20 @@
 import numpy as np
 import casadi as ca
 import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-import matplotlib.animation as animation
 import math
+import time
+import os
+import hashlib
+import subprocess
+from qp_backend import SparseMPCQP, PLUGINS, EXPERIMENTAL_PLUGINS, feasibility_flag
+from plant import Plant
+import render
+from instrumentation import TickRecorder
+from horizon import Horizon
 
 class MPC:
-    def __init__(self, solver_nl: str, solver_qp: str):
+    def __init__(self, solver_nl: str, solver_qp: str, codegen=False, codegen_dir=None, Nh=200,
+                 use_function=False, function_path=None, horizon=None, ltv=False, tuning=None, experimental_qp=False):
         # physical constants 
         self.G = 6.67430e-11
         self.M = 5.972e24
@@ -16,6 +24,9 @@ class MPC:
         self.ell = 13.0
         self.radius = 5.0
         self.J = 0.25 * self.m * self.radius**2 + 1/12 * self.m * self.ell**2
+        # radius used by the gravity term of the dynamics and the unit scaling of y inside it
+        self.r_dyn = 8371000000.0
+        self.y_scale = 1000.0
 
         self.F_g = self.G * self.M * self.m / self.R**2
 
@@ -24,8 +35,10 @@ class MPC:
         self.umax = [2000, math.pi/4, 200]
 
         # MPC parameters
-        self.h = 0.1       
-        self.Nh = 200       
+        self.h = (tuning or {}).get('h', 0.1)
+        # step sizes and move-blocking of the QP prediction, Nh uniform steps of h by default
+        self.horizon = horizon or Horizon.uniform_steps(self.h, Nh)
+        self.Nh = self.horizon.Nh
         self.nx = 6         
         self.nu = 3          
 
@@ -34,19 +47,108 @@ class MPC:
         self.R_mat = np.diag([0.1, 1, 0.1])
         self.Qf = np.diag([1000, 10000, 90000, 0, 0, 100000])
 
+        # overrides of the constants above (e.g. from sweep.py), applied before anything is built
+        self.apply_tuning(tuning or {})
        
         self.solver_nl = solver_nl  
         self.solver_qp = solver_qp 
+        # the experimental backends (qrqp, qpoases) are only offered through the sparse QP and only when asked for
+        self.experimental_qp = experimental_qp
+        self.sparse_qp = solver_qp in PLUGINS or (experimental_qp and solver_qp in EXPERIMENTAL_PLUGINS)
+        if solver_qp in EXPERIMENTAL_PLUGINS and not experimental_qp:
+            raise ValueError(f"QP backend '{solver_qp}' {EXPERIMENTAL_PLUGINS[solver_qp]}, "
+                             f"pass experimental_qp=True to use it anyway.")
+
+        # linearisation is a single cached function, optionally compiled to a shared object
+        self.codegen = codegen
+        self.codegen_dir = codegen_dir or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'codegen')
+        self.lin_func = self.build_linearization()
+
+        # LTV mode: relinearise at every node of the previous tick's shifted prediction, one batched call
+        self.ltv = ltv
+        if self.ltv:
+            if not self.sparse_qp:
+                raise ValueError(f"LTV mode needs one of the sparse QP backends {PLUGINS}, got '{self.solver_qp}'.")
+            self.lin_map = self.build_ltv_linearization()
 
-
+        self.ymin = [0]
+        self.iter_count = 0
+        # status and per-phase wall times of the last solve, read by the Simulator's TickRecorder
+        self.status = ''
+        self.success = True
+        self.timings = {}
+        self.qp = None
+
+        # whole OCP as one CasADi function (x0, x_ref, X_init, U_init) -> (u0, X_opt, U_opt, feasible)
+        self.use_function = use_function or function_path is not None
+        self.solver_func = None
+        self.X_prev = None
+        self.U_prev = None
+
+        if function_path is not None and self.stored_signature(function_path) == self.function_signature():
+            # load the serialised solver, no symbolic graph needs to be built
+            self.solver_func = ca.Function.load(function_path)
+        else:
+            # no file yet, or one saved for other settings: build and (over)write it
+            self.build_solvers()
+            if self.use_function:
+                self.solver_func = self.export_function()
+                if function_path is not None:
+                    self.solver_func.save(function_path)
+                    with open(function_path + '.sig', 'w') as f:
+                        f.write(self.function_signature())
+
+    def function_signature(self):
+        # hash of everything the exported solver depends on, the source of this script included
+        parts = [self.Q, self.R_mat, self.Qf, self.umin, self.umax, self.ymin, [self.h], self.horizon.dt,
+                 self.horizon.blocks]
+        text = f"{self.solver_nl}|{self.solver_qp}|{self.ltv}|{self.experimental_qp}"
+        with open(os.path.abspath(__file__), 'rb') as f:
+            source = f.read()
+        return hashlib.sha1(b''.join(np.asarray(p, dtype=float).tobytes() for p in parts) + text.encode()
+                            + source).hexdigest()
+
+    @staticmethod
+    def stored_signature(function_path):
+        # signature saved next to a serialised solver, None when there is none
+        if not (os.path.exists(function_path) and os.path.exists(function_path + '.sig')):
+            return None
+        with open(function_path + '.sig') as f:
+            return f.read().strip()
+
+    def apply_tuning(self, tuning):
+        # weights may be given as a diagonal or a full matrix
+        for name in ['Q', 'R_mat', 'Qf']:
+            if name in tuning:
+                value = np.asarray(tuning[name], dtype=float)
+                setattr(self, name, np.diag(value) if value.ndim == 1 else value)
+
+    def build_solvers(self):
         self.opti = ca.Opti()
         self.X = self.opti.variable(self.nx, self.Nh+1)
         self.U = self.opti.variable(self.nu, self.Nh)
         self.e0 = self.opti.parameter(self.nx)
         self.xref_param = self.opti.parameter(self.nx)
-        self.ymin = [0]
         self.define_mpc()  
-        self.opti.solver(self.solver_qp)
+        self.opti.solver(self.solver_nl)
+
+        if self.sparse_qp:
+            # structured sparse QP handed straight to a conic solver
+            self.qp = SparseMPCQP(self.nx, self.nu, self.Nh, self.Q, self.R_mat, self.Qf,
+                                  self.umin, self.umax, self.ymin, plugin=self.solver_qp, horizon=self.horizon,
+                                  experimental=self.experimental_qp)
+        else:
+            # persistent convex QP, built once and re-solved with new parameter values every tick
+            self.opti_qp = ca.Opti()
+            self.X_lin = self.opti_qp.variable(self.nx, self.Nh+1)
+            self.U_lin = self.opti_qp.variable(self.nu, self.horizon.Nb)
+            self.A_lin = self.opti_qp.parameter(self.nx, self.nx)
+            self.B_lin = self.opti_qp.parameter(self.nx, self.nu)
+            self.c = self.opti_qp.parameter(self.nx)
+            self.x0 = self.opti_qp.parameter(self.nx)
+            self.x_ref = self.opti_qp.parameter(self.nx)
+            self.define_mpc_convex()
+            self.opti_qp.solver(self.solver_qp, *self.qp_solver_options())
 
     def dynamics(self, x, u):
 
@@ -57,8 +159,8 @@ class MPC:
         torque = u[0] * ca.sin(u[1]) + u[2]
         x_ddot = u[0] / self.m * ca.cos(x[2] + u[1]) - u[2] * ca.sin(x[2]) / self.m
         y_ddot = (u[0] / self.m * ca.sin(x[2] + u[1])) \
-                 - (self.G * self.M / ((8371000000.0 + x[1] * 1000) ** 2)) \
-                 + ((x_dot) ** 2 / (8371000000.0 + x[1] * 1000)) \
+                 - (self.G * self.M / ((self.r_dyn + x[1] * self.y_scale) ** 2)) \
+                 + ((x_dot) ** 2 / (self.r_dyn + x[1] * self.y_scale)) \
                  + u[2] * ca.cos(x[2]) / self.m
         theta_ddot = (self.ell / (2 * self.J)) * torque
 
@@ -87,64 +189,229 @@ class MPC:
         cost += ca.mtimes([(self.X[:, self.Nh] - self.xref_param).T, self.Qf, (self.X[:, self.Nh] - self.xref_param)])[0, 0]
         self.opti.minimize(cost)
     
-    def linearize(self, x0, u0):
+    def build_linearization(self):
+        # x_{k+1} ~ A_lin x_k + B_lin u_k + c (forward Euler around (x0, u0))
+        x_sym = ca.SX.sym('x', self.nx)
+        u_sym = ca.SX.sym('u', self.nu)
+        f_sym = self.dynamics(x_sym, u_sym)
+        A_sym = ca.jacobian(f_sym, x_sym)
+        B_sym = ca.jacobian(f_sym, u_sym)
 
+        A_lin = ca.SX.eye(self.nx) + self.h * A_sym
+        B_lin = self.h * B_sym
+        c = self.h * f_sym - self.h * A_sym @ x_sym - self.h * B_sym @ u_sym
+
+        lin_func = ca.Function('rocket_lin', [x_sym, u_sym], [A_lin, B_lin, c],
+                               ['x', 'u'], ['A_lin', 'B_lin', 'c'])
+        if self.codegen:
+            lin_func = self.compile_function(lin_func)
+        return lin_func
+
+    def build_ltv_linearization(self):
+        # same Euler linearisation with the stage step dt as an input, mapped over the horizon
         x_sym = ca.SX.sym('x', self.nx)
         u_sym = ca.SX.sym('u', self.nu)
+        dt = ca.SX.sym('dt')
         f_sym = self.dynamics(x_sym, u_sym)
         A_sym = ca.jacobian(f_sym, x_sym)
         B_sym = ca.jacobian(f_sym, u_sym)
 
-        A_func = ca.Function('A_func', [x_sym, u_sym], [A_sym])
-        B_func = ca.Function('B_func', [x_sym, u_sym], [B_sym])
+        lin_step = ca.Function('rocket_lin_dt', [x_sym, u_sym, dt],
+                               [ca.SX.eye(self.nx) + dt * A_sym, dt * B_sym, dt * (f_sym - A_sym @ x_sym - B_sym @ u_sym)])
+        lin_map = lin_step.map(self.Nh)
+        if self.codegen:
+            lin_map = self.compile_function(lin_map)
+        return lin_map
+
+    def ltv_points(self, x0, X_init, U_init):
+        # linearisation nodes: the measured state, then the shifted prediction
+        X_bar = X_init[:, :self.Nh]
+        if isinstance(X_bar, np.ndarray):
+            X_bar = X_bar.copy()
+        X_bar[:, 0] = x0
+        return X_bar, U_init
+
+    def compile_function(self, func):
+        # the file name carries a hash of the function so a change of constants never loads a stale library
+        key = hashlib.sha1(func.serialize().encode()).hexdigest()[:12]
+        base = f"{func.name()}_{key}"
+        so_path = os.path.join(self.codegen_dir, base + '.so')
+
+        if not os.path.exists(so_path):
+            os.makedirs(self.codegen_dir, exist_ok=True)
+            cg = ca.CodeGenerator(base + '.c')
+            cg.add(func)
+            cg.generate(self.codegen_dir + os.sep)
+            c_path = os.path.join(self.codegen_dir, base + '.c')
+            subprocess.run(['gcc', '-fPIC', '-shared', '-O3', c_path, '-o', so_path], check=True)
+
+        return ca.external(func.name(), so_path)
+
+    def linearize(self, x0, u0):
+        A_lin, B_lin, c = self.lin_func(x0, u0)
+        return A_lin, B_lin, c
 
-        A_val = A_func(x0, u0)
-        B_val = B_func(x0, u0)
+    def define_mpc_convex(self):
+        # QP around a single linearisation point, A_lin/B_lin/c are parameters so the graph is built once
+        self.opti_qp.subject_to(self.X_lin[:, 0] == self.x0)
 
+        # A_lin/B_lin/c are for a step of h, stage k rescales them to its own dt_k (exact for the Euler model)
         I = ca.DM.eye(self.nx)
-        A_lin = I + self.h * A_val
-        B_lin = self.h * B_val
-        f0 = self.dynamics(x0, u0)
+        cost = 0
+        for k in range(self.Nh):
+            s = self.horizon.dt_scale[k]
+            u_k = self.U_lin[:, self.horizon.block_of[k]]
+
+            self.opti_qp.subject_to(self.X_lin[:, k+1] == (I + s * (self.A_lin - I)) @ self.X_lin[:, k] + s * self.B_lin @ u_k + s * self.c)
+
+            cost += s * ca.mtimes([(self.X_lin[:, k] - self.x_ref).T, self.Q, (self.X_lin[:, k] - self.x_ref)])[0, 0]
+            cost += s * ca.mtimes([u_k.T, self.R_mat, u_k])[0, 0]
+
+            self.opti_qp.subject_to(self.X_lin[1, k] >= self.ymin[0])
+
+        # one input per block
+        for j in range(self.horizon.Nb):
+            self.opti_qp.subject_to(ca.vertcat(*self.umin) <= self.U_lin[:, j])
+            self.opti_qp.subject_to(self.U_lin[:, j] <= ca.vertcat(*self.umax))
+
+        cost += ca.mtimes([(self.X_lin[:, self.Nh] - self.x_ref).T, self.Qf, (self.X_lin[:, self.Nh] - self.x_ref)])[0, 0]
+        self.opti_qp.minimize(cost)
+
+    def qp_solver_options(self):
+        # the QP has constant derivatives, telling ipopt so skips re-evaluating them every iteration
+        p_opts = {'expand': True, 'print_time': False}
+        s_opts = {}
+        if self.solver_qp == 'ipopt':
+            s_opts = {'print_level': 0, 'sb': 'yes',
+                      'hessian_constant': 'yes', 'jac_c_constant': 'yes', 'jac_d_constant': 'yes',
+                      'mehrotra_algorithm': 'yes'}
+        return p_opts, s_opts
+
+    def export_function(self):
+        x0 = ca.MX.sym('x0', self.nx)
+        x_ref = ca.MX.sym('x_ref', self.nx)
+        X_init = ca.MX.sym('X_init', self.nx, self.Nh+1)
+        U_init = ca.MX.sym('U_init', self.nu, self.Nh)
+
+        # linearisation is folded into the graph so the caller only passes the current state
+        A_lin, B_lin, c = self.lin_func(x0, ca.DM.zeros(self.nu))
+
+        if self.ltv:
+            X_bar, U_bar = self.ltv_points(x0, X_init, U_init)
+            A_stack, B_stack, c_stack = self.lin_map(X_bar, U_bar, self.horizon.dt.reshape(1, -1))
+            u0, X_opt, U_opt, feasible = self.qp.solve_stacks_symbolic(A_stack, B_stack, c_stack, x0, x_ref, X_init, U_init)
+        elif self.qp is not None:
+            u0, X_opt, U_opt, feasible = self.qp.solve_symbolic(A_lin, B_lin, c, x0, x_ref, X_init, U_init)
+        else:
+            feasible = feasibility_flag(self.opti_qp.x, self.opti_qp.g, self.opti_qp.lbg, self.opti_qp.ubg)
+            qp_func = self.opti_qp.to_function('rocket_qp',
+                                               [self.x0, self.x_ref, self.A_lin, self.B_lin, self.c, self.X_lin, self.U_lin],
+                                               [self.U_lin[:, 0], self.X_lin, self.U_lin, feasible])
+            # inlined, so ipopt is called straight from the exported graph and its stats reach solver_func.stats()
+            u0, X_opt, U_blocks, feasible = qp_func.call([x0, x_ref, A_lin, B_lin, c, X_init,
+                                                          U_init[:, self.horizon.block_start.tolist()]], True, False)
+            U_opt = U_blocks[:, self.horizon.block_of.tolist()]
+
+        return ca.Function('rocket_lin_mpc', [x0, x_ref, X_init, U_init], [u0, X_opt, U_opt, feasible],
+                           ['x0', 'x_ref', 'X_init', 'U_init'], ['u0', 'X_opt', 'U_opt', 'feasible'])
+
+    def solve_mpc_function(self, x0, x_ref):
+        # previous solution shifted by one step is the initial guess
+        t0 = time.perf_counter()
+        if self.X_prev is not None:
+            X_init = np.hstack([self.X_prev[:, 1:], self.X_prev[:, -1:]])
+            U_init = np.hstack([self.U_prev[:, 1:], self.U_prev[:, -1:]])
+        elif self.ltv:
+            # first LTV tick: hold the current state, i.e. linearise at (x0, u=0) like the LTI controller
+            X_init, U_init = np.tile(np.asarray(x0, dtype=float).reshape(-1, 1), self.Nh+1), np.zeros((self.nu, self.Nh))
+        else:
+            X_init, U_init = np.zeros((self.nx, self.Nh+1)), np.zeros((self.nu, self.Nh))
+        t1 = time.perf_counter()
+
+        u0, X_opt, U_opt, feasible = self.solver_func(x0, x_ref, X_init, U_init)
+        self.record_stats(self.solver_func.stats(), bool(feasible))
+        self.X_prev = np.array(X_opt)
+        self.U_prev = np.array(U_opt)
+        # linearisation happens inside the Function, so it is counted as solve time
+        self.timings = {'linearize': 0.0, 'setup': t1 - t0, 'solve': time.perf_counter() - t1}
+        return np.array(u0).flatten()
+
+    def record_stats(self, stats, feasible=True):
+        # a solve that left no success flag is not known to have converged, so it is not reported as one
+        self.iter_count = stats.get('iter_count', -1)
+        self.status = str(stats.get('return_status', 'unknown'))
+        self.success = bool(stats.get('success', False)) and feasible
+
+    def solve_mpc_ltv(self, x0, x_ref):
+        t0 = time.perf_counter()
+        x0 = np.asarray(x0, dtype=float).flatten()
+        if self.X_prev is None:
+            X_init, U_init = np.tile(x0.reshape(-1, 1), self.Nh+1), np.zeros((self.nu, self.Nh))
+        else:
+            X_init = np.hstack([self.X_prev[:, 1:], self.X_prev[:, -1:]])
+            U_init = np.hstack([self.U_prev[:, 1:], self.U_prev[:, -1:]])
+        A_stack, B_stack, c_stack = self.lin_map(*self.ltv_points(x0, X_init, U_init), self.horizon.dt.reshape(1, -1))
+        t1 = time.perf_counter()
+
+        self.qp.prepare(A_stack, B_stack, c_stack, x_ref)
+        t2 = time.perf_counter()
+        u_opt = self.qp.feedback(x0)
+        self.record_stats(self.qp.stats)
+        self.X_prev = self.qp.X_opt()
+        self.U_prev = self.qp.U_opt()
+        self.timings = {'linearize': t1 - t0, 'setup': t2 - t1, 'solve': time.perf_counter() - t2}
+        return np.array(u_opt).flatten()
 
-        c = self.h * f0 - self.h * A_val @ x0 - self.h * B_val @ u0
-        return A_lin, B_lin, c
-    
     def solve_mpc_convex(self, x0, x_ref):
+        if self.use_function:
+            return self.solve_mpc_function(x0, x_ref)
+        if self.ltv:
+            return self.solve_mpc_ltv(x0, x_ref)
+
+        t0 = time.perf_counter()
         u0 = ca.DM.zeros(self.nu)
         x0_dm = ca.DM(x0)
-        x_ref_dm = ca.DM(x_ref)
         A_lin, B_lin, c = self.linearize(x0_dm, u0)
-        
-        opti_qp = ca.Opti()
-        X_lin = opti_qp.variable(self.nx, self.Nh+1)
-        U_lin = opti_qp.variable(self.nu, self.Nh)
-        opti_qp.subject_to(X_lin[:, 0] == x0_dm)
-        
-        cost = 0
-        for k in range(self.Nh):
-
-            opti_qp.subject_to(X_lin[:, k+1] == A_lin @ X_lin[:, k] + B_lin @ U_lin[:, k] + c)
-
-            cost += ca.mtimes([(X_lin[:, k] - x_ref_dm).T, self.Q, (X_lin[:, k] - x_ref_dm)])[0, 0]
-            cost += ca.mtimes([U_lin[:, k].T, self.R_mat, U_lin[:, k]])[0, 0]
-
-            opti_qp.subject_to(ca.vertcat(*self.umin) <= U_lin[:, k])
-            opti_qp.subject_to(U_lin[:, k] <= ca.vertcat(*self.umax))
-
-            opti_qp.subject_to(X_lin[1, k] >= self.ymin[0])
-
-        cost += ca.mtimes([(X_lin[:, self.Nh] - x_ref_dm).T, self.Qf, (X_lin[:, self.Nh] - x_ref_dm)])[0, 0]
-        opti_qp.minimize(cost)
-        
-        opti_qp.solver(self.solver_qp)
-        sol = opti_qp.solve()
-        u_opt = sol.value(U_lin[:, 0])
+        t1 = time.perf_counter()
+
+        if self.qp is not None:
+            self.qp.prepare(*self.qp.lti_stacks(A_lin, B_lin, c), x_ref)
+            t2 = time.perf_counter()
+            u_opt = self.qp.feedback(x0_dm)
+            self.record_stats(self.qp.stats)
+            self.timings = {'linearize': t1 - t0, 'setup': t2 - t1, 'solve': time.perf_counter() - t2}
+            return np.array(u_opt).flatten()
+
+        self.opti_qp.set_value(self.A_lin, A_lin)
+        self.opti_qp.set_value(self.B_lin, B_lin)
+        self.opti_qp.set_value(self.c, c)
+        self.opti_qp.set_value(self.x0, x0_dm)
+        self.opti_qp.set_value(self.x_ref, x_ref)
+        t2 = time.perf_counter()
+
+        try:
+            sol = self.opti_qp.solve()
+        except RuntimeError:
+            # ipopt gave up: the failure is recorded from the debug stats before anything else happens
+            self.record_stats(self.opti_qp.debug.stats())
+            self.timings = {'linearize': t1 - t0, 'setup': t2 - t1, 'solve': time.perf_counter() - t2}
+            u_opt = np.array(self.opti_qp.debug.value(self.U_lin[:, 0])).flatten()
+            if not np.all(np.isfinite(u_opt)):
+                raise
+            # the actuators saturate whatever the last iterate asks for, as in batch_simulator.py
+            return np.clip(u_opt, self.umin, self.umax)
+        self.record_stats(sol.stats())
+        u_opt = sol.value(self.U_lin[:, 0])
+        self.timings = {'linearize': t1 - t0, 'setup': t2 - t1, 'solve': time.perf_counter() - t2}
         return np.array(u_opt).flatten()
 
 class Simulator:
-    def __init__(self, mpc, x_refs, threshold=0.01):
+    def __init__(self, mpc, x_refs, threshold=0.01, plant=None, controller=None, Tfinal=15.0):
         self.mpc = mpc
-        self.Tfinal = 15.0
+        self.plant = plant or Plant(mpc)
+        # anything with solve_mpc_convex and the MPC's solve statistics, e.g. an ExplicitMPC table
+        self.controller = controller or mpc
+        self.Tfinal = Tfinal
         self.Nt = int(self.Tfinal / self.mpc.h)
         self.t_hist = np.linspace(0, self.Tfinal, self.Nt)
         self.xhist = np.zeros((self.mpc.nx, self.Nt))
@@ -158,6 +425,7 @@ class Simulator:
 
     def run_simulation(self):
         progress_interval = max(1, self.Nt // 100)
+        self.recorder = TickRecorder(self.Nt - 1, deadline=self.mpc.h)
 
         for k in range(self.Nt - 1):
             current_ref = self.x_refs[self.current_ref_index]
@@ -167,14 +435,32 @@ class Simulator:
                 current_ref = self.x_refs[self.current_ref_index]
                 print(f"Switching to reference {self.current_ref_index} at time {self.t_hist[k]:.2f}s")
 
-            u = self.mpc.solve_mpc_convex(self.xhist[:, k], current_ref)
+            try:
+                u = self.controller.solve_mpc_convex(self.xhist[:, k], current_ref)
+            except RuntimeError:
+                # a solve with no usable answer still gets its tick, with the stats recorded before the raise
+                self.recorder.record(k, self.t_hist[k], self.current_ref_index, self.controller.timings,
+                                     self.controller.iter_count, self.controller.status, False)
+                raise
             self.uhist[:, k] = u
-            self.xhist[:, k + 1] = np.array(self.mpc.rk4_step(self.xhist[:, k], u, self.mpc.h)).flatten()
-            
+            t_plant = time.perf_counter()
+            self.xhist[:, k + 1] = self.plant.step(self.xhist[:, k], u, self.mpc.h)
+            t_plant = time.perf_counter() - t_plant
+
+            u_violation = np.max(np.maximum(np.array(self.mpc.umin) - u, 0) + np.maximum(u - np.array(self.mpc.umax), 0))
+            self.recorder.record(k, self.t_hist[k], self.current_ref_index, {**self.controller.timings, 'plant': t_plant},
+                                 self.controller.iter_count, self.controller.status, self.controller.success,
+                                 max(self.mpc.ymin[0] - self.xhist[1, k + 1], 0.0), u_violation)
+
             if (k + 1) % progress_interval == 0:
                 progress = 100 * (k + 1) / self.Nt
                 print(f"Simulation progress: {progress:.1f}%")
 
+    def tracking_error(self):
+        # distance from the active reference in the x-y plane, per tick
+        refs = np.array(self.x_refs)[self.recorder.data()['ref_index']]
+        return np.linalg.norm(self.xhist[:2, :self.recorder.n].T - refs[:, :2], axis=1)
+
     def plotter(self):
         plt.figure()
         plt.plot(self.t_hist, self.xhist[0, :], label='x')
@@ -199,53 +485,11 @@ class Simulator:
         plt.grid()
         plt.show()
 
-    def animate(self):
-        x_min, x_max = self.xhist[0, :].min() - 10, self.xhist[0, :].max() + 10
-        y_min, y_max = self.xhist[1, :].min() - 10, self.xhist[1, :].max() + 10
-
-        fig, ax = plt.subplots(figsize=(8, 8))
-        ax.set_aspect('equal')
-        ax.set_xlim(x_min, x_max)
-        ax.set_ylim(y_min, y_max)
-        ax.set_xlabel("x")
-        ax.set_ylabel("y")
-        ax.set_title("Rocket Trajectory Animation")
-
-        ax.axhline(y=self.xhist[1, 0], linestyle='--', color='gray', label='Start Y')
-        ax.axhline(y=self.x_refs[-1][1], linestyle='--', color='gray', label='Reference Y')
-        
-        refs_x = [ref[0] for ref in self.x_refs]
-        refs_y = [ref[1] for ref in self.x_refs]
-        ax.plot(refs_x, refs_y, '*', color='gold', markersize=12, label='References')
-        
-        body_width = 3
-        body_height = 10
-
-        rocket_body = patches.Rectangle((-body_width/2, -body_height/2), body_width, body_height,
-                                        fc="white", ec="black")
-        ax.add_patch(rocket_body)
-        
-        nose_coords = np.array([[-body_width/2, body_height/2],
-                                [ body_width/2, body_height/2],
-                                [0, body_height/2 + 5]])
-        rocket_nose = patches.Polygon(nose_coords, closed=True, fc="white", ec="black")
-        ax.add_patch(rocket_nose)
-        
-        traj_line, = ax.plot([], [], '--', color='gray', label='Trajectory')
-
-        def update(frame):
-            state = self.xhist[:, frame]
-            x_pos, y_pos, theta = state[0], state[1], state[2] - math.pi/2
-            transform = plt.matplotlib.transforms.Affine2D().rotate(theta).translate(x_pos, y_pos)
-            rocket_body.set_transform(transform + ax.transData)
-            rocket_nose.set_transform(transform + ax.transData)
-            traj_line.set_data(self.xhist[0, :frame+1], self.xhist[1, :frame+1])
-            return rocket_body, rocket_nose, traj_line
-
-        ani = animation.FuncAnimation(fig, update, frames=self.Nt, interval=50,
-                                      blit=True, repeat=True, repeat_delay=2000)
-        plt.legend()
-        plt.show()
+    def animate(self, save_path=None, fps=30, speed=1.0):
+        # interactive window by default, with a save_path the run is rendered headless to .mp4/.gif
+        if save_path is None:
+            return render.show_animation(self.xhist, self.x_refs)
+        return render.render_to_file(self.xhist, self.x_refs, self.mpc.h, save_path, fps=fps, speed=speed)
 
 if __name__ == '__main__':
     mpc = MPC(solver_nl='ipopt', solver_qp='ipopt')
@@ -1,12 +1,18 @@
 import numpy as np
 import casadi as ca
 import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-import matplotlib.animation as animation
 import math
+import time
+import os
+import hashlib
+from qp_backend import SparseMPCQP, feasibility_flag
+from horizon import Horizon
+from plant import Plant
+import render
 
 class MPC:
-    def __init__(self, solver: str):
+    def __init__(self, solver: str, warm_start=False, use_function=False, function_path=None,
+                 rti=False, rti_qp='osqp', horizon=None, tuning=None):
         self.G = 6.67430e-11
         self.M = 5.972e24
         self.R = 8371000.0  
@@ -16,6 +22,9 @@ class MPC:
         self.ell = 13.0
         self.radius = 5.0
         self.J = 0.25 * self.m * self.radius**2 + 1/12 * self.m * self.ell**2
+        #radius used by the gravity term of the dynamics and the unit scaling of y inside it
+        self.r_dyn = 8371000000.0
+        self.y_scale = 1000000.0
 
         self.F_g = self.G * self.M * self.m / self.R**2
 
@@ -24,15 +33,17 @@ class MPC:
         self.umax = [900, math.pi/4, 200]
 
         #MPC TUNING
-        self.h = 0.05
-        self.Nh = 20
+        self.h = (tuning or {}).get('h', 0.05)
+        #STEP SIZES AND MOVE-BLOCKING OF THE PREDICTION (20 uniform steps by default)
+        self.horizon = horizon or Horizon.uniform_steps(self.h, 20)
+        self.Nh = self.horizon.Nh
         self.nx = 6    
         self.nu = 3   
 
         #SETTING VARIABLES FOR CASADI
         self.opti = ca.Opti()
         self.X = self.opti.variable(self.nx, self.Nh+1)  
-        self.U = self.opti.variable(self.nu, self.Nh)     
+        self.U = self.opti.variable(self.nu, self.horizon.Nb)
         self.e0 = self.opti.parameter(self.nx)              
 
         self.xref_param = self.opti.parameter(self.nx)
@@ -41,11 +52,69 @@ class MPC:
         self.Q = np.diag([1000, 1000, 3000, 10, 10, 100000])  
         self.R = np.diag([0.1, 1, 0.1])  
         self.Qf = np.diag([1000, 1000, 2000, 100, 100, 100000])
+        #OVERRIDES OF THE WEIGHTS ABOVE (e.g. from sweep.py)
+        self.apply_tuning(tuning or {})
 
         self.solver = solver
-
-        self.define_mpc()  
-        self.opti.solver(solver)  
+        self.warm_start = warm_start
+
+        #PREVIOUS SOLUTION (shifted and reused as the next initial guess)
+        self.X_prev = None
+        self.U_prev = None
+        self.lam_g_prev = None
+        self.iter_count = 0
+        self.success = True
+
+        #WHOLE OCP AS ONE CASADI FUNCTION (x0, x_ref, X_init, U_init) -> (u0, X_opt, U_opt, feasible)
+        self.use_function = use_function or function_path is not None
+        self.solver_func = None
+
+        if function_path is not None and self.stored_signature(function_path) == self.function_signature():
+            #load the serialised solver, no symbolic graph needs to be built
+            self.solver_func = ca.Function.load(function_path)
+        else:
+            #no file yet, or one saved for other settings: build and (over)write it
+            self.define_mpc()  
+            self.opti.solver(solver, {}, self.solver_options())  
+            if self.use_function:
+                self.solver_func = self.export_function()
+                if function_path is not None:
+                    self.solver_func.save(function_path)
+                    with open(function_path + '.sig', 'w') as f:
+                        f.write(self.function_signature())
+
+        #REAL-TIME ITERATION: one Gauss-Newton SQP step (a single QP) per tick
+        self.rti = rti
+        self.rti_ref = None
+        self.t_prepare = 0.0
+        self.t_feedback = 0.0
+        if self.rti:
+            self.build_rti(rti_qp)
+
+    def function_signature(self):
+        #hash of everything the exported solver depends on, the source of this script included
+        parts = [self.Q, self.R, self.Qf, self.umin, self.umax, self.ymin, [self.h], self.horizon.dt,
+                 self.horizon.blocks]
+        text = f"{self.solver}"
+        with open(os.path.abspath(__file__), 'rb') as f:
+            source = f.read()
+        return hashlib.sha1(b''.join(np.asarray(p, dtype=float).tobytes() for p in parts) + text.encode()
+                            + source).hexdigest()
+
+    @staticmethod
+    def stored_signature(function_path):
+        #signature saved next to a serialised solver, None when there is none
+        if not (os.path.exists(function_path) and os.path.exists(function_path + '.sig')):
+            return None
+        with open(function_path + '.sig') as f:
+            return f.read().strip()
+
+    def apply_tuning(self, tuning):
+        #weights may be given as a diagonal or a full matrix, R_mat is accepted as an alias of R
+        for name, attr in [('Q', 'Q'), ('R', 'R'), ('R_mat', 'R'), ('Qf', 'Qf')]:
+            if name in tuning:
+                value = np.asarray(tuning[name], dtype=float)
+                setattr(self, attr, np.diag(value) if value.ndim == 1 else value)
 
     def dynamics(self, x, u):
         x_dot = x[3]
@@ -55,7 +124,7 @@ class MPC:
         torque = u[0] * ca.sin(u[1]) + u[2]
 
         x_ddot = u[0] / self.m * ca.cos(x[2] + u[1]) - u[2]*ca.sin(x[2])/self.m
-        y_ddot = (u[0] / self.m * ca.sin(x[2] + u[1])) - ( self.G * self.M/ ((8371000000.0 + x[1]*1000000)**2))  + ((x_dot)**2 / (8371000000.0 + x[1]*1000000) ) + u[2]*ca.cos(x[2])/self.m
+        y_ddot = (u[0] / self.m * ca.sin(x[2] + u[1])) - ( self.G * self.M/ ((self.r_dyn + x[1]*self.y_scale)**2))  + ((x_dot)**2 / (self.r_dyn + x[1]*self.y_scale) ) + u[2]*ca.cos(x[2])/self.m
         theta_ddot = (self.ell / (2 * self.J)) * torque
 
         return ca.vertcat(x_dot, y_dot, theta_dot, x_ddot, y_ddot, theta_ddot)
@@ -73,17 +142,21 @@ class MPC:
         cost = 0
 
         for k in range(self.Nh):
-            x_next = self.rk4_step(self.X[:, k], self.U[:, k], self.h)
+            #stage k integrates over its own dt with the input of its block
+            s = self.horizon.dt_scale[k]
+            u_k = self.U[:, self.horizon.block_of[k]]
+            x_next = self.rk4_step(self.X[:, k], u_k, self.horizon.dt[k])
             self.opti.subject_to(self.X[:, k + 1] == x_next)
 
             #COST FUNCTION
-            cost += ca.mtimes([(self.X[:, k] - self.xref_param).T, self.Q, (self.X[:, k] - self.xref_param)])[0, 0]
-            cost += ca.mtimes([self.U[:, k].T, self.R, self.U[:, k]])[0, 0]
+            cost += s * ca.mtimes([(self.X[:, k] - self.xref_param).T, self.Q, (self.X[:, k] - self.xref_param)])[0, 0]
+            cost += s * ca.mtimes([u_k.T, self.R, u_k])[0, 0]
             cost += ca.mtimes([(self.X[:, self.Nh] - self.xref_param).T, self.Qf, (self.X[:, self.Nh] - self.xref_param)])[0, 0]
 
-            #CONSTRAINTS
-            self.opti.subject_to(ca.vertcat(*self.umin) <= self.U[:, k])
-            self.opti.subject_to(self.U[:, k] <= ca.vertcat(*self.umax))
+            #CONSTRAINTS (input bounds once per block)
+            if k in self.horizon.block_start:
+                self.opti.subject_to(ca.vertcat(*self.umin) <= u_k)
+                self.opti.subject_to(u_k <= ca.vertcat(*self.umax))
             self.opti.subject_to(self.X[1, k] >= self.ymin[0])
 
 
@@ -91,21 +164,163 @@ class MPC:
         cost += ca.mtimes([(self.X[:, self.Nh] - self.xref_param).T, self.Qf, (self.X[:, self.Nh] - self.xref_param)])[0, 0]
         self.opti.minimize(cost)
 
+    def build_rti(self, rti_qp):
+        #RK4 step linearised as x_{k+1} ~ A_k x_k + B_k u_k + c_k, evaluated over the horizon in one call
+        x = ca.SX.sym('x', self.nx)
+        u = ca.SX.sym('u', self.nu)
+        dt = ca.SX.sym('dt')
+        x_next = self.rk4_step(x, u, dt)
+        A = ca.jacobian(x_next, x)
+        B = ca.jacobian(x_next, u)
+        c = x_next - A @ x - B @ u
+        self.lin_step = ca.Function('lin_step', [x, u, dt], [A, B, c])
+        self.lin_map = self.lin_step.map(self.Nh)
+
+        #define_mpc adds the terminal cost once per step plus once at the end, keep the same weighting
+        self.qp = SparseMPCQP(self.nx, self.nu, self.Nh, self.Q, self.R, (self.Nh + 1) * self.Qf,
+                              self.umin, self.umax, self.ymin, plugin=rti_qp, horizon=self.horizon)
+
+    def rti_prepare(self, x_ref, shift=True):
+        #preparation phase: linearise along the (shifted) previous solution and build the QP
+        X_bar = self.shift(self.X_prev) if shift else self.X_prev
+        U_bar = self.shift(self.U_prev) if shift else self.U_prev
+        A, B, c = self.lin_map(X_bar[:, :-1], U_bar, self.horizon.dt.reshape(1, -1))
+        self.qp.prepare(A, B, c, x_ref)
+        self.rti_ref = np.array(x_ref, dtype=float)
+
+    def rti_feedback(self, x0):
+        #feedback phase: a single QP solve with the measured state
+        u = self.qp.feedback(x0)
+        self.X_prev = self.qp.X_opt()
+        self.U_prev = self.qp.U_opt()
+        return u
+
+    def solve_mpc_rti(self, x0, x_ref):
+        t_start = time.perf_counter()
+        if self.X_prev is None:
+            #first tick: RTI needs a good initial guess, take it from one converged nonlinear solve
+            self.opti.set_value(self.e0, x0)
+            self.opti.set_value(self.xref_param, x_ref)
+            sol = self.opti.solve()
+            self.X_prev = np.array(sol.value(self.X)).reshape(self.nx, self.Nh + 1)
+            self.U_prev = self.horizon.expand(np.array(sol.value(self.U)).reshape(self.nu, self.horizon.Nb))
+            self.rti_prepare(x_ref, shift=False)
+        elif self.rti_ref is None or not np.array_equal(self.rti_ref, x_ref):
+            self.rti_prepare(x_ref)
+        t_ready = time.perf_counter()
+
+        u = self.rti_feedback(x0)
+        self.iter_count = 1
+        self.success = bool(self.qp.stats.get('success', False))
+        t_feedback = time.perf_counter()
+
+        #prepare the next tick while the control is being applied
+        self.rti_prepare(x_ref)
+        t_end = time.perf_counter()
+
+        self.t_feedback = t_feedback - t_ready
+        self.t_prepare = (t_ready - t_start) + (t_end - t_feedback)
+        return u
+
+    def solver_options(self):
+        if not (self.warm_start and self.solver == 'ipopt'):
+            return {}
+        #start from the supplied primal/dual guess instead of pushing it back into the interior
+        return {'warm_start_init_point': 'yes',
+                'warm_start_bound_push': 1e-9,
+                'warm_start_bound_frac': 1e-9,
+                'warm_start_slack_bound_push': 1e-9,
+                'warm_start_slack_bound_frac': 1e-9,
+                'warm_start_mult_bound_push': 1e-9,
+                'mu_init': 1e-5}
+
+    def shift(self, traj):
+        #drop the first column and repeat the last one so the horizon keeps its length
+        return np.hstack([traj[:, 1:], traj[:, -1:]])
+
+    def shift_multipliers(self, lam_g):
+        #constraints are ordered as the initial condition followed by one equal sized block per step
+        lam_init = lam_g[:self.nx]
+        lam_steps = lam_g[self.nx:].reshape(self.Nh, -1)
+        lam_steps = np.vstack([lam_steps[1:], lam_steps[-1:]])
+        return np.concatenate([lam_init, lam_steps.flatten()])
+
+    def export_function(self):
+        #the Function always takes and returns one input column per stage, blocks are handled inside
+        feasible = feasibility_flag(self.opti.x, self.opti.g, self.opti.lbg, self.opti.ubg)
+        ocp = self.opti.to_function('rocket_ocp', [self.e0, self.xref_param, self.X, self.U], [self.X, self.U, feasible])
+        x0 = ca.MX.sym('x0', self.nx)
+        x_ref = ca.MX.sym('x_ref', self.nx)
+        X_init = ca.MX.sym('X_init', self.nx, self.Nh + 1)
+        U_init = ca.MX.sym('U_init', self.nu, self.Nh)
+        #inlined, so ipopt is called straight from the exported graph and its stats reach solver_func.stats()
+        X_opt, U_blocks, feasible = ocp.call([x0, x_ref, X_init, U_init[:, self.horizon.block_start.tolist()]], True, False)
+        U_opt = U_blocks[:, self.horizon.block_of.tolist()]
+        return ca.Function('rocket_mpc', [x0, x_ref, X_init, U_init], [U_opt[:, 0], X_opt, U_opt, feasible],
+                           ['x0', 'x_ref', 'X_init', 'U_init'], ['u0', 'X_opt', 'U_opt', 'feasible'])
+
+    def solve_mpc_function(self, x0, x_ref):
+        if self.warm_start and self.X_prev is not None:
+            X_init, U_init = self.shift(self.X_prev), self.shift(self.U_prev)
+        else:
+            X_init, U_init = np.zeros((self.nx, self.Nh + 1)), np.zeros((self.nu, self.Nh))
+
+        u0, X_opt, U_opt, feasible = self.solver_func(x0, x_ref, X_init, U_init)
+        #a solve that left no stats is not known to have converged, so it is not reported as one
+        stats = self.solver_func.stats()
+        self.iter_count = stats.get('iter_count', -1)
+        self.success = bool(stats.get('success', False)) and bool(feasible)
+
+        if self.warm_start:
+            self.X_prev = np.array(X_opt)
+            self.U_prev = np.array(U_opt)
+
+        return np.array(u0).flatten()
+
     def solve_mpc(self, x0, x_ref):
+        if self.rti:
+            return self.solve_mpc_rti(x0, x_ref)
+        if self.use_function:
+            return self.solve_mpc_function(x0, x_ref)
+
         self.opti.set_value(self.e0, x0)
         self.opti.set_value(self.xref_param, x_ref)
+
+        if self.warm_start and self.X_prev is not None:
+            self.opti.set_initial(self.X, self.shift(self.X_prev))
+            self.opti.set_initial(self.U, self.horizon.compress(self.shift(self.U_prev)))
+            #a blocked horizon has no fixed constraint block per step, so only the primal guess is shifted
+            if not self.horizon.blocked:
+                self.opti.set_initial(self.opti.lam_g, self.shift_multipliers(self.lam_g_prev))
+
         sol = self.opti.solve()
+        self.iter_count = sol.stats()['iter_count']
+        self.success = sol.stats()['success']
+
+        if self.warm_start:
+            self.X_prev = np.array(sol.value(self.X)).reshape(self.nx, self.Nh + 1)
+            self.U_prev = self.horizon.expand(np.array(sol.value(self.U)).reshape(self.nu, self.horizon.Nb))
+            self.lam_g_prev = np.array(sol.value(self.opti.lam_g)).flatten()
+
         return np.array(sol.value(self.U[:, 0]))
 
 
 class Simulator:
-    def __init__(self, mpc, x_refs, threshold=0.01):
+    def __init__(self, mpc, x_refs, threshold=0.01, plant=None, Tfinal=12.0, verbose=False):
         self.mpc = mpc
-        self.Tfinal = 12.0
+        #verbose prints one line per tick, otherwise only the summary at the end of the run
+        self.verbose = verbose
+        self.plant = plant or Plant(mpc)
+        self.Tfinal = Tfinal
         self.Nt = int(self.Tfinal / self.mpc.h)
         self.t_hist = np.linspace(0, self.Tfinal, self.Nt)
         self.xhist = np.zeros((self.mpc.nx, self.Nt))
         self.uhist = np.zeros((self.mpc.nu, self.Nt - 1))
+        self.iter_hist = np.zeros(self.Nt - 1, dtype=int)
+        self.success_hist = np.ones(self.Nt - 1, dtype=bool)
+        self.solve_time_hist = np.zeros(self.Nt - 1)
+        self.feedback_time_hist = np.zeros(self.Nt - 1)
+        self.ref_index_hist = np.zeros(self.Nt - 1, dtype=int)
         self.x_refs = x_refs
         self.threshold = threshold
 
@@ -122,10 +337,27 @@ class Simulator:
                 self.current_ref_index += 1
                 current_ref = self.x_refs[self.current_ref_index]
                 print(f"Switching to reference {self.current_ref_index} at time {self.t_hist[k]:.2f}s")
+            t_start = time.perf_counter()
             u = self.mpc.solve_mpc(self.xhist[:, k], current_ref)
+            self.solve_time_hist[k] = time.perf_counter() - t_start
+            self.feedback_time_hist[k] = self.mpc.t_feedback if self.mpc.rti else self.solve_time_hist[k]
+            self.iter_hist[k] = self.mpc.iter_count
+            self.success_hist[k] = self.mpc.success
+            self.ref_index_hist[k] = self.current_ref_index
+            if self.verbose:
+                print(f"Tick {k}: {self.iter_hist[k]} iterations, {1000 * self.solve_time_hist[k]:.1f} ms")
+
             self.uhist[:, k] = u
-            self.xhist[:, k + 1] = np.array(self.mpc.rk4_step(self.xhist[:, k], u, self.mpc.h)).flatten()
+            self.xhist[:, k + 1] = self.plant.step(self.xhist[:, k], u, self.mpc.h)
+
+        print(f"Solver iterations per tick: mean {self.iter_hist.mean():.1f}, max {self.iter_hist.max()} | "
+              f"solve time per tick: mean {1000 * self.solve_time_hist.mean():.1f} ms | "
+              f"failed solves: {np.sum(~self.success_hist)}")
 
+    def tracking_error(self):
+        #distance from the active reference in the x-y plane, per tick
+        refs = np.array(self.x_refs)[self.ref_index_hist]
+        return np.linalg.norm(self.xhist[:2, :-1].T - refs[:, :2], axis=1)
 
     def plotter(self):
 
@@ -154,60 +386,34 @@ class Simulator:
         plt.show()
 
 
-    def animate(self):
+    def animate(self, save_path=None, fps=30, speed=1.0):
+        #interactive window by default, with a save_path the run is rendered headless to .mp4/.gif
+        if save_path is None:
+            return render.show_animation(self.xhist, self.x_refs)
+        return render.render_to_file(self.xhist, self.x_refs, self.mpc.h, save_path, fps=fps, speed=speed)
 
-        x_min, x_max = self.xhist[0, :].min() - 10, self.xhist[0, :].max() + 10
-        y_min, y_max = self.xhist[1, :].min() - 10, self.xhist[1, :].max() + 10
 
-        fig, ax = plt.subplots(figsize=(8, 8))
-        ax.set_aspect('equal')
-        ax.set_xlim(x_min, x_max)
-        ax.set_ylim(y_min, y_max)
-        ax.set_xlabel("x")
-        ax.set_ylabel("y")
-        ax.set_title("Rocket Trajectory Animation")
+def compare_rti(x_refs, threshold=20.0, rti_qp='osqp'):
+    #closed-loop tracking and per-tick timing of the full warm-started solve against RTI
+    results = {}
+    for name, mpc in [('full', MPC('ipopt', warm_start=True)), ('rti', MPC('ipopt', rti=True, rti_qp=rti_qp))]:
+        sim = Simulator(mpc, x_refs, threshold=threshold)
+        sim.run_simulation()
+        results[name] = sim
 
-        ax.axhline(y=self.xhist[1, 0], linestyle='--', color='gray', label='Start Y')
-        ax.axhline(y=self.x_refs[-1][1], linestyle='--', color='gray', label='Reference Y')
-        
-        refs_x = [ref[0] for ref in self.x_refs]
-        refs_y = [ref[1] for ref in self.x_refs]
-        ax.plot(refs_x, refs_y, '*', color= 'gold' ,markersize=12, label='References')
-        
-        body_width = 3
-        body_height = 10
-
-        rocket_body = patches.Rectangle((-body_width/2, -body_height/2), body_width, body_height,
-                                        fc="white", ec="black")
-        ax.add_patch(rocket_body)
-        
-        nose_coords = np.array([[-body_width/2, body_height/2],
-                                [ body_width/2, body_height/2],
-                                [0, body_height/2 + 5]])
-        rocket_nose = patches.Polygon(nose_coords, closed=True, fc="white", ec="black")
-        ax.add_patch(rocket_nose)
-        
-        traj_line, = ax.plot([], [], '--', color = 'gray' ,label='Trajectory')
-
-        def update(frame):
-            state = self.xhist[:, frame]
-            x_pos, y_pos, theta = state[0], state[1], state[2] - math.pi/2
-   
-            transform = plt.matplotlib.transforms.Affine2D().rotate(theta).translate(x_pos, y_pos)
-            rocket_body.set_transform(transform + ax.transData)
-            rocket_nose.set_transform(transform + ax.transData)
-            
-            traj_line.set_data(self.xhist[0, :frame+1], self.xhist[1, :frame+1])
-            return rocket_body, rocket_nose, traj_line
-
-        ani = animation.FuncAnimation(fig, update, frames=self.Nt, interval=50,
-                                        blit=True, repeat=True, repeat_delay=2000)
-        plt.legend()
-        plt.show()
+    print(f"{'mode':>5} {'rms err':>8} {'refs':>5} {'tick p50 [ms]':>14} {'tick max [ms]':>14} {'feedback p50 [ms]':>18}")
+    for name, sim in results.items():
+        err = sim.tracking_error()
+        print(f"{name:>5} {np.sqrt(np.mean(err**2)):8.2f} {sim.current_ref_index:5d} "
+              f"{1000 * np.median(sim.solve_time_hist):14.2f} {1000 * sim.solve_time_hist.max():14.2f} "
+              f"{1000 * np.median(sim.feedback_time_hist):18.2f}")
+    dev = np.abs(results['full'].xhist[:2] - results['rti'].xhist[:2]).max()
+    print(f"max position deviation between the two closed loops: {dev:.2f}")
+    return results
 
 
 if __name__ == '__main__':
-    mpc = MPC('ipopt')
+    mpc = MPC('ipopt', warm_start=True)
     x_refs = [
         np.array([150, 100, math.pi / 4, 10, 0, 0]),
         np.array([200, 130, math.pi / 5, 10, 0, 0]),
@@ -0,0 +1,353 @@
+###===--------------------------------------------===###
+# Script:        ascent.py
+# Authors:       Demir Kucukdemiral 2883935K, Charikleia Nikou 2881802N, Cameron Norrington 2873038N, Adam Burns 2914690B, Ben Maconnachie 2911209M, Jeremi Rozanski 2881882R
+# Created on:    2026-10
+# Last Modified: 2026-10
+# Description:   Reusable vertical-ascent + gravity-turn trajectory engine behind trajectory.py
+# Version:       1.0
+###===--------------------------------------------===###
+
+import math
+from dataclasses import dataclass, field
+import numpy as np
+from scipy.integrate import solve_ivp
+
+try:
+    from numba import njit
+except ImportError:
+    # without numba the same loop runs as plain Python on floats
+    def njit(**kwargs):
+        return lambda f: f
+
+"""
+simulate_ascent(config) flies the model of trajectory.py: a vertical ascent
+up to the pitch-over time, a pitch kick to pitch_angle, then a gravity
+turn over a round Earth. It uses the same explicit update with a fixed
+step dt. The propulsion is a list of BurnSegments. Each segment takes
+over at its start time and sets the thrust, the mass flow and a mass
+clock:
+
+    mass = m0 - mdot * (t - clock)
+
+Thrust cuts out for the rest of the segment once the mass reaches m_dry.
+m0=None carries the current mass over, and clock defaults to the start
+time. TRAJECTORY_PY is the original setup, so the defaults reproduce that
+script's arrays exactly.
+
+The loop keeps its state in local floats and writes one row per step. It
+is compiled with numba when available and runs as plain Python otherwise.
+The result is a structured array with one record per step.
+
+integrate_ascent(config) solves the same model as an ODE in
+(x, z, vel, gamma) with solve_ivp (RK45, DOP853, ...) under error control.
+The flight is cut into arcs at the pitch-over and at each segment start.
+Within an arc, burnout (mass down to m_dry) and apogee (vertical velocity
+through zero) are found as events, so all of these times are exact
+rather than rounded to dt. The step size grows on the long coast after
+burnout. The returned AscentSolution samples the dense output of every
+arc at any times and lists the event times. simulate_ascent(config,
+method='DOP853') samples it on the fixed-step time grid.
+"""
+
+FIELDS = ['time', 'vel', 'velx', 'velz', 'x', 'z', 'gamma', 'acc', 'mass']
+RESULT_DTYPE = np.dtype([(f, 'f8') for f in FIELDS])
+
+
+@dataclass
+class BurnSegment:
+    start: float
+    thrust: float
+    mdot: float
+    m0: float = None
+    m_dry: float = 0.0
+    clock: float = None
+
+
+@dataclass
+class AscentConfig:
+    segments: list = field(default_factory=list)
+    pitch_time: float = 89.9
+    pitch_angle: float = 75.0
+    t_final: float = 1089.9
+    dt: float = 0.1
+    gravity: float = 9.81
+    R_earth: float = 6.371e6
+
+    def step_of(self, t):
+        return int(round(t / self.dt))
+
+    def step_time(self, step):
+        # time of a step as the loop accumulates it (t += dt), so it equals the recorded time exactly
+        t = 0.0
+        for _ in range(step):
+            t += self.dt
+        return t
+
+    def segment_table(self):
+        # (n_segments, 6): start step, clock time, thrust, mdot, m0 (NaN carries the mass over), m_dry
+        table = np.zeros((len(self.segments), 6))
+        for i, seg in enumerate(sorted(self.segments, key=lambda s: s.start)):
+            clock = self.step_time(self.step_of(seg.start if seg.clock is None else seg.clock))
+            table[i] = [self.step_of(seg.start), clock, seg.thrust, seg.mdot,
+                        np.nan if seg.m0 is None else seg.m0, seg.m_dry]
+        return table
+
+
+# trajectory.py: booster to the pitch-over, boosters again with a new mass flow, then the core stage from 110 s,
+# both later segments clocked from the pitch-over
+TRAJECTORY_PY = AscentConfig(segments=[
+    BurnSegment(start=0.0, thrust=9.116e6 * 4, mdot=10150, m0=1.4016e6, m_dry=1e-6),
+    BurnSegment(start=90.0, thrust=9.116e6 * 4, mdot=8218, m0=None, m_dry=0.0, clock=89.9),
+    BurnSegment(start=110.0, thrust=7.887e6, mdot=2379, m0=450e3, m_dry=100.3e3, clock=89.9),
+])
+
+
+def initial_state(table, gravity):
+    # loop state at lift-off: the FIELDS of step 0, then segment, thrust, mdot, m0, m_dry and clock time
+    thrust, mdot, m0, m_dry = table[0, 2], table[0, 3], table[0, 4], table[0, 5]
+    return np.array([0.0, 0.0, 0.0, 0.0, 0.0, 0.0, math.pi / 2, thrust / m0 - gravity, m0,
+                     0.0, thrust, mdot, m0, m_dry, table[0, 1]])
+
+
+@njit(cache=True)
+def fly(segments, n_vertical, k0, k1, dt, pitch, g, R, state, out):
+    # explicit ascent loop over the steps k0..k1-1 from state, which is updated in place;
+    # row k - k0 of out gets step k in FIELDS order
+    t, vel, velx, velz, x, z, gamma, acc, mass = state[0], state[1], state[2], state[3], state[4], state[5], \
+        state[6], state[7], state[8]
+    seg = int(state[9])
+    thrust, mdot, m0, m_dry, t_clock = state[10], state[11], state[12], state[13], state[14]
+
+    for k in range(k0, k1):
+        while seg + 1 < segments.shape[0] and segments[seg + 1, 0] <= k:
+            seg += 1
+            thrust = segments[seg, 2]
+            mdot = segments[seg, 3]
+            m0 = mass if math.isnan(segments[seg, 4]) else segments[seg, 4]
+            m_dry = segments[seg, 5]
+            t_clock = segments[seg, 1]
+
+        t_prev, vel_prev, velx_prev, velz_prev, z_prev, gamma_prev, acc_prev = t, vel, velx, velz, z, gamma, acc
+        t = t_prev + dt
+        mass = m0 - mdot * (t - t_clock)
+        if mass <= m_dry:
+            mass = m_dry
+            thrust = 0.0
+
+        if k < n_vertical:
+            velz = velz_prev + acc_prev * dt
+            velx = 0.0
+            vel = math.sqrt(velz * velz)
+            acc = thrust / mass - g
+            x = 0.0
+            z = z_prev + velz_prev * dt + 0.5 * acc_prev * dt * dt
+            if k == n_vertical - 1:
+                gamma = pitch
+        else:
+            thrust_acc = thrust / mass
+            cos_g = math.cos(gamma_prev)
+            sin_g = math.sin(gamma_prev)
+            vel = vel_prev + dt * (thrust_acc - g * sin_g)
+            velx = vel * cos_g
+            velz = vel * sin_g
+            x = x + velx_prev * dt + 0.5 * thrust_acc * cos_g * dt * dt
+            z = z_prev + velz_prev * dt + 0.5 * (thrust_acc * sin_g - g) * dt * dt
+            if vel_prev > 1e-6:
+                gamma = gamma_prev + vel * cos_g * dt / (R + z_prev) - g * cos_g * dt / vel_prev
+            acc = thrust_acc
+
+        i = k - k0
+        out[i, 0] = t
+        out[i, 1] = vel
+        out[i, 2] = velx
+        out[i, 3] = velz
+        out[i, 4] = x
+        out[i, 5] = z
+        out[i, 6] = gamma
+        out[i, 7] = acc
+        out[i, 8] = mass
+
+    state[0], state[1], state[2], state[3], state[4], state[5], state[6], state[7], state[8] = \
+        t, vel, velx, velz, x, z, gamma, acc, mass
+    state[9], state[10], state[11], state[12], state[13], state[14] = seg, thrust, mdot, m0, m_dry, t_clock
+    return out
+
+
+def simulate_ascent(config=TRAJECTORY_PY, method='euler', recorder=None, chunk_rows=4096, **options):
+    # one record per step with the fields of FIELDS, gamma in radians; any other method samples
+    # integrate_ascent(config, method, **options) on the same time grid. With a recorder (see recorder.py)
+    # the records are streamed into it chunk_rows at a time and the recorder is returned instead
+    n_steps = config.step_of(config.t_final) + 1
+    if method != 'euler':
+        solution = integrate_ascent(config, method, **options)
+        if recorder is None:
+            return solution.sample(np.arange(n_steps) * config.dt)
+        for k0 in range(0, n_steps, chunk_rows):
+            recorder.append(solution.sample(np.arange(k0, min(k0 + chunk_rows, n_steps)) * config.dt), k0)
+        recorder.close()
+        return recorder
+
+    table = config.segment_table()
+    state = initial_state(table, config.gravity)
+    args = (table, config.step_of(config.pitch_time) + 1)
+    consts = (config.dt, math.radians(config.pitch_angle), config.gravity, config.R_earth)
+    if recorder is None:
+        out = np.zeros((n_steps, len(FIELDS)))
+        out[0] = state[:len(FIELDS)]
+        fly(*args, 1, n_steps, *consts, state, out[1:])
+        return out.view(RESULT_DTYPE).reshape(-1)
+
+    buf = np.zeros((chunk_rows, len(FIELDS)))
+    buf[0] = state[:len(FIELDS)]
+    recorder.append(buf[:1].view(RESULT_DTYPE).reshape(-1), 0)
+    for k0 in range(1, n_steps, chunk_rows):
+        k1 = min(k0 + chunk_rows, n_steps)
+        fly(*args, k0, k1, *consts, state, buf)
+        recorder.append(buf[:k1 - k0].view(RESULT_DTYPE).reshape(-1), k0)
+    recorder.close()
+    return recorder
+
+
+@dataclass
+class Arc:
+    # one smooth piece of the flight: its time span, dense output and propulsion
+    t0: float
+    t1: float
+    sol: object
+    vertical: bool
+    thrust: float
+    mdot: float
+    m0: float
+    clock: float
+    m_dry: float
+    burnt: bool
+
+    def mass(self, t):
+        if self.burnt:
+            return np.full_like(t, self.m_dry)
+        return np.maximum(self.m0 - self.mdot * (t - self.clock), self.m_dry)
+
+
+@dataclass
+class AscentSolution:
+    arcs: list
+    events: list
+    nfev: int
+    gravity: float
+    status: str = ""
+
+    @property
+    def t_final(self):
+        return self.arcs[-1].t1
+
+    def event_times(self, name):
+        return [t for kind, t in self.events if kind == name]
+
+    def sample(self, t):
+        # records at the times t, at an arc boundary the later arc is used
+        t = np.atleast_1d(np.asarray(t, dtype=float))
+        out = np.zeros((len(t), len(FIELDS)))
+        starts = np.array([arc.t0 for arc in self.arcs])
+        which = np.clip(np.searchsorted(starts, t, side='right') - 1, 0, len(self.arcs) - 1)
+        for i in np.unique(which):
+            arc, sel = self.arcs[i], which == i
+            x, z, vel, gamma = arc.sol(t[sel])
+            mass = arc.mass(t[sel])
+            thrust_acc = 0.0 if arc.burnt else arc.thrust / mass
+            out[sel, 0] = t[sel]
+            out[sel, 1] = vel
+            out[sel, 2] = 0.0 if arc.vertical else vel * np.cos(gamma)
+            out[sel, 3] = vel if arc.vertical else vel * np.sin(gamma)
+            out[sel, 4] = x
+            out[sel, 5] = z
+            out[sel, 6] = gamma
+            # trajectory.py records the net acceleration while vertical and the thrust acceleration after
+            out[sel, 7] = thrust_acc - self.gravity if arc.vertical else thrust_acc
+            out[sel, 8] = mass
+        return out.view(RESULT_DTYPE).reshape(-1)
+
+
+def integrate_ascent(config=TRAJECTORY_PY, method='DOP853', rtol=1e-8, atol=1e-6, stop_at_apogee=False):
+    # adaptive solve of the ascent, arcs split at the pitch-over and the segment starts
+    g, R = config.gravity, config.R_earth
+    segments = sorted(config.segments, key=lambda s: s.start)
+    breaks = sorted([(config.pitch_time, 'pitch_over', None)]
+                    + [(seg.start, 'staging', seg) for seg in segments[1:]], key=lambda b: b[0])
+    breaks = [b for b in breaks if 0.0 < b[0] < config.t_final] + [(config.t_final, 'end', None)]
+
+    first = segments[0]
+    prop = {'thrust': first.thrust, 'mdot': first.mdot, 'm0': first.m0,
+            'clock': first.start if first.clock is None else first.clock, 'm_dry': first.m_dry}
+    prop['burnt'] = prop['m0'] - prop['mdot'] * (0.0 - prop['clock']) <= prop['m_dry']
+    vertical = config.pitch_time > 0
+    t, y = 0.0, np.array([0.0, 0.0, 0.0, math.pi / 2])
+    arcs, events, nfev, status = [], [], 0, "reached t_final"
+
+    def rhs(t, y):
+        _, z, vel, gamma = y
+        mass = prop['m_dry'] if prop['burnt'] else max(prop['m0'] - prop['mdot'] * (t - prop['clock']), prop['m_dry'])
+        thrust_acc = 0.0 if prop['burnt'] else prop['thrust'] / mass
+        if vertical:
+            return [0.0, vel, thrust_acc - g, 0.0]
+        cos_g, sin_g = math.cos(gamma), math.sin(gamma)
+        return [vel * cos_g, vel * sin_g, thrust_acc - g * sin_g,
+                vel * cos_g / (R + z) - g * cos_g / vel if vel > 1e-6 else 0.0]
+
+    def burnout(t, y):
+        return prop['m0'] - prop['mdot'] * (t - prop['clock']) - prop['m_dry']
+    burnout.terminal, burnout.direction = True, -1
+
+    def apogee(t, y):
+        return y[2] * math.sin(y[3])
+    apogee.terminal, apogee.direction = stop_at_apogee, -1
+
+    for t_break, kind, seg in breaks:
+        while t < t_break:
+            arc_events = [apogee] if prop['burnt'] or prop['mdot'] <= 0 else [apogee, burnout]
+            sol = solve_ivp(rhs, (t, t_break), y, method=method, rtol=rtol, atol=atol, events=arc_events,
+                            dense_output=True)
+            if sol.status < 0:
+                raise ValueError(f"Ascent integration failed at t = {t:.3f} s: {sol.message}")
+            nfev += sol.nfev
+            arcs.append(Arc(t, sol.t[-1], sol.sol, vertical, **prop))
+            events += [('apogee', float(te)) for te in sol.t_events[0]]
+            t, y = sol.t[-1], sol.y[:, -1].copy()
+            if sol.status == 1 and len(arc_events) == 2 and len(sol.t_events[1]):
+                events.append(('burnout', t))
+                prop['burnt'] = True
+            elif sol.status == 1:
+                status = "stopped at apogee"
+                break
+        else:
+            if kind == 'pitch_over':
+                vertical = False
+                y[3] = math.radians(config.pitch_angle)
+            elif kind == 'staging':
+                mass = arcs[-1].mass(np.array(t)).item()
+                prop.update(thrust=seg.thrust, mdot=seg.mdot, m0=mass if seg.m0 is None else seg.m0,
+                            clock=seg.start if seg.clock is None else seg.clock, m_dry=seg.m_dry)
+                prop['burnt'] = prop['m0'] - prop['mdot'] * (t - prop['clock']) <= prop['m_dry']
+            if kind != 'end':
+                events.append((kind, t))
+            continue
+        break
+
+    return AscentSolution(arcs, events, nfev, g, status)
+
+
+if __name__ == '__main__':
+    import time
+
+    simulate_ascent()
+    t_start = time.perf_counter()
+    result = simulate_ascent()
+    print(f"{len(result)} steps in {1000 * (time.perf_counter() - t_start):.1f} ms, "
+          f"final altitude {result['z'][-1] / 1000:.1f} km, velocity {result['vel'][-1]:.1f} m/s")
+
+    t_start = time.perf_counter()
+    solution = integrate_ascent(method='DOP853', rtol=1e-8)
+    final = solution.sample(solution.t_final)
+    print(f"DOP853: {solution.nfev} evaluations in {1000 * (time.perf_counter() - t_start):.1f} ms, "
+          f"final altitude {final['z'][0] / 1000:.1f} km, velocity {final['vel'][0]:.1f} m/s")
+    for kind, t in solution.events:
+        print(f"  {kind:<10} t = {t:9.3f} s")
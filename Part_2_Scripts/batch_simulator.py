@@ -0,0 +1,174 @@
+###===--------------------------------------------===###
+# Script:        batch_simulator.py
+# Authors:       Demir Kucukdemiral 2883935K, Charikleia Nikou 2881802N, Cameron Norrington 2873038N, Adam Burns 2914690B, Ben Maconnachie 2911209M, Jeremi Rozanski 2881882R
+# Created on:    2026-10
+# Last Modified: 2026-10
+# Description:   Vectorised Monte Carlo closed-loop simulation of the rocket MPC
+# Version:       1.0
+###===--------------------------------------------===###
+
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import casadi as ca
+from plant import plant_params, rk4_batch
+
+"""
+Runs N perturbed closed loops at once. The MPC is exported as a single
+CasADi Function (use_function=True) and saved to disk, and every worker
+process loads it instead of rebuilding the problem. Runs are split into
+chunks; inside a chunk all rockets step together with plant.rk4_batch and the
+MPC is called once per rocket and tick, keeping each rocket's previous
+solution as its own warm start. A run is marked failed when a solve does
+not converge: the solver's own success flag comes from the Function's
+stats, and its feasible output checks the returned solution against the
+constraints.
+"""
+
+
+def sample_dispersions(n_runs, x0_nominal, x0_sigma, mass_sigma=0.0, thrust_sigma=0.0, seed=None):
+    # Gaussian initial-state errors and relative mass/thrust errors
+    rng = np.random.default_rng(seed)
+    x0s = np.asarray(x0_nominal, dtype=float) + rng.normal(size=(n_runs, len(x0_nominal))) * np.asarray(x0_sigma)
+    mass_scale = 1.0 + mass_sigma * rng.normal(size=n_runs)
+    thrust_scale = 1.0 + thrust_sigma * rng.normal(size=n_runs)
+    return x0s, mass_scale, thrust_scale
+
+
+def run_chunk(function_path, p, x_refs, threshold, h, Nt, Nh, umin, umax, x0s):
+    solver = ca.Function.load(function_path)
+    n, nx = x0s.shape
+    nu = solver.size1_out(0)
+    x_refs = np.asarray(x_refs, dtype=float)
+
+    xhist = np.zeros((n, nx, Nt))
+    uhist = np.zeros((n, nu, Nt - 1))
+    ref_index = np.zeros((n, Nt - 1), dtype=int)
+    failed = np.zeros(n, dtype=bool)
+    xhist[:, :, 0] = x0s
+
+    X_prev = np.zeros((n, nx, Nh + 1))
+    U_prev = np.zeros((n, nu, Nh))
+    current = np.zeros(n, dtype=int)
+
+    for k in range(Nt - 1):
+        # reference switching, same rule as Simulator.run_simulation
+        err = np.linalg.norm(xhist[:, :2, k] - x_refs[current, :2], axis=1)
+        current = np.where((err < threshold) & (current < len(x_refs) - 1), current + 1, current)
+        ref_index[:, k] = current
+
+        for i in range(n):
+            X_init = np.concatenate([X_prev[i, :, 1:], X_prev[i, :, -1:]], axis=1)
+            U_init = np.concatenate([U_prev[i, :, 1:], U_prev[i, :, -1:]], axis=1)
+            try:
+                u0, X_opt, U_opt, feasible = solver(xhist[i, :, k], x_refs[current[i]], X_init, U_init)
+                ok = np.all(np.isfinite(np.array(u0)))
+            except RuntimeError:
+                ok = False
+            if not ok:
+                # hold the last input and mark the run
+                failed[i] = True
+                uhist[i, :, k] = uhist[i, :, k - 1] if k > 0 else 0.0
+                continue
+            # converged only if the solver says so and its solution is feasible, a solve without a success
+            # flag in its stats is not known to have converged
+            failed[i] |= not (bool(feasible) and bool(solver.stats().get('success', False)))
+            # the actuators saturate whatever an unconverged solve returns
+            uhist[i, :, k] = np.clip(np.array(u0).flatten(), umin, umax)
+            X_prev[i] = np.array(X_opt)
+            U_prev[i] = np.array(U_opt)
+
+        xhist[:, :, k + 1] = rk4_batch(xhist[:, :, k], uhist[:, :, k], h, p)
+
+    return xhist, uhist, ref_index, failed
+
+
+class BatchSimulator:
+    def __init__(self, mpc, x_refs, Tfinal=15.0, threshold=20.0, function_path=None, n_workers=None, chunk_size=32):
+        if mpc.solver_func is None:
+            raise ValueError("BatchSimulator needs an MPC built with use_function=True.")
+
+        self.mpc = mpc
+        self.x_refs = np.asarray(x_refs, dtype=float)
+        self.Tfinal = Tfinal
+        self.Nt = int(self.Tfinal / self.mpc.h)
+        self.t_hist = np.linspace(0, self.Tfinal, self.Nt)
+        self.threshold = threshold
+        self.n_workers = n_workers or os.cpu_count()
+        self.chunk_size = chunk_size
+
+        # workers load the controller from disk
+        if function_path is None:
+            function_path = os.path.join(tempfile.mkdtemp(), 'batch_mpc.casadi')
+        self.function_path = function_path
+        self.mpc.solver_func.save(self.function_path)
+
+    def run(self, x0s, mass_scale=None, thrust_scale=None):
+        x0s = np.atleast_2d(np.asarray(x0s, dtype=float))
+        n_runs = x0s.shape[0]
+        mass_scale = np.ones(n_runs) if mass_scale is None else np.asarray(mass_scale, dtype=float)
+        thrust_scale = np.ones(n_runs) if thrust_scale is None else np.asarray(thrust_scale, dtype=float)
+
+        chunks = [np.arange(i, min(i + self.chunk_size, n_runs)) for i in range(0, n_runs, self.chunk_size)]
+        args = [(self.function_path, plant_params(self.mpc, mass_scale[idx], thrust_scale[idx]),
+                 self.x_refs, self.threshold, self.mpc.h, self.Nt, self.mpc.Nh, self.mpc.umin, self.mpc.umax, x0s[idx])
+                for idx in chunks]
+
+        if self.n_workers == 1:
+            results = [run_chunk(*a) for a in args]
+        else:
+            with ProcessPoolExecutor(max_workers=self.n_workers) as pool:
+                results = list(pool.map(run_chunk, *zip(*args)))
+
+        self.xhist = np.concatenate([r[0] for r in results])
+        self.uhist = np.concatenate([r[1] for r in results])
+        self.ref_index = np.concatenate([r[2] for r in results])
+        self.failed = np.concatenate([r[3] for r in results])
+        return self.statistics()
+
+    def statistics(self):
+        # tracking error against the active reference and altitude constraint violation, per run
+        refs = self.x_refs[self.ref_index]
+        err = np.linalg.norm(self.xhist[:, :2, :-1] - np.moveaxis(refs[:, :, :2], 2, 1), axis=1)
+        rms_err = np.sqrt(np.mean(err**2, axis=1))
+        violation = np.maximum(self.mpc.ymin[0] - self.xhist[:, 1, :], 0.0).max(axis=1)
+        refs_reached = self.ref_index[:, -1]
+
+        return {
+            'n_runs': len(rms_err),
+            'rms_error': rms_err,
+            'rms_error_mean': rms_err.mean(),
+            'rms_error_p50': np.percentile(rms_err, 50),
+            'rms_error_p95': np.percentile(rms_err, 95),
+            'rms_error_max': rms_err.max(),
+            'refs_reached_mean': refs_reached.mean(),
+            'all_refs_fraction': np.mean(refs_reached == len(self.x_refs) - 1),
+            'violation': violation,
+            'violation_fraction': np.mean(violation > 0),
+            'violation_max': violation.max(),
+            'failed_fraction': self.failed.mean(),
+        }
+
+    def report(self, stats=None):
+        stats = stats or self.statistics()
+        print(f"{stats['n_runs']} runs | rms tracking error mean {stats['rms_error_mean']:.2f}, "
+              f"p50 {stats['rms_error_p50']:.2f}, p95 {stats['rms_error_p95']:.2f}, max {stats['rms_error_max']:.2f}")
+        print(f"references reached: mean {stats['refs_reached_mean']:.2f}, all {100 * stats['all_refs_fraction']:.1f}% | "
+              f"altitude violations {100 * stats['violation_fraction']:.1f}% (max {stats['violation_max']:.3f}) | "
+              f"solver failures {100 * stats['failed_fraction']:.1f}%")
+
+
+if __name__ == '__main__':
+    from Linearised_rocket import MPC
+
+    mpc = MPC(solver_nl='ipopt', solver_qp='ipopt', Nh=50, use_function=True)
+    x_refs = [
+        np.array([290, 160, 0, 2, 0, 0]),
+        np.array([340, 160, 0, 2, 0, 0]),
+        np.array([390, 160, 0, 4, 0, 0]),
+    ]
+    x0s, mass_scale, thrust_scale = sample_dispersions(64, [0, 0, 0, 10, 0, 0], [2, 0, 0.02, 1, 0, 0.01],
+                                                       mass_sigma=0.05, thrust_sigma=0.03, seed=0)
+    batch = BatchSimulator(mpc, x_refs, Tfinal=15.0, threshold=20.0)
+    batch.report(batch.run(x0s, mass_scale, thrust_scale))
@@ -0,0 +1,69 @@
+###===--------------------------------------------===###
+# Script:        benchmark_ascent.py
+# Authors:       Demir Kucukdemiral 2883935K, Charikleia Nikou 2881802N, Cameron Norrington 2873038N, Adam Burns 2914690B, Ben Maconnachie 2911209M, Jeremi Rozanski 2881882R
+# Created on:    2026-10
+# Last Modified: 2026-10
+# Description:   Cost and accuracy of the fixed-step ascent loop against the adaptive integrators
+# Version:       1.0
+###===--------------------------------------------===###
+
+import time
+from dataclasses import replace
+import numpy as np
+from ascent import TRAJECTORY_PY, integrate_ascent, simulate_ascent
+
+"""
+Every run flies the trajectory.py ascent and is compared with a DOP853
+reference at rtol=1e-12. The fixed-step loop takes one derivative
+evaluation per step. For the adaptive runs, nfev is the number of
+right-hand-side calls solve_ivp made, events included. The errors are
+the altitude, velocity and flight-path angle at t_final, the apogee
+altitude, and the burnout time. The fixed-step loop only knows the
+burnout time to the step it falls in.
+"""
+
+
+def timed(fn, repeat=3):
+    best, out = np.inf, None
+    for _ in range(repeat):
+        t_start = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t_start)
+    return out, best
+
+
+def euler_metrics(config):
+    result = simulate_ascent(config)
+    burnt = np.flatnonzero((result['mass'] == config.segments[-1].m_dry) & (result['time'] > config.segments[-1].start))
+    return {'z': result['z'][-1], 'vel': result['vel'][-1], 'gamma': result['gamma'][-1],
+            'apogee': result['z'].max(), 'burnout': result['time'][burnt[0]] if len(burnt) else np.nan}
+
+
+def adaptive_metrics(solution):
+    final = solution.sample(solution.t_final)
+    apogee = solution.event_times('apogee')
+    burnout = solution.event_times('burnout')
+    return {'z': final['z'][0], 'vel': final['vel'][0], 'gamma': final['gamma'][0],
+            'apogee': solution.sample(apogee[0])['z'][0] if apogee else np.nan,
+            'burnout': burnout[0] if burnout else np.nan}
+
+
+def row(label, nfev, seconds, metrics, reference):
+    err = {k: abs(metrics[k] - reference[k]) for k in reference}
+    print(f"{label:<18} {nfev:>8} {1000 * seconds:>9.1f} {err['z']:>11.3e} {err['vel']:>11.3e} "
+          f"{err['gamma']:>11.3e} {err['apogee']:>11.3e} {err['burnout']:>10.2e}")
+
+
+if __name__ == '__main__':
+    reference = adaptive_metrics(integrate_ascent(TRAJECTORY_PY, 'DOP853', rtol=1e-12, atol=1e-9))
+
+    print(f"{'run':<18} {'nfev':>8} {'ms':>9} {'z [m]':>11} {'vel [m/s]':>11} {'gamma':>11} "
+          f"{'apogee [m]':>11} {'burnout':>10}")
+    for dt in (0.1, 0.05, 0.01):
+        config = replace(TRAJECTORY_PY, dt=dt)
+        metrics, seconds = timed(lambda: euler_metrics(config))
+        row(f"euler dt={dt:g}", config.step_of(config.t_final), seconds, metrics, reference)
+    for method in ('RK45', 'DOP853'):
+        for rtol in (1e-4, 1e-6, 1e-8, 1e-10):
+            solution, seconds = timed(lambda: integrate_ascent(TRAJECTORY_PY, method, rtol=rtol, atol=rtol * 1e2))
+            row(f"{method} rtol={rtol:g}", solution.nfev, seconds, adaptive_metrics(solution), reference)
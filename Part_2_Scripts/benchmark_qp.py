@@ -0,0 +1,73 @@
+###===--------------------------------------------===###
+# Script:        benchmark_qp.py
+# Authors:       Demir Kucukdemiral 2883935K, Charikleia Nikou 2881802N, Cameron Norrington 2873038N, Adam Burns 2914690B, Ben Maconnachie 2911209M, Jeremi Rozanski 2881882R
+# Created on:    2026-10
+# Last Modified: 2026-10
+# Description:   Latency and iteration benchmark of the convex MPC QP backends against IPOPT
+# Version:       1.0
+###===--------------------------------------------===###
+
+import time
+import warnings
+import numpy as np
+from Linearised_rocket import MPC
+
+"""
+Every backend flies the same short closed loop from the default initial
+state towards the first reference, so warm starting is exercised the way
+the Simulator uses it. The first solve is a cold start and is reported
+on its own. OSQP and QRQP do not report iteration counts through CasADi.
+max|du| is the largest first-control difference from the IPOPT answer;
+at Nh = 100 and 200 the single-point linearisation predicts state
+magnitudes in the thousands and only IPOPT and qpOASES stay accurate.
+QRQP and qpOASES are included as experimental backends so the errors of
+one and the solve times of the other show in the table, and the horizon
+warnings of OSQP and HPIPM are silenced here.
+"""
+
+HORIZONS = [20, 50, 100, 200]
+BACKENDS = ['ipopt', 'osqp', 'qpoases', 'hpipm', 'qrqp']
+
+
+def run_backend(solver_qp, Nh, x_ref, n_ticks):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        mpc = MPC(solver_nl='ipopt', solver_qp=solver_qp, Nh=Nh, experimental_qp=True)
+    x = np.array([0, 0, 0, 10, 0, 0], dtype=float)
+
+    solve_times = np.zeros(n_ticks)
+    iters = np.zeros(n_ticks)
+    u_hist = np.zeros((n_ticks, mpc.nu))
+    for k in range(n_ticks):
+        t_start = time.perf_counter()
+        u = mpc.solve_mpc_convex(x, x_ref)
+        solve_times[k] = time.perf_counter() - t_start
+        iters[k] = mpc.iter_count
+        u_hist[k] = u
+        x = np.array(mpc.rk4_step(x, u, mpc.h)).flatten()
+
+    return solve_times, iters, u_hist
+
+
+def benchmark(horizons=HORIZONS, backends=BACKENDS, n_ticks=20):
+    x_ref = np.array([290, 160, 0, 2, 0, 0])
+    rows = []
+    for Nh in horizons:
+        u_ipopt = None
+        for solver_qp in backends:
+            solve_times, iters, u_hist = run_backend(solver_qp, Nh, x_ref, n_ticks)
+            if solver_qp == 'ipopt':
+                u_ipopt = u_hist
+            du = np.abs(u_hist - u_ipopt).max() if u_ipopt is not None else np.nan
+            rows.append((Nh, solver_qp, 1000 * solve_times[0], 1000 * np.median(solve_times[1:]),
+                         1000 * np.percentile(solve_times[1:], 95), iters[1:].mean(), du))
+
+    print(f"{'Nh':>4} {'backend':>8} {'cold [ms]':>10} {'p50 [ms]':>9} {'p95 [ms]':>9} {'iters':>6} {'max|du|':>9}")
+    for Nh, solver_qp, cold, p50, p95, it, du in rows:
+        it_str = f"{it:6.1f}" if it >= 0 else f"{'-':>6}"
+        print(f"{Nh:4d} {solver_qp:>8} {cold:10.2f} {p50:9.2f} {p95:9.2f} {it_str} {du:9.2e}")
+    return rows
+
+
+if __name__ == '__main__':
+    benchmark()
@@ -0,0 +1,246 @@
+###===--------------------------------------------===###
+# Script:        design_space.py
+# Authors:       Demir Kucukdemiral 2883935K, Charikleia Nikou 2881802N, Cameron Norrington 2873038N, Adam Burns 2914690B, Ben Maconnachie 2911209M, Jeremi Rozanski 2881882R
+# Created on:    2026-10
+# Last Modified: 2026-10
+# Description:   Multi-objective design-space exploration of the main.py launcher with a persistent Pareto archive
+# Version:       1.0
+###===--------------------------------------------===###
+
+import os
+import json
+import time
+import numpy as np
+from scipy.stats import qmc
+from launcher_kernels import GRAVITY, payload_mass, thrust_to_weight
+from main import Launcher_Data
+
+"""
+A design is one row of stage parameters around the launcher of main.py:
+the stage launch masses, Isp and sea-level thrust, the structural
+efficiencies, how the total delta-v is split, the two payloads and the
+stage count. A two stage design flies without the liquid boosters, so the
+core engine lifts off and gets the booster's share of delta-v. A parameter
+whose bounds are equal is held fixed.
+
+Every design is scored on five objectives:
+
+    glow        gross lift-off mass                      minimised
+    payload_1   payload dropped after the core stage     maximised
+    payload_2   payload left after the upper stage       maximised
+    tw          lift-off thrust-to-weight                maximised
+    n_stages    number of stages                         minimised
+
+Designs that deliver no payload_2 or lift off below tw_min are discarded.
+
+DesignSpaceExplorer draws Sobol samples in chunks and evaluates them with
+the vectorised kernels. Only the non-dominated designs are kept, so memory
+stays flat for any number of samples. The archive and the Sobol position
+are saved to an .npz file after every chunk. A later explore() continues
+the sequence, and refine() samples close to the archived designs to fill in
+the front.
+"""
+
+OBJECTIVES = {'glow': 'min', 'payload_1': 'max', 'payload_2': 'max', 'tw': 'max', 'n_stages': 'min'}
+
+
+def default_space(data=None):
+    # +-50 % around the main.py launcher, delta-v total and payload_2 held at their nominal values
+    data = data or Launcher_Data()
+    lpb, core, upper = data.lpb, data.core_stage, data.upper_stage
+    dv_total = lpb.delta_v + core.delta_v + upper.delta_v
+    return {
+        'm_lpb': (0.5 * lpb.launch_mass * lpb.number, 1.5 * lpb.launch_mass * lpb.number),
+        'm_core': (0.5 * core.launch_mass * core.number, 1.5 * core.launch_mass * core.number),
+        'm_upper': (0.5 * upper.launch_mass * upper.number, 1.5 * upper.launch_mass * upper.number),
+        'Isp_lpb': (300.0, 420.0),
+        'Isp_core': (270.0, 360.0),
+        'Isp_upper': (380.0, 460.0),
+        'thrust_lpb': (0.5 * lpb.thrust_sl * lpb.number, 1.5 * lpb.thrust_sl * lpb.number),
+        'thrust_core': (0.5 * core.thrust_sl * core.number, 10 * core.thrust_sl * core.number),
+        'efficiency': (0.04, 0.12),
+        'efficiency_upper': (0.10, 0.20),
+        'dv_total': (dv_total, dv_total),
+        'dv_frac_lpb': (0.1, 0.45),
+        'dv_frac_core': (0.2, 0.45),
+        'payload_1': (0.5 * data.mass_payload_1, 1.5 * data.mass_payload_1),
+        'payload_2': (data.mass_payload_2, data.mass_payload_2),
+        'n_stages': (2, 3),
+    }
+
+
+def evaluate(d, gravity=GRAVITY):
+    # objectives of a batch of designs, d maps every parameter name to an array
+    three = d['n_stages'] == 3
+    glow = np.where(three, d['m_lpb'], 0.0) + d['m_core'] + d['m_upper'] + d['payload_1'] + d['payload_2']
+
+    dv_lpb = np.where(three, d['dv_frac_lpb'], 0.0) * d['dv_total']
+    dv_core = (d['dv_frac_core'] + np.where(three, 0.0, d['dv_frac_lpb'])) * d['dv_total']
+    delta_v = np.stack([dv_lpb, dv_core, d['dv_total'] - dv_lpb - dv_core], axis=-1)
+    efficiency = np.stack([d['efficiency'], d['efficiency'], d['efficiency_upper']], axis=-1)
+    Isp = np.stack([d['Isp_lpb'], d['Isp_core'], d['Isp_upper']], axis=-1)
+    drop_mass = np.stack([np.zeros_like(glow), d['payload_1'], np.zeros_like(glow)], axis=-1)
+
+    return {
+        'glow': glow,
+        'payload_1': d['payload_1'],
+        'payload_2': payload_mass(glow, efficiency, Isp, delta_v, drop_mass, gravity),
+        'tw': thrust_to_weight(np.where(three, d['thrust_lpb'], d['thrust_core']), glow, gravity),
+        'n_stages': d['n_stages'].astype(float),
+    }
+
+
+def objective_matrix(objectives):
+    # (n, n_objectives) with every column to be minimised
+    return np.stack([objectives[k] if sense == 'min' else -objectives[k] for k, sense in OBJECTIVES.items()], axis=-1)
+
+
+def pareto_mask(F, block=16):
+    # True for the rows of F that no other row dominates, every column minimised; of identical rows one is kept
+    F = np.asarray(F, dtype=float)
+    mask = np.zeros(len(F), dtype=bool)
+    if len(F) == 0:
+        return mask
+
+    # a row can only be dominated by rows with a smaller normalised sum, so in that order every row that
+    # survives all earlier ones is on the front; the next block of rows removes everything they dominate at once,
+    # which stays correct if one of them is itself dominated since its dominator removes the same rows
+    span = np.ptp(F, axis=0)
+    span[span == 0] = 1.0
+    order = np.argsort(((F - F.min(axis=0)) / span).sum(axis=1), kind='stable')
+    G, idx = F[order], order
+    i = 0
+    while i < len(G):
+        P = G[i:i + block]
+        removed = np.all(G[None, i:, :] >= P[:, None, :], axis=2)
+        removed[:, :len(P)] &= np.triu(np.ones((len(P), len(P)), dtype=bool), 1)
+        keep = np.concatenate([np.ones(i, dtype=bool), ~removed.any(axis=0)])
+        G, idx = G[keep], idx[keep]
+        i += int(keep[i:i + len(P)].sum())
+    mask[idx] = True
+    return mask
+
+
+def nondominated_sort(F, n_fronts=None):
+    # front number of every row (0 is the Pareto front), rows past n_fronts get -1
+    F = np.asarray(F, dtype=float)
+    rank = np.full(len(F), -1)
+    remaining = np.arange(len(F))
+    front = 0
+    while len(remaining) and (n_fronts is None or front < n_fronts):
+        on_front = pareto_mask(F[remaining])
+        rank[remaining[on_front]] = front
+        remaining = remaining[~on_front]
+        front += 1
+    return rank
+
+
+class DesignSpaceExplorer:
+    def __init__(self, space=None, path='design_space.npz', tw_min=1.2, chunk_size=2**16, seed=0):
+        self.space = {k: (float(lo), float(hi)) for k, (lo, hi) in (space or default_space()).items()}
+        self.names = list(self.space)
+        self.lower = np.array([self.space[k][0] for k in self.names])
+        self.upper = np.array([self.space[k][1] for k in self.names])
+        self.free = np.flatnonzero(self.upper > self.lower)
+        self.path = path
+        self.tw_min = tw_min
+        self.chunk_size = chunk_size
+        self.seed = seed
+
+        self.n_sampled = 0
+        self.n_refined = 0
+        self.archive = np.zeros((0, len(self.names)))
+        if path is not None and os.path.exists(path):
+            self.load()
+
+    def to_designs(self, unit):
+        # unit-cube rows over the free parameters -> parameter dict, n_stages rounded to a whole count
+        X = np.tile(self.lower, (len(unit), 1))
+        X[:, self.free] = self.lower[self.free] + unit * (self.upper[self.free] - self.lower[self.free])
+        if 'n_stages' in self.names:
+            X[:, self.names.index('n_stages')] = np.round(X[:, self.names.index('n_stages')])
+        return X
+
+    def columns(self, X):
+        return {k: X[:, i] for i, k in enumerate(self.names)}
+
+    def merge(self, X):
+        # evaluates a chunk and keeps the feasible non-dominated designs of archive + chunk
+        obj = evaluate(self.columns(X))
+        feasible = (obj['payload_2'] > 0) & (obj['tw'] >= self.tw_min)
+        X = np.vstack([self.archive, X[feasible]])
+        F = objective_matrix(evaluate(self.columns(X)))
+        self.archive = X[pareto_mask(F)]
+
+    def explore(self, n_designs):
+        # continues the Sobol sequence where the last run (or the saved archive) stopped
+        sampler = qmc.Sobol(len(self.free), seed=self.seed)
+        if self.n_sampled:
+            sampler.fast_forward(self.n_sampled)
+        t_start = time.perf_counter()
+        done = 0
+        while done < n_designs:
+            n = min(self.chunk_size, n_designs - done)
+            self.merge(self.to_designs(sampler.random(n)))
+            done += n
+            self.n_sampled += n
+            self.save()
+        print(f"Explored {done} designs in {time.perf_counter() - t_start:.1f}s, "
+              f"{len(self.archive)} on the Pareto front ({self.n_sampled} sampled in total)")
+
+    def refine(self, n_designs, spread=0.02):
+        # Gaussian samples around random archive designs, spread is relative to each parameter range
+        if len(self.archive) == 0:
+            raise ValueError("The archive is empty, run explore() first.")
+        rng = np.random.default_rng([self.seed, self.n_refined])
+        t_start = time.perf_counter()
+        done = 0
+        while done < n_designs:
+            n = min(self.chunk_size, n_designs - done)
+            X = self.archive[rng.integers(len(self.archive), size=n)].copy()
+            width = self.upper[self.free] - self.lower[self.free]
+            X[:, self.free] = np.clip(X[:, self.free] + spread * width * rng.standard_normal((n, len(self.free))),
+                                      self.lower[self.free], self.upper[self.free])
+            if 'n_stages' in self.names:
+                X[:, self.names.index('n_stages')] = np.round(X[:, self.names.index('n_stages')])
+            self.merge(X)
+            done += n
+            self.n_refined += n
+            self.save()
+        print(f"Refined with {done} designs in {time.perf_counter() - t_start:.1f}s, "
+              f"{len(self.archive)} on the Pareto front")
+
+    def front(self):
+        # parameters and objectives of the archived designs, one array per column
+        designs = self.columns(self.archive)
+        return {**designs, **evaluate(designs)}
+
+    def save(self):
+        if self.path is None:
+            return
+        tmp = self.path + '.tmp.npz'
+        np.savez(tmp, archive=self.archive, names=np.array(self.names), space=json.dumps(self.space),
+                 n_sampled=self.n_sampled, n_refined=self.n_refined, seed=self.seed, tw_min=self.tw_min)
+        os.replace(tmp, self.path)
+
+    def load(self):
+        data = np.load(self.path)
+        if json.loads(str(data['space'])) != {k: list(v) for k, v in self.space.items()} \
+                or int(data['seed']) != self.seed or float(data['tw_min']) != self.tw_min:
+            raise ValueError(f"Design archive {self.path} was built for a different design space, seed or T/W limit.")
+        self.archive = data['archive']
+        self.n_sampled = int(data['n_sampled'])
+        self.n_refined = int(data['n_refined'])
+
+
+if __name__ == '__main__':
+    explorer = DesignSpaceExplorer(path='design_space.npz')
+    explorer.explore(2**20)
+    explorer.refine(2**17)
+
+    front = explorer.front()
+    for name, sense in OBJECTIVES.items():
+        best = np.argmin(front[name]) if sense == 'min' else np.argmax(front[name])
+        print(f"best {name:>9}: glow {front['glow'][best]:9.0f} kg | payload_1 {front['payload_1'][best]:7.0f} kg | "
+              f"payload_2 {front['payload_2'][best]:7.0f} kg | T/W {front['tw'][best]:5.2f} | "
+              f"{front['n_stages'][best]:.0f} stages")
@@ -0,0 +1,203 @@
+###===--------------------------------------------===###
+# Script:        dispersion.py
+# Authors:       Demir Kucukdemiral 2883935K, Charikleia Nikou 2881802N, Cameron Norrington 2873038N, Adam Burns 2914690B, Ben Maconnachie 2911209M, Jeremi Rozanski 2881882R
+# Created on:    2026-10
+# Last Modified: 2026-10
+# Description:   Batched Monte Carlo dispersion runs of the trajectory.py ascent
+# Version:       1.0
+###===--------------------------------------------===###
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from ascent import FIELDS, RESULT_DTYPE, TRAJECTORY_PY
+
+"""
+Every run flies the fixed-step ascent of ascent.simulate_ascent, with its
+own thrust, mass flow and Isp for every burn segment and its own
+pitch-over angle and time. The errors are drawn as Gaussians with the
+relative (or, for the pitch-over, absolute) standard deviations in
+sigmas:
+
+    thrust = T * (1 + d_thrust)
+    mdot   = mdot * (1 + d_mdot) / (1 + d_Isp)
+
+A higher Isp gives the same thrust for less propellant.
+
+fly_batch() steps a chunk of runs in lockstep, holding the state as one
+array per variable over the runs. Runs that are still vertical and runs
+whose segment has burnt out are masked out, so each run gives the same
+numbers as a single simulate_ascent. Only the quantities of interest are
+kept per run, not the full history: apogee, burnout state and final state.
+A recorder from recorder.py can take the full state of every run at the
+steps it keeps.
+
+run_dispersion() draws all the errors up front from one seed, so the
+result does not depend on the chunking. It then spreads the chunks over a
+process pool. percentiles() reduces the runs to the usual statistics.
+"""
+
+SIGMAS = {'thrust': 0.01, 'mdot': 0.01, 'Isp': 0.005, 'pitch_angle': 0.5, 'pitch_time': 0.0}
+RUN_FIELDS = ['apogee', 't_apogee', 'burnout_vel', 'burnout_gamma', 'burnout_z', 't_burnout', 'min_z',
+              'final_vel', 'final_gamma', 'final_z']
+RUN_DTYPE = np.dtype([(f, 'f8') for f in RUN_FIELDS])
+
+
+def perturb(config, n_runs, sigmas=None, seed=0):
+    # per-run errors, each (n_runs, n_segments) for the propulsion and (n_runs,) for the pitch-over
+    sigmas = {**SIGMAS, **(sigmas or {})}
+    rng = np.random.default_rng(seed)
+    n_seg = len(config.segments)
+    return {
+        'thrust': sigmas['thrust'] * rng.standard_normal((n_runs, n_seg)),
+        'mdot': sigmas['mdot'] * rng.standard_normal((n_runs, n_seg)),
+        'Isp': sigmas['Isp'] * rng.standard_normal((n_runs, n_seg)),
+        'pitch_angle': sigmas['pitch_angle'] * rng.standard_normal(n_runs),
+        'pitch_time': sigmas['pitch_time'] * rng.standard_normal(n_runs),
+    }
+
+
+def record_step(recorder, k, state):
+    # one step of every run as a (1, n_runs) block of ascent records
+    block = np.zeros((1, len(state[0])), dtype=RESULT_DTYPE)
+    for name, value in zip(FIELDS, state):
+        block[name] = value
+    recorder.append(block, k)
+
+
+def fly_batch(config, errors, stop_at_burnout=False, recorder=None):
+    # lockstep fixed-step ascent of every run in errors, one RUN_DTYPE record per run; min_z is the lowest
+    # altitude after the pitch-over, stop_at_burnout ends once the last segment has burnt out in every run;
+    # the kept steps of every run are streamed into recorder (see recorder.py) when one is given
+    table = config.segment_table()
+    n = len(errors['pitch_angle'])
+    n_steps = config.step_of(config.t_final) + 1
+    dt, g, R = config.dt, config.gravity, config.R_earth
+    seg_thrust = table[:, 2] * (1 + errors['thrust'])
+    seg_mdot = table[:, 3] * (1 + errors['mdot']) / (1 + errors['Isp'])
+    n_vertical = np.rint((config.pitch_time + errors['pitch_time']) / dt).astype(int) + 1
+    pitch = np.radians(config.pitch_angle + errors['pitch_angle'])
+
+    thrust, mdot = seg_thrust[:, 0].copy(), seg_mdot[:, 0].copy()
+    m0 = np.full(n, table[0, 4])
+    m_dry = np.full(n, table[0, 5])
+    t, t_clock = 0.0, table[0, 1]
+
+    vel, velx, velz, x, z = (np.zeros(n) for _ in range(5))
+    gamma = np.full(n, np.pi / 2)
+    mass = m0.copy()
+    acc = thrust / m0 - g
+
+    out = np.zeros(n, dtype=RUN_DTYPE)
+    out['burnout_vel'] = out['burnout_gamma'] = out['burnout_z'] = out['t_burnout'] = np.nan
+    out['min_z'] = np.inf
+    if recorder is not None:
+        record_step(recorder, 0, (np.zeros(n), vel, velx, velz, x, z, gamma, acc, mass))
+    seg = 0
+    for k in range(1, n_steps):
+        while seg + 1 < len(table) and table[seg + 1, 0] <= k:
+            seg += 1
+            thrust, mdot = seg_thrust[:, seg].copy(), seg_mdot[:, seg].copy()
+            m0 = mass.copy() if np.isnan(table[seg, 4]) else np.full(n, table[seg, 4])
+            m_dry = np.full(n, table[seg, 5])
+            t_clock = table[seg, 1]
+
+        vel_prev, velx_prev, velz_prev, z_prev, gamma_prev, acc_prev = vel, velx, velz, z, gamma, acc
+        t = t + dt
+        mass = m0 - mdot * (t - t_clock)
+        cut = mass <= m_dry
+        burnout = cut & (thrust > 0)
+        mass = np.where(cut, m_dry, mass)
+        thrust = np.where(cut, 0.0, thrust)
+        thrust_acc = thrust / mass
+
+        vertical = k < n_vertical
+        turning = ~vertical
+        if turning.any():
+            cos_g, sin_g = np.cos(gamma_prev), np.sin(gamma_prev)
+            vel = vel_prev + dt * (thrust_acc - g * sin_g)
+            velx = vel * cos_g
+            velz = vel * sin_g
+            x = x + velx_prev * dt + 0.5 * thrust_acc * cos_g * dt * dt
+            z = z_prev + velz_prev * dt + 0.5 * (thrust_acc * sin_g - g) * dt * dt
+            moving = vel_prev > 1e-6
+            safe_vel = np.where(moving, vel_prev, 1.0)
+            gamma = np.where(moving, gamma_prev + vel * cos_g * dt / (R + z_prev) - g * cos_g * dt / safe_vel,
+                             gamma_prev)
+            acc = thrust_acc
+        if vertical.any():
+            velz_v = velz_prev + acc_prev * dt
+            z_v = z_prev + velz_prev * dt + 0.5 * acc_prev * dt * dt
+            gamma_v = np.where(k == n_vertical - 1, pitch, gamma_prev)
+            if turning.any():
+                vel = np.where(vertical, np.abs(velz_v), vel)
+                velx = np.where(vertical, 0.0, velx)
+                velz = np.where(vertical, velz_v, velz)
+                x = np.where(vertical, 0.0, x)
+                z = np.where(vertical, z_v, z)
+                gamma = np.where(vertical, gamma_v, gamma)
+                acc = np.where(vertical, thrust_acc - g, acc)
+            else:
+                vel, velx, velz, x, z, gamma, acc = np.abs(velz_v), velx_prev, velz_v, x, z_v, gamma_v, thrust_acc - g
+
+        higher = z > out['apogee']
+        out['apogee'] = np.where(higher, z, out['apogee'])
+        out['t_apogee'] = np.where(higher, t, out['t_apogee'])
+        if burnout.any():
+            out['burnout_vel'][burnout] = vel[burnout]
+            out['burnout_gamma'][burnout] = gamma[burnout]
+            out['burnout_z'][burnout] = z[burnout]
+            out['t_burnout'][burnout] = t
+        out['min_z'] = np.where(turning, np.minimum(out['min_z'], z), out['min_z'])
+        if recorder is not None and recorder.keeps(k):
+            record_step(recorder, k, (np.full(n, t), vel, velx, velz, x, z, gamma, acc, mass))
+        if stop_at_burnout and seg == len(table) - 1 and not thrust.any():
+            break
+
+    out['final_vel'], out['final_gamma'], out['final_z'] = vel, gamma, z
+    if recorder is not None:
+        recorder.close()
+    return out
+
+
+def run_chunk(args):
+    config, errors = args
+    return fly_batch(config, errors)
+
+
+def run_dispersion(config=TRAJECTORY_PY, n_runs=1000, sigmas=None, seed=0, chunk_size=500, workers=None):
+    # n_runs dispersed ascents, chunks of chunk_size runs spread over workers processes (1 runs in this process)
+    errors = perturb(config, n_runs, sigmas, seed)
+    chunks = [(config, {k: v[i:i + chunk_size] for k, v in errors.items()}) for i in range(0, n_runs, chunk_size)]
+    workers = min(workers or os.cpu_count() or 1, len(chunks))
+    if workers == 1:
+        results = [run_chunk(chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(run_chunk, chunks))
+    return np.concatenate(results), errors
+
+
+def percentiles(runs, q=(1, 5, 50, 95, 99)):
+    # {field: {percentile: value}} over the runs, NaN (no burnout) ignored
+    return {f: dict(zip(q, np.nanpercentile(runs[f], q))) for f in RUN_FIELDS}
+
+
+if __name__ == '__main__':
+    from ascent import simulate_ascent
+
+    # zero dispersion reproduces the single-run engine
+    nominal = simulate_ascent(TRAJECTORY_PY)
+    check = fly_batch(TRAJECTORY_PY, perturb(TRAJECTORY_PY, 2, {k: 0.0 for k in SIGMAS}))
+    print(f"nominal apogee {nominal['z'].max() / 1000:.3f} km, batch {check['apogee'][0] / 1000:.3f} km")
+
+    t_start = time.perf_counter()
+    runs, errors = run_dispersion(n_runs=2000, chunk_size=500)
+    print(f"{len(runs)} dispersed ascents in {time.perf_counter() - t_start:.1f}s")
+    stats = percentiles(runs)
+    scale = {'apogee': 1e-3, 'burnout_z': 1e-3, 'final_z': 1e-3, 'burnout_gamma': 180 / np.pi,
+             'final_gamma': 180 / np.pi}
+    print(f"{'':>14}" + "".join(f"{f'P{q}':>12}" for q in stats['apogee']))
+    for field in ['apogee', 't_apogee', 'burnout_vel', 'burnout_gamma', 'burnout_z', 't_burnout']:
+        print(f"{field:>14}" + "".join(f"{v * scale.get(field, 1.0):12.3f}" for v in stats[field].values()))
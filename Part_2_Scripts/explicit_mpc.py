@@ -0,0 +1,202 @@
+###===--------------------------------------------===###
+# Script:        explicit_mpc.py
+# Authors:       Demir Kucukdemiral 2883935K, Charikleia Nikou 2881802N, Cameron Norrington 2873038N, Adam Burns 2914690B, Ben Maconnachie 2911209M, Jeremi Rozanski 2881882R
+# Created on:    2026-10
+# Last Modified: 2026-10
+# Description:   Approximate explicit MPC, a lookup table of the linear MPC's first input over (x0, x_ref)
+# Version:       1.0
+###===--------------------------------------------===###
+
+import hashlib
+import time
+import numpy as np
+import casadi as ca
+from scipy.spatial import cKDTree
+from scipy.stats import qmc
+from qp_backend import SparseMPCQP
+
+"""
+The convex MPC of Linearised_rocket is a parametric QP in p = (x0, x_ref),
+and since it is linearised at x0 its first input is a fixed function of p.
+ExplicitMPC solves it offline on sampled parameters inside a box and stores
+u0 for every sample, either with the online controller's own linearisation
+at x0 (x_lin=None) or around one fixed point x_lin. Online, u0 is
+interpolated from the nearest samples through a KD-tree (inverse distance
+weighting). Parameters outside the box, or too far from every sample, fall
+back to the online QP of the wrapped MPC. Unless max_distance is given,
+"too far" is set from the table itself: the distance_percentile-th
+percentile (95 by default) of the distances from each sample to its
+nearest other sample, measured in the unit cube over the free coordinates.
+A query further from the table than that lies in a gap wider than the
+table's typical spacing and is solved online.
+
+Nothing in the model depends on the horizontal position, so the table is
+indexed by the offset x0[0] - x_ref[0] and x_ref[0] is dropped. The box
+lower/upper is given in these coordinates. Coordinates whose bounds are
+equal are held fixed and left out of the tree. The table is saved as an
+.npz file together with a signature of the MPC tuning, so a table built
+for different weights or horizon is never used.
+"""
+
+
+class ExplicitMPC:
+    def __init__(self, mpc, x_lin=None, k_neighbours=4, max_distance=None, distance_percentile=95):
+        self.mpc = mpc
+        self.nx = mpc.nx
+        self.nu = mpc.nu
+        self.x_lin = None if x_lin is None else np.asarray(x_lin, dtype=float)
+        self.k_neighbours = k_neighbours
+        self.max_distance = max_distance
+        self.distance_percentile = distance_percentile
+        self.tree = None
+
+        # same attributes as MPC after a solve, read by the Simulator's TickRecorder
+        self.iter_count = 0
+        self.status = ''
+        self.success = True
+        self.timings = {}
+        self.n_fallback = 0
+
+    def signature(self):
+        # hash of everything the stored u0 depends on
+        mpc = self.mpc
+        parts = [mpc.Q, mpc.R_mat, mpc.Qf, mpc.umin, mpc.umax, mpc.ymin, [mpc.h], mpc.horizon.dt,
+                 mpc.horizon.blocks, [] if self.x_lin is None else self.x_lin]
+        return hashlib.sha1(b''.join(np.asarray(p, dtype=float).tobytes() for p in parts)).hexdigest()
+
+    def sample(self, n_samples, method='sobol', seed=0):
+        # points in the unit cube over the free coordinates
+        d = len(self.free)
+        if method == 'grid':
+            n = max(2, int(round(n_samples ** (1 / d))))
+            axes = [np.linspace(0, 1, n)] * d
+            return np.stack(np.meshgrid(*axes, indexing='ij'), axis=-1).reshape(-1, d)
+        if method == 'sobol':
+            return qmc.Sobol(d, seed=seed).random(n_samples)
+        return np.random.default_rng(seed).random((n_samples, d))
+
+    def build(self, lower, upper, n_samples=4096, method='sobol', plugin='osqp', seed=0):
+        # lower/upper are 2*nx bounds on the table coordinates (x0 with the offset to x_ref[0], x_ref)
+        # copies, the x_ref[0] coordinate is pinned below and the caller's bounds must not change
+        self.lower = np.array(lower, dtype=float)
+        self.upper = np.array(upper, dtype=float)
+        self.lower[self.nx] = self.upper[self.nx] = 0.0
+        self.free = np.flatnonzero(self.upper > self.lower)
+        samples = self.sample(n_samples, method, seed)
+
+        mpc = self.mpc
+        qp = SparseMPCQP(self.nx, self.nu, mpc.Nh, mpc.Q, mpc.R_mat, mpc.Qf, mpc.umin, mpc.umax, mpc.ymin,
+                         plugin=plugin, warm_start=False, horizon=mpc.horizon)
+        if self.x_lin is not None:
+            stacks = qp.lti_stacks(*mpc.linearize(ca.DM(self.x_lin), ca.DM.zeros(self.nu)))
+
+        u0 = np.zeros((len(samples), self.nu))
+        ok = np.ones(len(samples), dtype=bool)
+        t_start = time.perf_counter()
+        for i, s in enumerate(samples):
+            p = self.to_parameter(s)
+            if self.x_lin is None:
+                stacks = qp.lti_stacks(*mpc.linearize(ca.DM(p[:self.nx]), ca.DM.zeros(self.nu)))
+            qp.prepare(*stacks, p[self.nx:])
+            u0[i] = qp.feedback(p[:self.nx])
+            ok[i] = qp.stats.get('success', False)
+        print(f"Explicit MPC table: {ok.sum()}/{len(samples)} samples solved in {time.perf_counter() - t_start:.1f}s")
+
+        # failed solves are left out rather than interpolated
+        self.set_table(samples[ok], u0[ok])
+
+    def set_table(self, samples, u0):
+        self.samples = np.asarray(samples, dtype=float)
+        self.u0 = np.asarray(u0, dtype=float)
+        self.tree = cKDTree(self.samples)
+        if self.max_distance is None:
+            # a query no further from the table than most samples are from their own nearest neighbour,
+            # k=2 because the nearest point to a sample is the sample itself
+            spacing = self.tree.query(self.samples, k=2)[0][:, 1]
+            self.max_distance = float(np.percentile(spacing, self.distance_percentile))
+
+    def to_parameter(self, s):
+        p = self.lower.copy()
+        p[self.free] = self.lower[self.free] + s * (self.upper[self.free] - self.lower[self.free])
+        return p
+
+    def to_unit(self, x0, x_ref):
+        p = np.concatenate([np.asarray(x0, dtype=float).flatten(), np.asarray(x_ref, dtype=float).flatten()])
+        p[0] -= p[self.nx]
+        p[self.nx] = 0.0
+        return (p[self.free] - self.lower[self.free]) / (self.upper[self.free] - self.lower[self.free])
+
+    def lookup(self, x0, x_ref):
+        # interpolated u0, or None when the parameter is not covered by the table
+        s = self.to_unit(x0, x_ref)
+        if np.any(s < 0.0) or np.any(s > 1.0):
+            return None
+        dist, idx = self.tree.query(s, k=min(self.k_neighbours, len(self.samples)))
+        # a single neighbour comes back as scalars
+        dist, idx = np.atleast_1d(dist), np.atleast_1d(idx)
+        if dist[0] > self.max_distance:
+            return None
+        if dist[0] == 0.0:
+            return self.u0[idx[0]]
+        w = 1.0 / dist**2
+        return w @ self.u0[idx] / w.sum()
+
+    def solve_mpc_convex(self, x0, x_ref):
+        t_start = time.perf_counter()
+        u = self.lookup(x0, x_ref)
+        if u is not None:
+            self.iter_count = 0
+            self.status = 'table'
+            self.success = True
+            self.timings = {'linearize': 0.0, 'setup': 0.0, 'solve': time.perf_counter() - t_start}
+            return np.clip(u, self.mpc.umin, self.mpc.umax)
+
+        self.n_fallback += 1
+        u = self.mpc.solve_mpc_convex(x0, x_ref)
+        self.iter_count = self.mpc.iter_count
+        self.status = 'fallback'
+        self.success = self.mpc.success
+        self.timings = self.mpc.timings
+        return u
+
+    def save(self, path):
+        np.savez_compressed(path, samples=self.samples.astype(np.float32), u0=self.u0.astype(np.float32),
+                            lower=self.lower, upper=self.upper,
+                            x_lin=np.zeros(0) if self.x_lin is None else self.x_lin,
+                            max_distance=self.max_distance, signature=self.signature())
+
+    @classmethod
+    def load(cls, path, mpc, k_neighbours=4):
+        data = np.load(path)
+        x_lin = data['x_lin'] if data['x_lin'].size else None
+        table = cls(mpc, x_lin=x_lin, k_neighbours=k_neighbours, max_distance=float(data['max_distance']))
+        if str(data['signature']) != table.signature():
+            raise ValueError(f"Explicit MPC table {path} was built for a different MPC tuning or horizon.")
+        table.lower = data['lower']
+        table.upper = data['upper']
+        table.free = np.flatnonzero(table.upper > table.lower)
+        table.set_table(data['samples'], data['u0'])
+        return table
+
+
+if __name__ == '__main__':
+    from Linearised_rocket import MPC, Simulator
+
+    mpc = MPC(solver_nl='ipopt', solver_qp='osqp', Nh=50)
+    x_refs = [
+        np.array([290, 160, 0, 2, 0, 0]),
+        np.array([340, 160, 0, 2, 0, 0]),
+        np.array([390, 160, 0, 4, 0, 0]),
+    ]
+
+    # offset to the reference, altitude, attitude and rates of the rocket vary, the reference speed varies
+    lower = [-400, 0, -0.5, 0, -10, -0.5, 0, 160, 0, 2, 0, 0]
+    upper = [50, 220, 6.0, 60, 60, 2.5, 0, 160, 0, 4, 0, 0]
+    explicit = ExplicitMPC(mpc)
+    explicit.build(lower, upper, n_samples=8192)
+    explicit.save('explicit_mpc_table.npz')
+
+    sim = Simulator(mpc, x_refs, threshold=20.0, controller=explicit)
+    sim.run_simulation()
+    sim.recorder.report(deadline=mpc.h)
+    print(f"{explicit.n_fallback} of {sim.Nt - 1} ticks fell back to the online QP")
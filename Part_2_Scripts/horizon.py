@@ -0,0 +1,116 @@
+###===--------------------------------------------===###
+# Script:        horizon.py
+# Authors:       Demir Kucukdemiral 2883935K, Charikleia Nikou 2881802N, Cameron Norrington 2873038N, Adam Burns 2914690B, Ben Maconnachie 2911209M, Jeremi Rozanski 2881882R
+# Created on:    2026-10
+# Last Modified: 2026-10
+# Description:   Prediction horizon layout (step sizes, move-blocking) and automatic horizon selection
+# Version:       1.0
+###===--------------------------------------------===###
+
+import numpy as np
+
+"""
+A Horizon describes how the MPC prediction is discretised:
+
+    dt      step size of every prediction stage, e.g. fine steps near the
+            current time and coarse ones further out
+    blocks  move-blocking, the number of consecutive stages that share one
+            control input
+
+Only one input per block is a decision variable, so a horizon with Nb
+blocks has nx*(Nh+1) + nu*Nb unknowns instead of (nx+nu)*Nh + nx. The
+MPC classes scale their per-stage models and stage costs by dt/h, where h
+is the controller sample time.
+"""
+
+
+class Horizon:
+    def __init__(self, h, dt, blocks=None):
+        self.h = h
+        self.dt = np.asarray(dt, dtype=float)
+        self.Nh = len(self.dt)
+        blocks = [1] * self.Nh if blocks is None else list(blocks)
+        if sum(blocks) != self.Nh or min(blocks) < 1:
+            raise ValueError(f"Block lengths {blocks} must be positive and add up to the horizon length {self.Nh}.")
+
+        self.blocks = blocks
+        self.Nb = len(blocks)
+        # stage k uses the input of block block_of[k], which starts at stage block_start[block_of[k]]
+        self.block_of = np.repeat(np.arange(self.Nb), blocks)
+        self.block_start = np.concatenate([[0], np.cumsum(blocks)[:-1]]).astype(int)
+        self.dt_scale = self.dt / h
+        self.t = np.concatenate([[0.0], np.cumsum(self.dt)])
+
+        self.uniform = bool(np.allclose(self.dt, h))
+        self.blocked = self.Nb < self.Nh
+
+    @classmethod
+    def uniform_steps(cls, h, Nh, block=1):
+        # Nh steps of h with the input held for block steps at a time
+        blocks = [block] * (Nh // block) + ([Nh % block] if Nh % block else [])
+        return cls(h, [h] * Nh, blocks)
+
+    @classmethod
+    def stretched(cls, h, n_fine, n_coarse, coarse_factor, coarse_block=1):
+        # n_fine steps of h, then n_coarse steps of coarse_factor*h; the coarse inputs may be blocked too
+        dt = [h] * n_fine + [coarse_factor * h] * n_coarse
+        coarse = [coarse_block] * (n_coarse // coarse_block) + ([n_coarse % coarse_block] if n_coarse % coarse_block else [])
+        return cls(h, dt, [1] * n_fine + coarse)
+
+    def expand(self, U_blocks):
+        # one column per block -> one column per stage
+        return np.asarray(U_blocks)[:, self.block_of]
+
+    def compress(self, U):
+        # one column per stage -> the column at the start of each block
+        return np.asarray(U)[:, self.block_start]
+
+    def n_decision(self, nx, nu):
+        return nx * (self.Nh + 1) + nu * self.Nb
+
+    def __repr__(self):
+        return f"Horizon(Nh={self.Nh}, Nb={self.Nb}, T={self.t[-1]:.2f}s)"
+
+
+def select_horizon(make_simulator, candidates, tol=1.0):
+    # runs every candidate in closed loop through make_simulator(horizon), the first one is the reference;
+    # returns the candidate with the fewest unknowns whose rms tracking error is within tol of the reference
+    # and which switches through as many references
+    results = []
+    for horizon in candidates:
+        sim = make_simulator(horizon)
+        sim.run_simulation()
+        err = sim.tracking_error()
+        results.append({
+            'horizon': horizon,
+            'n_decision': horizon.n_decision(sim.mpc.nx, sim.mpc.nu),
+            'rms_error': float(np.sqrt(np.mean(err**2))),
+            'refs_reached': sim.current_ref_index,
+        })
+        print(f"{horizon}: {results[-1]['n_decision']} unknowns, rms tracking error {results[-1]['rms_error']:.2f}, "
+              f"references reached {results[-1]['refs_reached']}")
+
+    reference = results[0]
+    accepted = [r for r in results
+                if r['rms_error'] <= reference['rms_error'] + tol and r['refs_reached'] >= reference['refs_reached']]
+    best = min(accepted, key=lambda r: r['n_decision'])
+    return best['horizon'], results
+
+
+if __name__ == '__main__':
+    from Linearised_rocket import MPC, Simulator
+
+    x_refs = [
+        np.array([290, 160, 0, 2, 0, 0]),
+        np.array([340, 160, 0, 2, 0, 0]),
+        np.array([390, 160, 0, 4, 0, 0]),
+    ]
+    candidates = [
+        Horizon.uniform_steps(0.1, 200),
+        Horizon.uniform_steps(0.1, 100, block=5),
+        Horizon.stretched(0.1, 10, 20, 4, coarse_block=2),
+        Horizon.stretched(0.1, 10, 10, 5, coarse_block=5),
+    ]
+    best, results = select_horizon(lambda hz: Simulator(MPC('ipopt', 'ipopt', horizon=hz), x_refs, threshold=20.0),
+                                   candidates, tol=2.0)
+    print(f"selected {best}: {best.n_decision(6, 3)} unknowns against {candidates[0].n_decision(6, 3)}")
@@ -0,0 +1,112 @@
+###===--------------------------------------------===###
+# Script:        instrumentation.py
+# Authors:       Demir Kucukdemiral 2883935K, Charikleia Nikou 2881802N, Cameron Norrington 2873038N, Adam Burns 2914690B, Ben Maconnachie 2911209M, Jeremi Rozanski 2881882R
+# Created on:    2026-10
+# Last Modified: 2026-10
+# Description:   Per-tick timing and solver statistics for the closed-loop MPC simulations
+# Version:       1.0
+###===--------------------------------------------===###
+
+import csv
+import json
+import numpy as np
+
+"""
+TickRecorder keeps one row per control tick in a NumPy record array: the
+wall time of each phase of the tick, the solver iteration count and return
+status, and how far the state and input left their bounds. The summary
+gives latency percentiles so a controller configuration can be checked
+against a real-time deadline. The Simulator creates its recorder with the
+sample time h as the deadline. summary() and report() use it unless they
+are given another one, and a recorder made without one skips the check.
+"""
+
+PHASES = ('linearize', 'setup', 'solve', 'plant')
+
+
+class TickRecorder:
+    def __init__(self, n_ticks, phases=PHASES, deadline=None):
+        self.phases = tuple(phases)
+        self.deadline = deadline
+        self.dtype = np.dtype(
+            [('tick', 'i4'), ('time', 'f8'), ('ref_index', 'i4')]
+            + [(f't_{p}', 'f8') for p in self.phases]
+            + [('t_total', 'f8'), ('iter_count', 'i4'), ('status', 'U32'), ('success', '?'),
+               ('y_violation', 'f8'), ('u_violation', 'f8')]
+        )
+        self.records = np.zeros(n_ticks, dtype=self.dtype)
+        self.n = 0
+
+    def record(self, tick, time, ref_index, timings, iter_count=-1, status='', success=True,
+               y_violation=0.0, u_violation=0.0):
+        row = self.records[self.n]
+        row['tick'] = tick
+        row['time'] = time
+        row['ref_index'] = ref_index
+        for p in self.phases:
+            row[f't_{p}'] = timings.get(p, 0.0)
+        row['t_total'] = sum(timings.get(p, 0.0) for p in self.phases)
+        row['iter_count'] = iter_count
+        row['status'] = status
+        row['success'] = success
+        row['y_violation'] = y_violation
+        row['u_violation'] = u_violation
+        self.n += 1
+
+    def data(self):
+        return self.records[:self.n]
+
+    def summary(self, deadline=None):
+        # latency percentiles per phase, plus deadline misses on the controller part of the tick
+        deadline = self.deadline if deadline is None else deadline
+        data = self.data()
+        stats = {'n_ticks': self.n}
+        for name in [f't_{p}' for p in self.phases] + ['t_total']:
+            values = data[name]
+            stats[name] = {
+                'mean': float(values.mean()),
+                'p50': float(np.percentile(values, 50)),
+                'p95': float(np.percentile(values, 95)),
+                'p99': float(np.percentile(values, 99)),
+                'max': float(values.max()),
+            }
+
+        controller = data['t_total'] - data['t_plant'] if 'plant' in self.phases else data['t_total']
+        stats['iter_mean'] = float(data['iter_count'].mean())
+        stats['iter_max'] = int(data['iter_count'].max())
+        stats['failures'] = int(np.sum(~data['success']))
+        stats['y_violation_max'] = float(data['y_violation'].max())
+        stats['u_violation_max'] = float(data['u_violation'].max())
+        if deadline is not None:
+            stats['deadline'] = deadline
+            stats['deadline_misses'] = int(np.sum(controller > deadline))
+            stats['meets_deadline'] = bool(np.percentile(controller, 99) <= deadline)
+        return stats
+
+    def report(self, deadline=None):
+        deadline = self.deadline if deadline is None else deadline
+        stats = self.summary(deadline)
+        print(f"{'phase':>10} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+        for p in list(self.phases) + ['total']:
+            s = stats[f't_{p}']
+            print(f"{p:>10} {1000 * s['mean']:9.2f} {1000 * s['p50']:9.2f} {1000 * s['p95']:9.2f} "
+                  f"{1000 * s['p99']:9.2f} {1000 * s['max']:9.2f}")
+        print(f"iterations mean {stats['iter_mean']:.1f}, max {stats['iter_max']} | failures {stats['failures']} | "
+              f"max violation y {stats['y_violation_max']:.3g}, u {stats['u_violation_max']:.3g}")
+        if deadline is not None:
+            verdict = 'meets' if stats['meets_deadline'] else 'misses'
+            print(f"deadline {1000 * deadline:.1f} ms: {stats['deadline_misses']} ticks over, p99 {verdict} it")
+        return stats
+
+    def to_csv(self, path):
+        data = self.data()
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(data.dtype.names)
+            writer.writerows(row.tolist() for row in data)
+
+    def to_json(self, path, deadline=None):
+        data = self.data()
+        ticks = [dict(zip(data.dtype.names, row.tolist())) for row in data]
+        with open(path, 'w') as f:
+            json.dump({'summary': self.summary(deadline), 'ticks': ticks}, f, indent=2)
@@ -0,0 +1,171 @@
+###===--------------------------------------------===###
+# Script:        launcher_kernels.py
+# Authors:       Demir Kucukdemiral 2883935K, Charikleia Nikou 2881802N, Cameron Norrington 2873038N, Adam Burns 2914690B, Ben Maconnachie 2911209M, Jeremi Rozanski 2881882R
+# Created on:    2026-10
+# Last Modified: 2026-10
+# Description:   Vectorised payload mass of a sequentially staged launcher, for whole batches of designs
+# Version:       1.0
+###===--------------------------------------------===###
+
+import numpy as np
+
+"""
+The Launcher classes burn their stages one after another. A stage with
+mass ratio K = exp(dv / (Isp g)) and structural efficiency e leaves
+
+    m_after  = m0 / K
+    m_struct = e / (1 - e) * (m0 - m_after)
+    m_next   = m_after - m_struct - m_drop = m0 * f - m_drop
+    f        = (1/K - e) / (1 - e)
+
+where m_drop is payload released after that stage. payload_mass() runs
+this for any number of designs at once. Stage arguments have the stage as
+their last axis and all leading axes broadcast against each other, so a
+sweep over efficiency, Isp, delta-v split and lift-off mass is a single
+call. Once a design's mass reaches zero it stays at zero, as in the
+original scalar loop.
+
+thrust_to_weight() is the matching lift-off T/W for the same batches.
+
+LauncherModel compiles the Stage dict and phase list of a Launcher_Data
+into arrays once. Per-stage masses, Isp and thrust are held as arrays,
+and per phase it keeps the burning stage, the active-stage mass sums and
+the launch-mass weights. Phases are looked up in a name index. Repeated
+payload and T/W evaluations then skip all Python-level aggregation.
+stage_breakdown() gives the per-stage masses of one design for the
+verbose reports, kept apart from the batch kernel.
+"""
+
+GRAVITY = 9.81
+
+
+def stage_factors(efficiency, Isp, delta_v, gravity=GRAVITY):
+    # f of every stage, (..., n_stages)
+    efficiency = np.asarray(efficiency, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inv_K = np.exp(-np.asarray(delta_v, dtype=float) / (np.asarray(Isp, dtype=float) * gravity))
+        return (inv_K - efficiency) / (1.0 - efficiency)
+
+
+def payload_mass(m0, efficiency, Isp, delta_v, drop_mass=0.0, gravity=GRAVITY):
+    # mass left after the last stage, 0 where any stage runs out of mass; shape is the broadcast of the leading axes
+    f = stage_factors(efficiency, Isp, delta_v, gravity)
+    drop_mass = np.asarray(drop_mass, dtype=float)
+    if drop_mass.ndim == 0:
+        drop_mass = np.full(f.shape[-1], float(drop_mass))
+    n_stages = np.broadcast_shapes(f.shape[-1:], drop_mass.shape[-1:])[0]
+    f = np.broadcast_to(f, f.shape[:-1] + (n_stages,))
+
+    m = np.asarray(m0, dtype=float)
+    alive = True
+    with np.errstate(invalid='ignore', over='ignore'):
+        for k in range(n_stages):
+            m = m * f[..., k] - drop_mass[..., k]
+            alive = alive & (m > 0)
+    return np.where(alive, m, 0.0)
+
+
+def thrust_to_weight(thrust_sl, m0, gravity=GRAVITY):
+    # sea-level thrust of the burning engines over the weight they lift, broadcast over designs
+    return np.asarray(thrust_sl, dtype=float) / (np.asarray(m0, dtype=float) * gravity)
+
+
+class LauncherModel:
+    def __init__(self, stages, phases, drop_after=None, fixed_efficiency=None, gravity=GRAVITY):
+        # drop_after maps a stage to the payload released when it is dropped,
+        # fixed_efficiency a stage to a structural efficiency that does not follow str_eff
+        drop_after = drop_after or {}
+        fixed_efficiency = fixed_efficiency or {}
+        self.gravity = gravity
+        self.stage_keys = list(stages)
+        self.stage_index = {k: i for i, k in enumerate(self.stage_keys)}
+        self.phase_names = [p["name"] for p in phases]
+        self.phase_index = {name: i for i, name in enumerate(self.phase_names)}
+
+        # per stage
+        stage_list = [stages[k] for k in self.stage_keys]
+        self.launch_mass = np.array([stg.launch_mass for stg in stage_list], dtype=float)
+        self.Isp = np.array([stg.Isp for stg in stage_list], dtype=float)
+        self.thrust_sl = np.array([stg.thrust_sl for stg in stage_list], dtype=float)
+        self.thrust_vac = np.array([stg.thrust_vac for stg in stage_list], dtype=float)
+        self.burn_time = np.array([stg.burn_time for stg in stage_list], dtype=float)
+        self.delta_v = np.array([stg.delta_v for stg in stage_list], dtype=float)
+        self.number = np.array([stg.number for stg in stage_list], dtype=float)
+        self.fixed_efficiency = np.array([fixed_efficiency.get(k, np.nan) for k in self.stage_keys])
+        self.free_efficiency = np.isnan(self.fixed_efficiency)
+
+        # per phase, the stage dropped at its end is the one burning
+        self.burn_stage = np.array([self.stage_index[p["drop_stages"][0]] for p in phases])
+        self.active = np.array([[k in p["active_stages"] for k in self.stage_keys] for p in phases])
+        self.active_mass = self.active @ self.launch_mass
+        self.weights = self.active * self.launch_mass / self.active_mass[:, None]
+        engines = np.array([[k in p["active_engine"] for k in self.stage_keys] for p in phases])
+        self.phase_thrust_sl = engines @ (self.thrust_sl * self.number)
+        self.phase_Isp = self.Isp[self.burn_stage]
+        self.phase_delta_v = self.delta_v[self.burn_stage]
+        self.drop_phase = np.array([self.stage_keys[i] in drop_after for i in self.burn_stage])
+        self.drop_mass = np.array([drop_after.get(self.stage_keys[i], 0.0) for i in self.burn_stage], dtype=float)
+
+    def stage_efficiencies(self, str_eff):
+        # (..., n_stages), str_eff broadcast over the stages without a fixed efficiency
+        return np.where(self.free_efficiency, np.asarray(str_eff, dtype=float)[..., None], self.fixed_efficiency)
+
+    def phase_efficiencies(self, str_eff, weighted=False):
+        # efficiency of the burning stage, or with weighted the launch-mass average over the active stages
+        e = self.stage_efficiencies(str_eff)
+        return e @ self.weights.T if weighted else e[..., self.burn_stage]
+
+    def payload(self, m0, str_eff, weighted=False, Isp=None, delta_v=None, drop=None):
+        # payload_mass over the phases; Isp and delta_v replace the per-phase values, drop the released payload
+        drop_mass = self.drop_mass if drop is None else \
+            np.where(self.drop_phase, np.asarray(drop, dtype=float)[..., None], 0.0)
+        return payload_mass(m0, self.phase_efficiencies(str_eff, weighted),
+                            self.phase_Isp if Isp is None else Isp,
+                            self.phase_delta_v if delta_v is None else delta_v,
+                            drop_mass, self.gravity)
+
+    def thrust_to_weight(self, phase, m0):
+        i = self.phase_index.get(phase)
+        if i is None:
+            raise ValueError(f"Invalid phase '{phase}' in Thrust_to_weight().")
+        return thrust_to_weight(self.phase_thrust_sl[i], m0, self.gravity)
+
+
+def stage_breakdown(m0, efficiency, Isp, delta_v, drop_mass=0.0, gravity=GRAVITY):
+    # per-stage masses of one design, arrays over the stages; stages after a non-positive mass are NaN
+    efficiency, Isp, delta_v, drop_mass = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in
+                                                                (efficiency, Isp, delta_v, drop_mass)))
+    n_stages = len(Isp)
+
+    out = {name: np.full(n_stages, np.nan) for name in ('m_start', 'm_propellant', 'm_structure', 'm_end')}
+    m = float(m0)
+    for k in range(n_stages):
+        e = efficiency[k]
+        m_after = m / np.exp(delta_v[k] / (Isp[k] * gravity))
+        out['m_start'][k] = m
+        out['m_propellant'][k] = m - m_after
+        out['m_structure'][k] = e / (1 - e) * (m - m_after)
+        m = m_after - out['m_structure'][k] - drop_mass[k]
+        out['m_end'][k] = m
+        if m <= 0:
+            break
+    return out
+
+
+if __name__ == '__main__':
+    import time
+
+    # three stage launcher of main.py, a million designs over efficiency, booster Isp and the booster/core delta-v split
+    rng = np.random.default_rng(0)
+    n = 1_000_000
+    eff = rng.uniform(0.02, 0.2, n)
+    isp_lpb = rng.uniform(300, 420, n)
+    dv_lpb = rng.uniform(2000, 5000, n)
+
+    t_start = time.perf_counter()
+    efficiency = np.stack([eff, eff, np.full(n, 0.15)], axis=-1)
+    Isp = np.stack([isp_lpb, np.full(n, 300.0), np.full(n, 410.0)], axis=-1)
+    delta_v = np.stack([dv_lpb, 7000 - dv_lpb, np.full(n, 4000.0)], axis=-1)
+    payload = payload_mass(761110, efficiency, Isp, delta_v, drop_mass=[0, 21100, 0])
+    print(f"{n} designs in {time.perf_counter() - t_start:.3f}s, {np.count_nonzero(payload)} with payload left, "
+          f"best {payload.max():.1f} kg")
@@ -0,0 +1,113 @@
+###===--------------------------------------------===###
+# Script:        pitch_program.py
+# Authors:       Demir Kucukdemiral 2883935K, Charikleia Nikou 2881802N, Cameron Norrington 2873038N, Adam Burns 2914690B, Ben Maconnachie 2911209M, Jeremi Rozanski 2881882R
+# Created on:    2026-10
+# Last Modified: 2026-10
+# Description:   Pitch-over time and kick angle optimisation for the trajectory.py gravity turn
+# Version:       1.0
+###===--------------------------------------------===###
+
+import time
+import warnings
+from dataclasses import dataclass, replace
+import numpy as np
+from scipy.optimize import differential_evolution
+from ascent import TRAJECTORY_PY, simulate_ascent
+from dispersion import fly_batch
+
+"""
+The ascent is an unsteered gravity turn. After the kick the flight-path
+angle follows from gravity alone, so the pitch-over time and the kick
+angle are the whole pitch program. optimise_pitch() searches both with
+differential evolution, using one of two objectives:
+
+    'burnout_vel'  maximise the velocity at burnout of the last segment,
+                   with burnout at or above min_altitude
+    'target'       reach target = (altitude [m], flight-path angle [deg]) at burnout
+
+Every generation goes to dispersion.fly_batch as one batch. The candidates
+are the runs, with no dispersion apart from the pitch-over they are
+searching, and the batch stops at the last burnout. One generation costs
+about as much as a single ascent. The pitch-over time moves in steps of
+dt, so the search is a population search and not gradient based. A search
+that stops at maxiter before the population has converged is flagged with
+converged=False and a warning.
+"""
+
+
+@dataclass
+class PitchResult:
+    pitch_time: float
+    pitch_angle: float
+    objective: float
+    burnout_vel: float
+    burnout_z: float
+    burnout_gamma: float
+    evaluations: int
+    generations: int
+    converged: bool
+    message: str = ""
+
+
+def evaluate_pitch(config, pitch_time, pitch_angle):
+    # burnout records of a batch of pitch programs on config
+    n = len(np.atleast_1d(pitch_time))
+    errors = {k: np.zeros((n, len(config.segments))) for k in ('thrust', 'mdot', 'Isp')}
+    errors['pitch_time'] = np.atleast_1d(pitch_time) - config.pitch_time
+    errors['pitch_angle'] = np.atleast_1d(pitch_angle) - config.pitch_angle
+    return fly_batch(config, errors, stop_at_burnout=True)
+
+
+def pitch_cost(runs, objective, target, min_altitude):
+    # value to minimise for every run; a burnout below min_altitude, ground contact after the kick or no
+    # burnout at all costs extra
+    if objective == 'burnout_vel':
+        cost = -runs['burnout_vel']
+    elif objective == 'target':
+        cost = np.hypot((runs['burnout_z'] - target[0]) / 1e4, np.degrees(runs['burnout_gamma']) - target[1])
+    else:
+        raise ValueError(f"Invalid objective '{objective}' in optimise_pitch().")
+    penalty = np.maximum(min_altitude - runs['burnout_z'], 0.0) + 1e3 * np.maximum(-runs['min_z'], 0.0)
+    return np.where(np.isnan(cost), 1e9, cost + penalty)
+
+
+def optimise_pitch(config=TRAJECTORY_PY, objective='burnout_vel', target=None, time_bounds=(5.0, 150.0),
+                   angle_bounds=(45.0, 89.9), min_altitude=0.0, popsize=15, maxiter=300, tol=1e-6, seed=0):
+    # best (pitch_time, pitch_angle) on config for objective, times in s and angles in deg
+    if objective == 'target' and target is None:
+        raise ValueError("A target (altitude, flight-path angle) is needed for the 'target' objective.")
+    evaluations = 0
+
+    def cost(x):
+        nonlocal evaluations
+        evaluations += x.shape[1]
+        return pitch_cost(evaluate_pitch(config, x[0], x[1]), objective, target, min_altitude)
+
+    res = differential_evolution(cost, [time_bounds, angle_bounds], popsize=popsize, maxiter=maxiter, tol=tol,
+                                 seed=seed, vectorized=True, updating='deferred', polish=False)
+    if not res.success:
+        warnings.warn(f"Pitch optimisation did not converge after {res.nit} generations: {res.message}",
+                      stacklevel=2)
+    pitch_time = config.step_of(res.x[0]) * config.dt
+    best = evaluate_pitch(config, pitch_time, res.x[1])[0]
+    return PitchResult(pitch_time, float(res.x[1]), float(res.fun), float(best['burnout_vel']),
+                       float(best['burnout_z']), float(np.degrees(best['burnout_gamma'])), evaluations, res.nit,
+                       bool(res.success), res.message)
+
+
+if __name__ == '__main__':
+    nominal = evaluate_pitch(TRAJECTORY_PY, TRAJECTORY_PY.pitch_time, TRAJECTORY_PY.pitch_angle)[0]
+    print(f"trajectory.py kick (89.9 s, 75.0 deg): burnout {nominal['burnout_vel']:.1f} m/s at "
+          f"{nominal['burnout_z'] / 1000:.1f} km, {np.degrees(nominal['burnout_gamma']):.2f} deg")
+
+    # fastest burnout at 100 km or higher, then burnout at 800 km climbing at 58.8 deg
+    for objective, target, min_altitude in (('burnout_vel', None, 100e3), ('target', (800e3, 58.8), 0.0)):
+        t_start = time.perf_counter()
+        best = optimise_pitch(objective=objective, target=target, min_altitude=min_altitude)
+        print(f"{objective}: kick at {best.pitch_time:.1f} s to {best.pitch_angle:.3f} deg -> burnout "
+              f"{best.burnout_vel:.1f} m/s at {best.burnout_z / 1000:.1f} km, {best.burnout_gamma:.2f} deg "
+              f"({best.evaluations} ascents, {best.generations} generations, {time.perf_counter() - t_start:.1f}s)")
+
+    # the optimum flown over the whole ascent
+    result = simulate_ascent(replace(TRAJECTORY_PY, pitch_time=best.pitch_time, pitch_angle=best.pitch_angle))
+    print(f"apogee of the target program {result['z'].max() / 1000:.1f} km")
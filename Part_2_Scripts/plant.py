@@ -0,0 +1,159 @@
+###===--------------------------------------------===###
+# Script:        plant.py
+# Authors:       Demir Kucukdemiral 2883935K, Charikleia Nikou 2881802N, Cameron Norrington 2873038N, Adam Burns 2914690B, Ben Maconnachie 2911209M, Jeremi Rozanski 2881882R
+# Created on:    2026-10
+# Last Modified: 2026-10
+# Description:   Numeric rocket plant used by the simulators, decoupled from the CasADi symbolics
+# Version:       1.0
+###===--------------------------------------------===###
+
+import math
+import time
+import numpy as np
+import casadi as ca
+from scipy.integrate import solve_ivp
+
+"""
+The MPC classes describe the rocket with CasADi expressions, which is what
+the optimiser needs but is slow for stepping the true plant with plain
+numbers. Plant integrates the same dynamics numerically:
+
+    'rk4'     fixed-step RK4 in plain Python floats
+    'casadi'  the MPC's own rk4_step wrapped once in a ca.Function
+    'RK45', 'DOP853', 'Radau', ...   adaptive scipy.integrate.solve_ivp,
+              the dense output of the last step is kept in Plant.dense
+
+The batch helpers at the bottom do the same RK4 for (N, 6) arrays.
+"""
+
+ADAPTIVE = ['RK45', 'RK23', 'DOP853', 'Radau', 'BDF', 'LSODA']
+
+
+class Plant:
+    def __init__(self, mpc, method='rk4', mass_scale=1.0, thrust_scale=1.0, rtol=1e-8, atol=1e-10):
+        if method not in ['rk4', 'casadi'] + ADAPTIVE:
+            raise ValueError(f"Unknown plant integrator '{method}'.")
+
+        self.mpc = mpc
+        self.method = method
+        self.nx = mpc.nx
+        self.rtol = rtol
+        self.atol = atol
+        self.dense = None
+
+        # physical constants copied out of the MPC so a dispersed plant does not touch the controller model
+        self.m = mpc.m * mass_scale
+        self.J = 0.25 * self.m * mpc.radius**2 + 1/12 * self.m * mpc.ell**2
+        self.thrust_scale = thrust_scale
+        self.ell = mpc.ell
+        self.GM = mpc.G * mpc.M
+        self.r_dyn = mpc.r_dyn
+        self.y_scale = mpc.y_scale
+
+        if method == 'casadi':
+            x = ca.SX.sym('x', mpc.nx)
+            u = ca.SX.sym('u', mpc.nu)
+            dt = ca.SX.sym('dt')
+            self.step_func = ca.Function('plant_step', [x, u, dt], [mpc.rk4_step(x, u, dt)])
+
+    def deriv(self, x, u):
+        # MPC.dynamics on plain floats, returns a tuple
+        x_dot, theta = x[3], x[2]
+        thrust = u[0] * self.thrust_scale
+        r = self.r_dyn + x[1] * self.y_scale
+
+        return (x_dot, x[4], x[5],
+                thrust / self.m * math.cos(theta + u[1]) - u[2] * math.sin(theta) / self.m,
+                thrust / self.m * math.sin(theta + u[1]) - self.GM / r**2 + x_dot**2 / r + u[2] * math.cos(theta) / self.m,
+                (self.ell / (2 * self.J)) * (thrust * math.sin(u[1]) + u[2]))
+
+    def rk4(self, x, u, dt):
+        # six-element states are faster as Python floats than as NumPy arrays
+        x = x.tolist()
+        u = np.asarray(u, dtype=float).flatten().tolist()
+        k1 = self.deriv(x, u)
+        k2 = self.deriv([a + dt/2 * b for a, b in zip(x, k1)], u)
+        k3 = self.deriv([a + dt/2 * b for a, b in zip(x, k2)], u)
+        k4 = self.deriv([a + dt * b for a, b in zip(x, k3)], u)
+        return np.array([a + (dt/6) * (b1 + 2*b2 + 2*b3 + b4) for a, b1, b2, b3, b4 in zip(x, k1, k2, k3, k4)])
+
+    def adaptive(self, x, u, dt):
+        u = np.asarray(u, dtype=float).flatten().tolist()
+        sol = solve_ivp(lambda t, y: self.deriv(y, u), (0.0, dt), x,
+                        method=self.method, rtol=self.rtol, atol=self.atol, dense_output=True)
+        if not sol.success:
+            raise RuntimeError(f"Plant integration failed: {sol.message}")
+        self.dense = sol.sol
+        return sol.y[:, -1]
+
+    def step(self, x, u, dt):
+        x = np.asarray(x, dtype=float).flatten()
+        if self.method == 'rk4':
+            return self.rk4(x, u, dt)
+        if self.method == 'casadi':
+            return np.array(self.step_func(x, u, dt)).flatten()
+        return self.adaptive(x, u, dt)
+
+    def check_consistency(self, n_samples=100, dt=None, seed=0):
+        # largest difference to MPC.rk4_step over random states/inputs, with the time per step of both
+        dt = self.mpc.h if dt is None else dt
+        rng = np.random.default_rng(seed)
+        xs = rng.uniform([-100, 0, -0.5, -20, -20, -1], [100, 200, 0.5, 20, 20, 1], size=(n_samples, self.nx))
+        us = rng.uniform(self.mpc.umin, self.mpc.umax, size=(n_samples, self.mpc.nu))
+
+        t_ref = time.perf_counter()
+        ref = [np.array(self.mpc.rk4_step(x, u, dt)).flatten() for x, u in zip(xs, us)]
+        t_ref = (time.perf_counter() - t_ref) / n_samples
+
+        t_plant = time.perf_counter()
+        out = [self.step(x, u, dt) for x, u in zip(xs, us)]
+        t_plant = (time.perf_counter() - t_plant) / n_samples
+
+        error = np.max(np.abs(np.array(out) - np.array(ref)))
+        return error, t_plant, t_ref
+
+
+def plant_params(mpc, mass_scale, thrust_scale):
+    # per-run physical constants, the inertia follows the perturbed mass
+    m = mpc.m * np.asarray(mass_scale, dtype=float)
+    return {
+        'm': m,
+        'J': 0.25 * m * mpc.radius**2 + 1/12 * m * mpc.ell**2,
+        'thrust_scale': np.asarray(thrust_scale, dtype=float),
+        'ell': mpc.ell,
+        'GM': mpc.G * mpc.M,
+        'r_dyn': mpc.r_dyn,
+        'y_scale': mpc.y_scale,
+    }
+
+
+def dynamics_batch(X, U, p):
+    # MPC.dynamics for an (N, 6) state array and (N, 3) input array
+    theta, x_dot = X[:, 2], X[:, 3]
+    thrust = U[:, 0] * p['thrust_scale']
+    r = p['r_dyn'] + X[:, 1] * p['y_scale']
+
+    torque = thrust * np.sin(U[:, 1]) + U[:, 2]
+    x_ddot = thrust / p['m'] * np.cos(theta + U[:, 1]) - U[:, 2] * np.sin(theta) / p['m']
+    y_ddot = thrust / p['m'] * np.sin(theta + U[:, 1]) - p['GM'] / r**2 + x_dot**2 / r + U[:, 2] * np.cos(theta) / p['m']
+    theta_ddot = (p['ell'] / (2 * p['J'])) * torque
+
+    return np.column_stack([X[:, 3], X[:, 4], X[:, 5], x_ddot, y_ddot, theta_ddot])
+
+
+def rk4_batch(X, U, dt, p):
+    k1 = dynamics_batch(X, U, p)
+    k2 = dynamics_batch(X + dt/2 * k1, U, p)
+    k3 = dynamics_batch(X + dt/2 * k2, U, p)
+    k4 = dynamics_batch(X + dt * k3, U, p)
+    return X + (dt/6) * (k1 + 2*k2 + 2*k3 + k4)
+
+
+if __name__ == '__main__':
+    from Linearised_rocket import MPC
+
+    mpc = MPC(solver_nl='ipopt', solver_qp='ipopt', Nh=20)
+    for method in ['rk4', 'casadi', 'RK45', 'DOP853']:
+        error, t_plant, t_ref = Plant(mpc, method).check_consistency()
+        print(f"{method:>7}: max difference to rk4_step {error:.2e} | {1e6 * t_plant:8.1f} us per step "
+              f"(rk4_step {1e6 * t_ref:.1f} us)")
@@ -0,0 +1,255 @@
+###===--------------------------------------------===###
+# Script:        qp_backend.py
+# Authors:       Demir Kucukdemiral 2883935K, Charikleia Nikou 2881802N, Cameron Norrington 2873038N, Adam Burns 2914690B, Ben Maconnachie 2911209M, Jeremi Rozanski 2881882R
+# Created on:    2026-10
+# Last Modified: 2026-10
+# Description:   Sparse structured QP backends (OSQP, qpOASES, HPIPM) for the linear MPC
+# Version:       1.0
+###===--------------------------------------------===###
+
+import warnings
+import numpy as np
+import casadi as ca
+from horizon import Horizon
+
+"""
+The linear MPC problem is written once as a sparse QP in the stage-wise
+ordering z = [x_0, u_0, x_1, u_1, ..., x_N], which keeps the KKT system
+banded. The dynamics enter through stacked matrices A_k, B_k, c_k so the
+same QP serves a single linearisation point (every A_k equal) and a
+linear time-varying model. The QP is handed to a CasADi conic plugin.
+
+With a blocked horizon (see horizon.py) only the first stage of each block
+carries an input in z, and the stage costs are weighted by dt_k/h.
+
+benchmark_qp.py found OSQP and HPIPM to match IPOPT only up to Nh = 50.
+Beyond that the single-point linearisation is badly conditioned, so
+longer horizons with them give a warning. The experimental backends are
+only available with experimental=True. QRQP returned wrong answers on some
+ticks at every horizon. qpOASES stayed accurate at long horizons, but even
+with its sparse option it took 1.8 s per solve at Nh = 100 and 14.8 s at
+Nh = 200, far over the sample time. For long horizons use IPOPT through
+the Opti path of the MPC instead.
+"""
+
+PLUGINS = ['osqp', 'hpipm']
+# backends that need experimental=True, with the reason they are not offered by default
+EXPERIMENTAL_PLUGINS = {
+    'qrqp': 'gives wrong answers on some ticks',
+    'qpoases': 'is too slow for the sample time beyond short horizons',
+}
+# longest horizon at which the backend still matched IPOPT in benchmark_qp.py
+ACCURATE_NH = {'osqp': 50, 'hpipm': 50}
+# largest constraint violation of a returned solution, relative to the size of the solution
+FEASIBILITY_TOL = 1e-4
+
+
+def feasibility_flag(z, g, lbg, ubg, tol=FEASIBILITY_TOL):
+    # symbolic 1 when z is finite and lbg <= g <= ubg holds to tol, else 0; CasADi solvers have no status
+    # output, so this is what an exported Function can return about the solve it contains
+    violation = ca.mmax(ca.fmax(lbg - g, 0) + ca.fmax(g - ubg, 0))
+    finite = ca.mmin(ca.fabs(z) < np.inf)
+    return ca.logic_and(finite, violation <= tol * (1 + ca.mmax(ca.fabs(z))))
+
+
+class SparseMPCQP:
+    def __init__(self, nx, nu, Nh, Q, R, Qf, umin, umax, ymin, plugin='osqp', warm_start=True, horizon=None,
+                 experimental=False):
+        if plugin in EXPERIMENTAL_PLUGINS and not experimental:
+            raise ValueError(f"QP backend '{plugin}' {EXPERIMENTAL_PLUGINS[plugin]}, "
+                             f"pass experimental=True to use it anyway.")
+        if plugin not in PLUGINS + list(EXPERIMENTAL_PLUGINS):
+            raise ValueError(f"Unknown QP backend '{plugin}', expected one of {PLUGINS}.")
+        if Nh > ACCURATE_NH.get(plugin, Nh):
+            warnings.warn(f"QP backend '{plugin}' is only accurate up to Nh = {ACCURATE_NH[plugin]}, got Nh = {Nh}; "
+                          f"use solver_qp='ipopt' for longer horizons.", stacklevel=2)
+        self.horizon = horizon or Horizon.uniform_steps(1.0, Nh)
+        if self.horizon.Nh != Nh:
+            raise ValueError(f"Horizon has {self.horizon.Nh} stages, expected {Nh}.")
+        if plugin == 'hpipm' and self.horizon.blocked:
+            raise ValueError("hpipm needs one input per stage, move-blocking is not supported.")
+
+        self.nx = nx
+        self.nu = nu
+        self.Nh = Nh
+        self.plugin = plugin
+        self.warm_start = warm_start
+
+        self.nz = nx * (Nh + 1) + nu * self.horizon.Nb
+        self.ng = nx * Nh
+
+        # index of x_k inside z, and of the input block used by stage k
+        x_idx, u_block_idx, offset = [], [], 0
+        for k in range(Nh + 1):
+            x_idx.append(np.arange(nx) + offset)
+            offset += nx
+            if k < Nh and k in self.horizon.block_start:
+                u_block_idx.append(np.arange(nu) + offset)
+                offset += nu
+        self.x_idx = np.array(x_idx)
+        self.u_block_idx = np.array(u_block_idx)
+        self.u_idx = self.u_block_idx[self.horizon.block_of]
+
+        self.build(np.asarray(Q), np.asarray(R), np.asarray(Qf), umin, umax, ymin)
+
+        # previous solution, shifted by one stage for the next warm start
+        self.z = None
+        self.lam_x = None
+        self.lam_a = None
+        self.stats = {}
+
+    def build(self, Q, R, Qf, umin, umax, ymin):
+        nx, nu, Nh = self.nx, self.nu, self.Nh
+
+        z = ca.SX.sym('z', self.nz)
+        A_stack = ca.SX.sym('A', nx, nx * Nh)
+        B_stack = ca.SX.sym('B', nx, nu * Nh)
+        c_stack = ca.SX.sym('c', nx, Nh)
+        x_ref = ca.SX.sym('x_ref', nx)
+
+        # inputs are solved for in units of their bound and the cost is normalised by the largest weight,
+        # which keeps the KKT system well conditioned for the first-order and active-set solvers
+        self.u_scale = np.maximum(np.abs(umin), np.abs(umax))
+        cost_scale = 1.0 / max(np.max(np.abs(Q)), np.max(np.abs(Qf)), np.max(np.abs(R)))
+
+        X = [z[self.x_idx[k]] for k in range(Nh + 1)]
+        U = [self.u_scale * z[self.u_idx[k]] for k in range(Nh)]
+
+        cost = 0
+        g = []
+        for k in range(Nh):
+            A_k = A_stack[:, k * nx:(k + 1) * nx]
+            B_k = B_stack[:, k * nu:(k + 1) * nu]
+            g.append(A_k @ X[k] + B_k @ U[k] + c_stack[:, k] - X[k + 1])
+
+            w = self.horizon.dt_scale[k]
+            cost += w * ca.mtimes([(X[k] - x_ref).T, Q, (X[k] - x_ref)])
+            cost += w * ca.mtimes([U[k].T, R, U[k]])
+        cost += ca.mtimes([(X[Nh] - x_ref).T, Qf, (X[Nh] - x_ref)])
+        cost = cost_scale * cost
+        g = ca.vertcat(*g)
+
+        # the QP is exact, so its data is the Hessian/Jacobian evaluated at z = 0
+        H, grad = ca.hessian(cost, z)
+        A = ca.jacobian(g, z)
+        z0 = ca.DM.zeros(self.nz)
+        grad = ca.substitute(grad, z, z0)
+        b = -ca.substitute(g, z, z0)
+
+        self.qp_data = ca.Function('qp_data', [A_stack, B_stack, c_stack, x_ref], [grad, A, b],
+                                   ['A', 'B', 'c', 'x_ref'], ['g', 'a', 'b'])
+        self.H = ca.Function('H', [z], [H])(z0)
+
+        # box bounds: inputs every stage, altitude on the free states, x_0 is pinned through its bounds
+        self.lbx = -np.inf * np.ones(self.nz)
+        self.ubx = np.inf * np.ones(self.nz)
+        for idx in self.u_block_idx:
+            self.lbx[idx] = np.array(umin) / self.u_scale
+            self.ubx[idx] = np.array(umax) / self.u_scale
+        for k in range(1, Nh):
+            self.lbx[self.x_idx[k][1]] = ymin[0]
+
+        self.solver = ca.conic('mpc_qp', self.plugin, {'h': self.H.sparsity(), 'a': A.sparsity()},
+                               self.solver_options())
+
+    def solver_options(self):
+        if self.plugin == 'osqp':
+            return {'osqp': {'verbose': False, 'eps_abs': 1e-5, 'eps_rel': 1e-5, 'max_iter': 10000, 'polishing': True},
+                    'warm_start_primal': self.warm_start, 'warm_start_dual': self.warm_start,
+                    'error_on_fail': False}
+        if self.plugin == 'qpoases':
+            return {'printLevel': 'none', 'sparse': True, 'error_on_fail': False}
+        if self.plugin == 'hpipm':
+            return {'N': self.Nh, 'nx': [self.nx] * (self.Nh + 1), 'nu': [self.nu] * self.Nh + [0],
+                    'ng': [0] * (self.Nh + 1), 'hpipm': {'mode': 'speed_abs', 'iter_max': 100},
+                    'error_on_fail': False}
+        return {'print_iter': False, 'print_header': False, 'error_on_fail': False}
+
+    def shift(self, v, stage_size):
+        # move every stage one step forward and repeat the last one
+        return np.concatenate([v[stage_size:], v[-stage_size:]])
+
+    def pack(self, X, U):
+        # state/input trajectories (one column per stage) -> z
+        z = np.zeros(self.nz)
+        z[self.x_idx.flatten()] = np.asarray(X).T.flatten()
+        z[self.u_block_idx.flatten()] = (self.horizon.compress(U) / self.u_scale[:, None]).T.flatten()
+        return z
+
+    def lti_stacks(self, A_lin, B_lin, c):
+        # one linearisation point over the horizon, rescaled from the sample time h to each stage's dt
+        if self.horizon.uniform:
+            return ca.repmat(A_lin, 1, self.Nh), ca.repmat(B_lin, 1, self.Nh), ca.repmat(c, 1, self.Nh)
+        I = ca.DM.eye(self.nx)
+        s = self.horizon.dt_scale
+        return (ca.horzcat(*[I + s[k] * (A_lin - I) for k in range(self.Nh)]),
+                ca.horzcat(*[s[k] * B_lin for k in range(self.Nh)]),
+                ca.horzcat(*[s[k] * c for k in range(self.Nh)]))
+
+    def prepare(self, A_stack, B_stack, c_stack, x_ref):
+        # everything that does not depend on the measured state
+        self.g, self.a, self.b = self.qp_data(A_stack, B_stack, c_stack, x_ref)
+
+    def feedback(self, x0):
+        # latency critical part: pin x_0 and solve the prepared QP
+        x0 = np.array(x0, dtype=float).flatten()
+        self.lbx[self.x_idx[0]] = x0
+        self.ubx[self.x_idx[0]] = x0
+
+        args = {'h': self.H, 'g': self.g, 'a': self.a, 'lba': self.b, 'uba': self.b,
+                'lbx': self.lbx, 'ubx': self.ubx}
+        if self.warm_start and self.z is not None and not self.horizon.blocked:
+            args['x0'] = self.shift(self.z, self.nx + self.nu)
+            args['lam_x0'] = self.shift(self.lam_x, self.nx + self.nu)
+            args['lam_a0'] = self.shift(self.lam_a, self.nx)
+        elif self.warm_start and self.z is not None:
+            # stages no longer line up with blocks after a shift, so only the primal guess is reused
+            X, U = self.X_opt(), self.U_opt()
+            args['x0'] = self.pack(np.hstack([X[:, 1:], X[:, -1:]]), np.hstack([U[:, 1:], U[:, -1:]]))
+
+        sol = self.solver(**args)
+        self.stats = self.solver.stats()
+
+        self.z = np.array(sol['x']).flatten()
+        self.lam_x = np.array(sol['lam_x']).flatten()
+        self.lam_a = np.array(sol['lam_a']).flatten()
+        return self.u_scale * self.z[self.u_idx[0]]
+
+    def solve(self, A_stack, B_stack, c_stack, x0, x_ref):
+        self.prepare(A_stack, B_stack, c_stack, x_ref)
+        return self.feedback(x0)
+
+    def solve_lti(self, A_lin, B_lin, c, x0, x_ref):
+        # a single linearisation point reused over the whole horizon
+        return self.solve(*self.lti_stacks(A_lin, B_lin, c), x0, x_ref)
+
+    def solve_symbolic(self, A_lin, B_lin, c, x0, x_ref, X_init, U_init):
+        # same LTI solve as an MX expression, used to export the whole controller as one Function
+        return self.solve_stacks_symbolic(*self.lti_stacks(A_lin, B_lin, c), x0, x_ref, X_init, U_init)
+
+    def solve_stacks_symbolic(self, A_stack, B_stack, c_stack, x0, x_ref, X_init, U_init):
+        g, a, b = self.qp_data(A_stack, B_stack, c_stack, x_ref)
+        lbx = ca.MX(ca.DM(self.lbx))
+        ubx = ca.MX(ca.DM(self.ubx))
+        lbx[self.x_idx[0].tolist()] = x0
+        ubx[self.x_idx[0].tolist()] = x0
+
+        z_init = ca.MX.zeros(self.nz)
+        z_init[self.x_idx.flatten().tolist()] = ca.vec(X_init)
+        z_init[self.u_block_idx.flatten().tolist()] = ca.vec(U_init[:, self.horizon.block_start.tolist()] / self.u_scale)
+
+        sol = self.solver(h=self.H, g=g, a=a, lba=b, uba=b, lbx=lbx, ubx=ubx, x0=z_init)
+        z = sol['x']
+        X_opt = ca.reshape(z[self.x_idx.flatten().tolist()], self.nx, self.Nh + 1)
+        U_opt = self.u_scale * ca.reshape(z[self.u_idx.flatten().tolist()], self.nu, self.Nh)
+        feasible = feasibility_flag(z, ca.vertcat(ca.mtimes(a, z), z), ca.vertcat(b, lbx), ca.vertcat(b, ubx))
+        return U_opt[:, 0], X_opt, U_opt, feasible
+
+    def X_opt(self):
+        return self.z[self.x_idx].T
+
+    def U_opt(self):
+        return (self.u_scale * self.z[self.u_idx]).T
+
+    def iter_count(self):
+        return self.stats.get('iter_count', -1)
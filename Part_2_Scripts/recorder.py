@@ -0,0 +1,223 @@
+###===--------------------------------------------===###
+# Script:        recorder.py
+# Authors:       Demir Kucukdemiral 2883935K, Charikleia Nikou 2881802N, Cameron Norrington 2873038N, Adam Burns 2914690B, Ben Maconnachie 2911209M, Jeremi Rozanski 2881882R
+# Created on:    2026-10
+# Last Modified: 2026-10
+# Description:   Memory-bounded recording of ascent runs: decimation, ring buffer and on-disk memmap store
+# Version:       1.0
+###===--------------------------------------------===###
+
+import os
+import json
+import numpy as np
+
+"""
+The ascent loops stream their records into a recorder instead of
+preallocating one full-resolution array per variable.
+simulate_ascent(config, recorder=...) passes blocks of consecutive steps.
+dispersion.fly_batch(..., recorder=...) passes one step at a time, with
+one record per run. A block is a structured array whose first axis is the
+step. The dtype and the shape of one step are taken from the first block.
+
+Every recorder keeps only the steps that are multiples of every:
+
+    Recorder          in memory, a list of chunks
+    RingRecorder      the last capacity kept steps (or the last seconds of
+                      flight), overwritten in place
+    MemmapRecorder    chunks of about chunk_records records (a step of
+                      a batch holds one per run) appended to a raw
+                      file, plus a small .json header
+
+read() returns the recorded steps as one structured array. For
+MemmapRecorder it is a read-only np.memmap, so a field or slice only
+loads the pages it touches. thin(max_points) reads at most max_points
+evenly spaced steps for plotting. MemmapRecorder.open(path) gives the
+same lazy access to a store written earlier. h5py and zarr are not
+dependencies of these scripts, so the on-disk store is a plain memmap.
+"""
+
+
+class Recorder:
+    def __init__(self, every=1):
+        if every < 1:
+            raise ValueError(f"Decimation must keep every 1st step or fewer, got every={every}.")
+        self.every = int(every)
+        self.dtype = None
+        self.step_shape = None
+        self.n_seen = 0
+        self.chunks = []
+
+    def keeps(self, step):
+        return step % self.every == 0
+
+    def append(self, block, first_step):
+        # block holds the consecutive steps first_step, first_step + 1, ...
+        block = np.asarray(block)
+        if self.dtype is None:
+            self.dtype, self.step_shape = block.dtype, block.shape[1:]
+        elif block.shape[1:] != self.step_shape:
+            raise ValueError(f"Recorder holds steps of shape {self.step_shape}, got {block.shape[1:]}.")
+        self.n_seen = max(self.n_seen, first_step + len(block))
+        rows = block[(-first_step) % self.every::self.every]
+        if len(rows):
+            self.store(rows)
+
+    def store(self, rows):
+        self.chunks.append(rows.copy())
+
+    def close(self):
+        if len(self.chunks) > 1:
+            self.chunks = [np.concatenate(self.chunks)]
+
+    def empty(self):
+        return np.zeros((0,) + (self.step_shape or ()), dtype=self.dtype or float)
+
+    def read(self):
+        self.close()
+        return self.chunks[0] if self.chunks else self.empty()
+
+    def __len__(self):
+        return sum(len(chunk) for chunk in self.chunks)
+
+    def __getitem__(self, field):
+        return self.read()[field]
+
+    def thin(self, max_points):
+        # at most max_points evenly spaced recorded steps, copied out of the store
+        data = self.read()
+        return np.array(data[::max(1, -(-len(data) // max_points))])
+
+
+class RingRecorder(Recorder):
+    def __init__(self, capacity=None, seconds=None, dt=None, every=1):
+        # capacity kept steps, or enough of them for the last seconds of flight at step dt
+        super().__init__(every)
+        if capacity is None:
+            if seconds is None or dt is None:
+                raise ValueError("RingRecorder needs a capacity, or seconds and dt.")
+            capacity = int(np.ceil(seconds / (dt * self.every))) + 1
+        self.capacity = int(capacity)
+        self.buffer = None
+        self.n_stored = 0
+
+    def store(self, rows):
+        if self.buffer is None:
+            self.buffer = np.zeros((self.capacity,) + self.step_shape, dtype=self.dtype)
+        rows = rows[-self.capacity:]
+        start = self.n_stored % self.capacity
+        first = min(len(rows), self.capacity - start)
+        self.buffer[start:start + first] = rows[:first]
+        self.buffer[:len(rows) - first] = rows[first:]
+        self.n_stored += len(rows)
+
+    def close(self):
+        pass
+
+    def read(self):
+        # the kept steps, oldest first
+        if self.buffer is None:
+            return self.empty()
+        if self.n_stored <= self.capacity:
+            return self.buffer[:self.n_stored]
+        return np.roll(self.buffer, -(self.n_stored % self.capacity), axis=0)
+
+    def __len__(self):
+        return min(self.n_stored, self.capacity)
+
+
+class MemmapRecorder(Recorder):
+    def __init__(self, path, every=1, chunk_records=65536):
+        # steps go to the raw file path, the dtype and step count to path + '.json'; at most about chunk_records
+        # records are held in memory before they are written
+        super().__init__(every)
+        self.path = path
+        self.chunk_records = int(chunk_records)
+        self.pending = []
+        self.n_pending = 0
+        self.pending_records = 0
+        self.n_written = 0
+        self.file = open(path, 'wb')
+
+    def store(self, rows):
+        self.pending.append(rows.copy())
+        self.n_pending += len(rows)
+        # counted in records, not steps, so one step of a large batch weighs as much as many single-run steps
+        self.pending_records += rows.size
+        if self.pending_records >= self.chunk_records:
+            self.flush()
+
+    def flush(self):
+        for rows in self.pending:
+            self.file.write(np.ascontiguousarray(rows).tobytes())
+        self.n_written += self.n_pending
+        self.pending, self.n_pending, self.pending_records = [], 0, 0
+        self.file.flush()
+        self.write_header()
+
+    def write_header(self):
+        header = {'descr': np.lib.format.dtype_to_descr(self.dtype or np.dtype(float)),
+                  'step_shape': list(self.step_shape or ()), 'n_steps': self.n_written, 'every': self.every}
+        with open(self.path + '.json', 'w') as f:
+            json.dump(header, f)
+
+    def close(self):
+        if self.file is not None and not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def read(self):
+        self.close()
+        if self.n_written == 0:
+            return self.empty()
+        return np.memmap(self.path, dtype=self.dtype, mode='r', shape=(self.n_written,) + self.step_shape)
+
+    def __len__(self):
+        return self.n_written + self.n_pending
+
+    @classmethod
+    def open(cls, path):
+        # read-only access to a store written earlier
+        with open(path + '.json') as f:
+            header = json.load(f)
+        store = cls.__new__(cls)
+        Recorder.__init__(store, header['every'])
+        store.path = path
+        store.dtype = np.lib.format.descr_to_dtype(header['descr'])
+        store.step_shape = tuple(header['step_shape'])
+        store.n_written, store.n_pending, store.pending = header['n_steps'], 0, []
+        store.chunk_records, store.pending_records, store.file = 0, 0, None
+        return store
+
+
+if __name__ == '__main__':
+    import time
+    import tempfile
+    from dataclasses import replace
+    from ascent import TRAJECTORY_PY, simulate_ascent
+    from dispersion import SIGMAS, fly_batch, perturb
+
+    # a 1 ms step ascent, 1.09 million steps
+    config = replace(TRAJECTORY_PY, dt=1e-3)
+    path = os.path.join(tempfile.gettempdir(), 'ascent_1ms.dat')
+    t_start = time.perf_counter()
+    store = simulate_ascent(config, recorder=MemmapRecorder(path, every=10))
+    print(f"{store.n_seen} steps streamed to {path} in {time.perf_counter() - t_start:.1f}s, "
+          f"{len(store)} kept ({os.path.getsize(path) / 1e6:.1f} MB on disk)")
+
+    ring = simulate_ascent(config, recorder=RingRecorder(seconds=60.0, dt=config.dt, every=100))
+    last = ring.read()
+    print(f"ring buffer: {len(ring)} steps from t = {last['time'][0]:.1f} s to {last['time'][-1]:.1f} s")
+
+    lazy = MemmapRecorder.open(path)
+    apogee = lazy['z'].max()
+    print(f"reopened store: apogee {apogee / 1000:.1f} km, plot preview of {len(lazy.thin(2000))} points")
+
+    # 200 dispersed runs, every 100th step of each in memory and every 10th on disk
+    batch = Recorder(every=100)
+    fly_batch(TRAJECTORY_PY, perturb(TRAJECTORY_PY, 200, SIGMAS), recorder=batch)
+    print(f"batch: {batch.read().shape} records (steps x runs)")
+    batch_path = os.path.join(tempfile.gettempdir(), 'ascent_batch.dat')
+    disk = MemmapRecorder(batch_path, every=10)
+    fly_batch(TRAJECTORY_PY, perturb(TRAJECTORY_PY, 200, SIGMAS), recorder=disk)
+    print(f"batch on disk: {disk.read().shape} records (steps x runs), "
+          f"{os.path.getsize(batch_path) / 1e6:.1f} MB")
@@ -0,0 +1,249 @@
+###===--------------------------------------------===###
+# Script:        render.py
+# Authors:       Demir Kucukdemiral 2883935K, Charikleia Nikou 2881802N, Cameron Norrington 2873038N, Adam Burns 2914690B, Ben Maconnachie 2911209M, Jeremi Rozanski 2881882R
+# Created on:    2026-10
+# Last Modified: 2026-10
+# Description:   Rocket trajectory animation, interactive or rendered headless to MP4/GIF
+# Version:       1.0
+###===--------------------------------------------===###
+
+import os
+import time
+import math
+import warnings
+import subprocess
+import numpy as np
+import matplotlib
+import matplotlib.patches as patches
+import matplotlib.animation as animation
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from PIL import Image
+
+"""
+Shared by the Simulator.animate methods of both MPC scripts. The rocket
+outline (body rectangle and nose triangle) is rotated and translated for
+every frame in one vectorised NumPy pass, so a frame only swaps polygon
+vertices. The trajectory drawn so far is kept in the blitting background.
+A frame adds only the segment since the previous frame and then draws the
+rocket on top, so the cost of a frame does not grow with the history.
+
+render_to_file() needs no display. It draws on an Agg canvas and keeps one
+frame per 1/fps seconds of simulated time (times speed). The static part
+of the figure is drawn once and each frame blits only the rocket and the
+new piece of line. Frames are piped straight into ffmpeg for .mp4;
+matplotlib's FFMpegWriter would redraw the whole figure per frame. For
+.gif, frames go through Pillow with one shared palette and are written
+when the sink closes. If ffmpeg is missing, an .mp4 request is written as
+.gif next to it with a warning, and never over an existing file.
+"""
+
+BODY_WIDTH = 3
+BODY_HEIGHT = 10
+NOSE_HEIGHT = 5
+
+
+def rocket_vertices(xhist, frames):
+    # (n_frames, 4, 2) body and (n_frames, 3, 2) nose corners in world coordinates
+    body = np.array([[-BODY_WIDTH/2, -BODY_HEIGHT/2], [BODY_WIDTH/2, -BODY_HEIGHT/2],
+                     [BODY_WIDTH/2, BODY_HEIGHT/2], [-BODY_WIDTH/2, BODY_HEIGHT/2]])
+    nose = np.array([[-BODY_WIDTH/2, BODY_HEIGHT/2], [BODY_WIDTH/2, BODY_HEIGHT/2], [0, BODY_HEIGHT/2 + NOSE_HEIGHT]])
+
+    theta = xhist[2, frames] - math.pi/2
+    c, s = np.cos(theta), np.sin(theta)
+    rot = np.stack([np.stack([c, -s], axis=-1), np.stack([s, c], axis=-1)], axis=-2)
+    offset = xhist[:2, frames].T[:, None, :]
+    return np.einsum('fij,vj->fvi', rot, body) + offset, np.einsum('fij,vj->fvi', rot, nose) + offset
+
+
+def build_scene(ax, xhist, x_refs):
+    x_min, x_max = xhist[0, :].min() - 10, xhist[0, :].max() + 10
+    y_min, y_max = xhist[1, :].min() - 10, xhist[1, :].max() + 10
+
+    ax.set_aspect('equal')
+    ax.set_xlim(x_min, x_max)
+    ax.set_ylim(y_min, y_max)
+    ax.set_xlabel("x")
+    ax.set_ylabel("y")
+    ax.set_title("Rocket Trajectory Animation")
+
+    ax.axhline(y=xhist[1, 0], linestyle='--', color='gray', label='Start Y')
+    ax.axhline(y=x_refs[-1][1], linestyle='--', color='gray', label='Reference Y')
+
+    refs_x = [ref[0] for ref in x_refs]
+    refs_y = [ref[1] for ref in x_refs]
+    ax.plot(refs_x, refs_y, '*', color='gold', markersize=12, label='References')
+
+    rocket_body = patches.Polygon(np.zeros((4, 2)), closed=True, fc="white", ec="black")
+    rocket_nose = patches.Polygon(np.zeros((3, 2)), closed=True, fc="white", ec="black")
+    ax.add_patch(rocket_body)
+    ax.add_patch(rocket_nose)
+    traj_line, = ax.plot([], [], '--', color='gray', label='Trajectory')
+    ax.legend()
+    return rocket_body, rocket_nose, traj_line
+
+
+def frame_indices(n_steps, dt, fps=30, speed=1.0):
+    # simulation steps shown in the video, one per 1/fps seconds of playback, always ending on the last step
+    stride = max(1, int(round(speed / (fps * dt))))
+    frames = np.arange(0, n_steps, stride)
+    if frames[-1] != n_steps - 1:
+        frames = np.append(frames, n_steps - 1)
+    return frames
+
+
+class TrailBlitter:
+    # blitting against a background that holds the static scene and the trajectory up to the last frame drawn
+    def __init__(self, canvas, xhist, traj_line, rocket):
+        self.canvas = canvas
+        self.xhist = xhist
+        self.traj_line = traj_line
+        self.rocket = rocket
+        self.ax = traj_line.axes
+        self.background = None
+        self.drawn = 0
+        self.length = 0.0
+        # the dash pattern restarts with every piece, so each one is offset by the length of line before it
+        self.dashes = matplotlib.rcParams['lines.dashed_pattern']
+        self.dash_scale = traj_line.get_linewidth() if matplotlib.rcParams['lines.scale_dashes'] else 1.0
+        for artist in (traj_line, *rocket):
+            artist.set_animated(True)
+
+    def capture(self, upto=0):
+        # after a full draw, which leaves out the animated artists: line up to step upto baked into the background
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.drawn = 0
+        self.length = 0.0
+        if upto > 0:
+            self.extend(upto)
+
+    def extend(self, frame):
+        # only the steps since the last drawn one, starting on it so the pieces join
+        piece = self.xhist[:2, self.drawn:frame+1]
+        self.traj_line.set_data(piece[0], piece[1])
+        self.traj_line.set_linestyle((self.length / self.dash_scale, self.dashes))
+        self.ax.draw_artist(self.traj_line)
+        pixels = np.diff(self.ax.transData.transform(piece.T), axis=0)
+        self.length += np.hypot(pixels[:, 0], pixels[:, 1]).sum() * 72 / self.canvas.figure.dpi
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.drawn = frame
+
+    def draw(self, frame, body, nose):
+        self.canvas.restore_region(self.background)
+        if frame > self.drawn:
+            self.extend(frame)
+        rocket_body, rocket_nose = self.rocket
+        rocket_body.set_xy(body)
+        rocket_nose.set_xy(nose)
+        for artist in self.rocket:
+            self.ax.draw_artist(artist)
+
+
+def show_animation(xhist, x_refs, interval=50, repeat_delay=2000):
+    # interactive window, every simulation step is a frame; returns the timer driving it
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(8, 8))
+    rocket_body, rocket_nose, traj_line = build_scene(ax, xhist, x_refs)
+    body, nose = rocket_vertices(xhist, np.arange(xhist.shape[1]))
+    trail = TrailBlitter(fig.canvas, xhist, traj_line, (rocket_body, rocket_nose))
+    state = {'frame': 0}
+
+    # a full redraw (first show, resize, restart) wipes the blitted line, it is put back up to the current frame
+    fig.canvas.mpl_connect('draw_event', lambda event: trail.capture(state['frame']))
+    timer = fig.canvas.new_timer(interval=interval)
+
+    def step():
+        if trail.background is None:
+            return
+        frame = state['frame']
+        trail.draw(frame, body[frame], nose[frame])
+        fig.canvas.blit(ax.bbox)
+        state['frame'] = (frame + 1) % xhist.shape[1]
+        timer.interval = repeat_delay if state['frame'] == 0 else interval
+        if state['frame'] == 0:
+            fig.canvas.draw_idle()
+
+    timer.add_callback(step)
+    timer.start()
+    plt.show()
+    return timer
+
+
+class FFMpegSink:
+    # raw RGBA frames piped into ffmpeg, same encoder settings as matplotlib's FFMpegWriter
+    def __init__(self, path, size, fps):
+        cmd = [matplotlib.rcParams['animation.ffmpeg_path'], '-y', '-loglevel', 'error',
+               '-f', 'rawvideo', '-pix_fmt', 'rgba', '-s', f'{size[0]}x{size[1]}', '-r', str(fps), '-i', '-',
+               '-vcodec', 'libx264', '-pix_fmt', 'yuv420p', path]
+        self.proc = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+
+    def write(self, rgba):
+        self.proc.stdin.write(bytes(rgba))
+
+    def close(self):
+        self.proc.stdin.close()
+        if self.proc.wait() != 0:
+            raise RuntimeError("ffmpeg failed to encode the animation.")
+
+
+class GifSink:
+    # frames are mapped onto one palette taken from the first frame, which is much cheaper than quantising each,
+    # and kept as one byte per pixel until Pillow writes them all on close
+    def __init__(self, path, size, fps):
+        self.path = path
+        self.size = size
+        self.duration = 1000 / fps
+        self.palette = None
+        self.frames = []
+
+    def write(self, rgba):
+        im = Image.frombuffer('RGBA', self.size, rgba).convert('RGB')
+        if self.palette is None:
+            self.palette = im.quantize(colors=64)
+        self.frames.append(im.quantize(palette=self.palette, dither=Image.Dither.NONE))
+
+    def close(self):
+        # a render that failed before its first frame writes nothing, so its own error is the one raised;
+        # Pillow's optimize pass diffs every frame against the previous one and costs more than the rendering
+        if self.frames:
+            self.frames[0].save(self.path, save_all=True, append_images=self.frames[1:], duration=self.duration,
+                                loop=0, optimize=False)
+            self.frames = []
+
+
+def render_to_file(xhist, x_refs, dt, save_path, fps=30, speed=1.0, dpi=100):
+    # headless rendering, returns the path written (the suffix may change to .gif without ffmpeg)
+    root, ext = os.path.splitext(save_path)
+    if ext.lower() == '.mp4' and not animation.writers.is_available('ffmpeg'):
+        gif_path = root + '.gif'
+        if os.path.exists(gif_path):
+            raise FileExistsError(f"ffmpeg not found and the GIF fallback '{gif_path}' already exists, "
+                                  f"not overwriting it.")
+        warnings.warn(f"ffmpeg not found, writing '{gif_path}' instead of '{save_path}'.", stacklevel=2)
+        save_path, ext = gif_path, '.gif'
+
+    fig = Figure(figsize=(8, 8), dpi=dpi)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    rocket_body, rocket_nose, traj_line = build_scene(ax, xhist, x_refs)
+
+    # the static scene is drawn once, every frame restores it and draws only the moving artists
+    trail = TrailBlitter(canvas, xhist, traj_line, (rocket_body, rocket_nose))
+    canvas.draw()
+    trail.capture()
+
+    frames = frame_indices(xhist.shape[1], dt, fps, speed)
+    body, nose = rocket_vertices(xhist, frames)
+
+    size = canvas.get_width_height()
+    sink = FFMpegSink(save_path, size, fps) if ext.lower() == '.mp4' else GifSink(save_path, size, fps)
+    t_start = time.perf_counter()
+    try:
+        for i, frame in enumerate(frames):
+            trail.draw(frame, body[i], nose[i])
+            sink.write(canvas.buffer_rgba())
+    finally:
+        sink.close()
+    print(f"Rendered {len(frames)} frames to {save_path} in {time.perf_counter() - t_start:.1f}s")
+    return save_path
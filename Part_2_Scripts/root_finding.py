@@ -0,0 +1,53 @@
+###===--------------------------------------------===###
+# Script:        root_finding.py
+# Authors:       Demir Kucukdemiral 2883935K, Charikleia Nikou 2881802N, Cameron Norrington 2873038N, Adam Burns 2914690B, Ben Maconnachie 2911209M, Jeremi Rozanski 2881882R
+# Created on:    2026-10
+# Last Modified: 2026-10
+# Description:   Bracketed root finding for the launcher design value that gives a target payload
+# Version:       1.0
+###===--------------------------------------------===###
+
+import math
+from dataclasses import dataclass
+from scipy.optimize import brentq
+
+"""
+The Launcher models used to find a design value (structural efficiency,
+exhaust velocity, lift-off mass) by stepping it until the payload crossed
+the target, so the answer was only as good as the step. The payload is
+monotonic in each of these values, so solve_for_payload() brackets the
+crossing and hands it to Brent's method instead. That gives the exact value
+to within xtol in a few dozen payload evaluations at most. The result
+records how many iterations and evaluations were used.
+"""
+
+
+@dataclass
+class RootResult:
+    value: float
+    payload: float
+    iterations: int
+    evaluations: int
+    converged: bool
+    message: str = ""
+
+
+def solve_for_payload(payload_fn, target, lower, upper, xtol=1e-10, rtol=1e-12, maxiter=100):
+    # value in [lower, upper] where payload_fn(value) == target, payload_fn has to cross the target on the bracket
+    evaluations = 0
+
+    def residual(x):
+        nonlocal evaluations
+        evaluations += 1
+        return float(payload_fn(x)) - target
+
+    r_lower, r_upper = residual(lower), residual(upper)
+    if r_lower == 0.0 or r_upper == 0.0:
+        value = lower if r_lower == 0.0 else upper
+        return RootResult(value, target, 0, evaluations, True)
+    if (r_lower > 0) == (r_upper > 0):
+        return RootResult(math.nan, math.nan, 0, evaluations, False,
+                          f"the payload does not cross {target:.1f} kg between {lower:g} and {upper:g}")
+
+    value, info = brentq(residual, lower, upper, xtol=xtol, rtol=rtol, maxiter=maxiter, full_output=True, disp=False)
+    return RootResult(value, target + residual(value), info.iterations, evaluations, info.converged, info.flag)
@@ -0,0 +1,216 @@
+###===--------------------------------------------===###
+# Script:        stage_catalog.py
+# Authors:       Demir Kucukdemiral 2883935K, Charikleia Nikou 2881802N, Cameron Norrington 2873038N, Adam Burns 2914690B, Ben Maconnachie 2911209M, Jeremi Rozanski 2881882R
+# Created on:    2026-10
+# Last Modified: 2026-10
+# Description:   Column-wise catalog of launcher stages with slotted row views
+# Version:       1.0
+###===--------------------------------------------===###
+
+import numpy as np
+
+"""
+StageCatalog keeps any number of stages column-wise, one typed NumPy array
+per field, instead of one Stage object with its own __dict__ per stage.
+The fields cover both stage descriptions in the repo: the Stage dataclass
+of main.py, updated_Script.py and Data.py (launch mass, Isp, thrust,
+burn time, delta-v, number), and the dry/propellant masses of
+attmpt_at_a_new_approach.py. For the latter, dry_mass is stored and
+prop_mass is launch_mass - dry_mass.
+
+Names are stored once in a table and each stage holds a code into it, so
+a catalog of many variants of the same stage does not repeat the string.
+
+catalog[i] returns a StageView, a two-slot object whose attributes read
+and write the columns, so code written against Stage keeps working.
+catalog[a:b] and catalog[mask] return sub-catalogs. A plain slice shares
+memory with the original, and catalog.Isp and the other columns are the
+arrays themselves. stage_matrix() reshapes a column into
+(n_designs, n_stages) without copying, ready for
+launcher_kernels.payload_mass when each design's stages are stored next to
+each other.
+"""
+
+FIELDS = {
+    'launch_mass': 'f8',
+    'dry_mass': 'f8',
+    'Isp': 'f8',
+    'thrust_vac': 'f8',
+    'thrust_sl': 'f8',
+    'burn_time': 'f8',
+    'delta_v': 'f8',
+    'number': 'i4',
+    'structural_efficiency': 'f8',
+}
+DEFAULTS = {'dry_mass': np.nan, 'thrust_vac': 0.0, 'thrust_sl': 0.0, 'burn_time': 0.0, 'delta_v': 0.0, 'number': 1,
+            'structural_efficiency': 0.0}
+
+
+class StageView:
+    # one row of a StageCatalog, attributes go straight to the columns
+    __slots__ = ('catalog', 'index')
+
+    def __init__(self, catalog, index):
+        self.catalog = catalog
+        self.index = index
+
+    @property
+    def prop_mass(self):
+        return self.launch_mass - self.dry_mass
+
+    @property
+    def struct_eff(self):
+        return self.dry_mass / self.launch_mass if self.launch_mass > 0 else 0.0
+
+    @property
+    def name(self):
+        return self.catalog.name_table[self.catalog.name_code[self.index]]
+
+    @name.setter
+    def name(self, value):
+        self.catalog.name_code[self.index] = self.catalog.name_to_code(value)
+
+    def __repr__(self):
+        return f"StageView(name={self.name!r}, " + ", ".join(f"{f}={getattr(self, f)!r}" for f in FIELDS) + ")"
+
+
+def column_property(field):
+    def get(self):
+        return self.catalog.columns[field][self.index].item()
+
+    def set(self, value):
+        self.catalog.columns[field][self.index] = value
+
+    return property(get, set)
+
+
+for _field in FIELDS:
+    setattr(StageView, _field, column_property(_field))
+
+
+class StageCatalog:
+    def __init__(self, columns, names=None):
+        # columns maps fields to arrays of one length, missing fields are filled with their defaults;
+        # names is one name per stage
+        n = len(next(iter(columns.values()))) if columns else len(names or [])
+        self.columns = {}
+        for field, dtype in FIELDS.items():
+            if field in columns:
+                self.columns[field] = np.asarray(columns[field], dtype=dtype)
+            else:
+                self.columns[field] = np.full(n, DEFAULTS.get(field, np.nan), dtype=dtype)
+            if len(self.columns[field]) != n:
+                raise ValueError(f"Column '{field}' has {len(self.columns[field])} rows, expected {n}.")
+        # the table is a list shared with every sub-catalog, so a name added through one is seen by all
+        table, codes = np.unique(np.asarray([''] * n if names is None else names, dtype=str), return_inverse=True)
+        self.name_table = table.tolist()
+        self.name_code = codes.astype(np.int32)
+
+    def name_to_code(self, name):
+        # code of name in the table, the table grows for a new name
+        if name not in self.name_table:
+            self.name_table.append(name)
+        return self.name_table.index(name)
+
+    @classmethod
+    def from_stages(cls, stages):
+        # from Stage objects of either kind, attributes a stage does not have get the defaults
+        stages = list(stages)
+        columns = {}
+        names = [getattr(stg, 'name', '') for stg in stages]
+        for field in FIELDS:
+            if field == 'launch_mass':
+                values = [stg.launch_mass if hasattr(stg, 'launch_mass') else stg.dry_mass + stg.prop_mass
+                          for stg in stages]
+            elif field == 'structural_efficiency':
+                values = [getattr(stg, 'structural_efficiency', getattr(stg, 'struct_eff', 0.0)) for stg in stages]
+            else:
+                values = [getattr(stg, field, DEFAULTS[field]) if field in DEFAULTS else getattr(stg, field) for stg in stages]
+            columns[field] = values
+        return cls(columns, names)
+
+    def __len__(self):
+        return len(self.name_code)
+
+    def __getattr__(self, field):
+        # catalog.Isp etc. are the column arrays themselves
+        columns = self.__dict__.get('columns')
+        if columns is not None and field in columns:
+            return columns[field]
+        raise AttributeError(field)
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            n = len(self)
+            if not -n <= key < n:
+                raise IndexError(f"Stage {key} out of range for a catalog of {n}.")
+            return StageView(self, key % n)
+        # slices give views into the same arrays, index arrays and masks give copies
+        sub = StageCatalog.__new__(StageCatalog)
+        sub.columns = {field: col[key] for field, col in self.columns.items()}
+        sub.name_table = self.name_table
+        sub.name_code = self.name_code[key]
+        return sub
+
+    def __iter__(self):
+        return (StageView(self, i) for i in range(len(self)))
+
+    @property
+    def name(self):
+        return np.array(self.name_table)[self.name_code]
+
+    @property
+    def prop_mass(self):
+        return self.columns['launch_mass'] - self.columns['dry_mass']
+
+    def stage_matrix(self, field, n_stages):
+        # (n_designs, n_stages) view of a column whose designs are stored as consecutive stages
+        return self.columns[field].reshape(-1, n_stages)
+
+    def find(self, name):
+        # indices of the stages with this name
+        return np.flatnonzero(self.name_code == self.name_table.index(name)) if name in self.name_table \
+            else np.zeros(0, dtype=int)
+
+    def nbytes(self):
+        return sum(col.nbytes for col in self.columns.values()) + self.name_code.nbytes
+
+    def save(self, path):
+        np.savez(path, name_table=np.array(self.name_table), name_code=self.name_code, **self.columns)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        catalog = cls({field: data[field] for field in FIELDS if field in data})
+        catalog.name_table = data['name_table'].tolist()
+        catalog.name_code = data['name_code']
+        return catalog
+
+
+if __name__ == '__main__':
+    import sys
+    import time
+    from main import Launcher_Data
+    from launcher_kernels import payload_mass
+
+    # a catalog of 100k three stage launchers, the stages of one design next to each other
+    base = Launcher_Data()
+    nominal = StageCatalog.from_stages([base.lpb, base.core_stage, base.upper_stage])
+    n_designs = 100_000
+    catalog = nominal[np.tile(np.arange(3), n_designs)]
+    rng = np.random.default_rng(0)
+    catalog.Isp[:] *= rng.uniform(0.9, 1.1, len(catalog))
+    catalog.launch_mass[:] *= rng.uniform(0.8, 1.2, len(catalog))
+
+    per_object = sys.getsizeof(base.lpb) + sys.getsizeof(base.lpb.__dict__)
+    print(f"{len(catalog)} stages in {catalog.nbytes() / 1e6:.1f} MB, "
+          f"about {per_object * len(catalog) / 1e6:.1f} MB as Stage objects before their field values")
+
+    t_start = time.perf_counter()
+    m0 = catalog.stage_matrix('launch_mass', 3).sum(axis=1) + base.mass_payload_1 + base.mass_payload_2
+    payload = payload_mass(m0, [0.06, 0.06, 0.15], catalog.stage_matrix('Isp', 3), catalog.stage_matrix('delta_v', 3),
+                           [0, base.mass_payload_1, 0])
+    print(f"payload of {n_designs} designs in {time.perf_counter() - t_start:.3f}s, best {payload.max():.1f} kg")
+
+    stage = catalog[4]
+    print(stage.name, f"Isp {stage.Isp:.1f} s, launch mass {stage.launch_mass:.0f} kg")
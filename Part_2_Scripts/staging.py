@@ -0,0 +1,156 @@
+###===--------------------------------------------===###
+# Script:        staging.py
+# Authors:       Demir Kucukdemiral 2883935K, Charikleia Nikou 2881802N, Cameron Norrington 2873038N, Adam Burns 2914690B, Ben Maconnachie 2911209M, Jeremi Rozanski 2881882R
+# Created on:    2026-10
+# Last Modified: 2026-10
+# Description:   Payload-optimal split of the total delta-v between the stages of a launcher
+# Version:       1.0
+###===--------------------------------------------===###
+
+import numpy as np
+from scipy.optimize import minimize
+from launcher_kernels import GRAVITY, payload_mass, stage_factors
+
+"""
+With exhaust velocity c_k and structural efficiency e_k, stage k keeps the
+fraction f_k = (r_k - e_k) / (1 - e_k) of its start mass, r_k = exp(-dv_k/c_k).
+Without payload drops the payload is m0 * prod(f_k), and maximising it
+subject to sum(dv_k) = dv_total gives the classic Lagrange condition
+
+    d ln f_k / d dv_k = -1/t   =>   dv_k = c_k ln((1 - t/c_k) / e_k)
+
+A stage for which this gives a negative delta-v is not worth flying and
+gets 0 instead. The delta-v budget is then still decreasing in t, and t is
+found by Newton steps kept inside a bisection bracket. Every configuration
+of a batch is solved at once.
+
+Payload released part way up (mass_payload_1 after the core stage) breaks
+the product form. optimal_split() then repeats the same closed form with
+stage weights w_k = dm_n/dln f_k / m_n, taken from the previous split, until the
+split stops changing. Configurations that do not settle are solved with
+SLSQP on the full payload model, and so is any payload model given as a
+function through optimal_split_numeric().
+"""
+
+
+def lagrange_split(total_dv, c, efficiency, weights=1.0, tol=1e-12, maxiter=100):
+    # delta-v per stage (..., n_stages) maximising sum(w_k ln f_k), NaN where total_dv cannot be reached
+    c, efficiency, weights = np.broadcast_arrays(np.asarray(c, dtype=float), np.asarray(efficiency, dtype=float),
+                                                 np.asarray(weights, dtype=float))
+    a = c / weights
+    total_dv = np.asarray(total_dv, dtype=float)
+
+    def split(t):
+        # a stage only flies while t < a_k (1 - e_k), beyond that its delta-v is 0
+        active = t[..., None] < a * (1 - efficiency)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            dv = np.where(active, c * np.log((1 - t[..., None] / a) / efficiency), 0.0)
+            slope = -np.sum(np.where(active, c / (a - t[..., None]), 0.0), axis=-1)
+        return dv, slope
+
+    lo = np.zeros(np.broadcast_shapes(a.shape[:-1], total_dv.shape))
+    hi = np.broadcast_to(np.max(a * (1 - efficiency), axis=-1), lo.shape).copy()
+    feasible = split(lo)[0].sum(axis=-1) > total_dv
+    t = 0.5 * (lo + hi)
+    for _ in range(maxiter):
+        dv, slope = split(t)
+        g = dv.sum(axis=-1) - total_dv
+        lo = np.where(g > 0, t, lo)
+        hi = np.where(g > 0, hi, t)
+        # Newton inside the bracket, bisection otherwise
+        with np.errstate(invalid='ignore', divide='ignore'):
+            t_next = t - g / slope
+        t_next = np.where((t_next > lo) & (t_next < hi), t_next, 0.5 * (lo + hi))
+        done = ~feasible | (np.abs(t_next - t) <= tol * hi)
+        t = t_next
+        if done.all():
+            break
+
+    return np.where(feasible[..., None], split(t)[0], np.nan)
+
+
+def drop_weights(m0, dv, c, efficiency, drop_mass):
+    # w_k = (m_{k+1} + d_k) * prod_{j>k} f_j, the payload sensitivity to ln f_k
+    f = stage_factors(efficiency, c / GRAVITY, dv)
+    n_stages = f.shape[-1]
+    m = np.asarray(m0, dtype=float)
+    after = []
+    for k in range(n_stages):
+        after.append(m * f[..., k])
+        m = after[-1] - drop_mass[..., k]
+    tail = np.ones_like(m)
+    weights = [None] * n_stages
+    for k in reversed(range(n_stages)):
+        weights[k] = after[k] * tail
+        tail = tail * f[..., k]
+    return np.stack(weights, axis=-1)
+
+
+def optimal_split_numeric(payload_fn, total_dv, n_stages, dv0=None):
+    # SLSQP on any payload model, payload_fn takes one delta-v vector
+    dv0 = np.full(n_stages, total_dv / n_stages) if dv0 is None or np.any(np.isnan(dv0)) else np.asarray(dv0)
+    scale = total_dv / n_stages
+    res = minimize(lambda x: -float(payload_fn(x * scale)), dv0 / scale, method='SLSQP',
+                   bounds=[(0, None)] * n_stages,
+                   constraints=[{'type': 'eq', 'fun': lambda x: x.sum() * scale - total_dv}],
+                   options={'ftol': 1e-12, 'maxiter': 200})
+    return res.x * scale, -res.fun, res.success
+
+
+def optimal_split(m0, total_dv, Isp, efficiency, drop_mass=0.0, gravity=GRAVITY, tol=1e-6, maxiter=50,
+                  fallback=True):
+    # payload-optimal delta-v per stage for a batch of launchers, stage arguments have the stage as last axis;
+    # returns (delta_v, payload, converged), infeasible budgets give NaN delta-v and zero payload
+    c, efficiency, drop_mass = np.broadcast_arrays(np.asarray(Isp, dtype=float) * gravity,
+                                                   np.asarray(efficiency, dtype=float), np.asarray(drop_mass, dtype=float))
+    n_stages = c.shape[-1]
+    lead = np.broadcast_shapes(c.shape[:-1], np.shape(m0), np.shape(total_dv))
+    c, efficiency, drop_mass = (np.broadcast_to(x, lead + (n_stages,)).reshape(-1, n_stages)
+                                for x in (c, efficiency, drop_mass))
+    m0 = np.broadcast_to(np.asarray(m0, dtype=float), lead).reshape(-1)
+    total_dv = np.broadcast_to(np.asarray(total_dv, dtype=float), lead).reshape(-1)
+
+    dv = lagrange_split(total_dv, c, efficiency)
+    feasible = ~np.isnan(dv).any(axis=-1)
+    converged = feasible.copy()
+    if np.any(drop_mass != 0):
+        # weighted closed form, repeated until the split settles
+        converged[:] = False
+        for _ in range(maxiter):
+            with np.errstate(invalid='ignore', divide='ignore'):
+                weights = drop_weights(m0, dv, c, efficiency, drop_mass)
+                usable = feasible & np.all(weights > 0, axis=-1)
+                dv_next = lagrange_split(total_dv, c, efficiency, np.where(usable[:, None], weights, 1.0))
+            converged = usable & (np.max(np.abs(dv_next - dv), axis=-1) <= tol)
+            dv = np.where(converged[:, None], dv, 0.5 * (dv + dv_next))
+            if converged[feasible].all():
+                break
+
+    payload = payload_mass(m0, efficiency, c / gravity, np.nan_to_num(dv), drop_mass, gravity)
+    payload[~feasible] = 0.0
+    if fallback:
+        # the few configurations the iteration could not settle go through SLSQP one by one
+        for i in np.flatnonzero(feasible & ~converged):
+            fn = lambda x: payload_mass(m0[i], efficiency[i], c[i] / gravity, x, drop_mass[i], gravity)
+            dv[i], payload[i], converged[i] = optimal_split_numeric(fn, total_dv[i], n_stages, dv[i])
+    return dv.reshape(lead + (n_stages,)), payload.reshape(lead), converged.reshape(lead)
+
+
+if __name__ == '__main__':
+    import time
+
+    # the three stages of main.py with the payload drop after the core stage
+    Isp = np.array([363.0, 300.0, 410.0])
+    efficiency = np.array([0.06, 0.06, 0.15])
+    dv, payload, ok = optimal_split(761110, 11000, Isp, efficiency, drop_mass=[0, 21100, 0])
+    fixed = payload_mass(761110, efficiency, Isp, [3000, 4000, 4000], [0, 21100, 0])
+    print(f"optimal split {np.round(dv, 1)} m/s -> {payload:.1f} kg, fixed 3000/4000/4000 -> {fixed:.1f} kg")
+
+    # a batch of launchers without drops, where the closed form applies directly
+    rng = np.random.default_rng(0)
+    n = 10000
+    Isp = rng.uniform(250, 450, (n, 3))
+    efficiency = rng.uniform(0.04, 0.15, (n, 3))
+    t_start = time.perf_counter()
+    dv, payload, ok = optimal_split(761110, 9000, Isp, efficiency)
+    print(f"{n} configurations in {time.perf_counter() - t_start:.3f}s, {ok.sum()} feasible")
@@ -0,0 +1,315 @@
+###===--------------------------------------------===###
+# Script:        sweep.py
+# Authors:       Demir Kucukdemiral 2883935K, Charikleia Nikou 2881802N, Cameron Norrington 2873038N, Adam Burns 2914690B, Ben Maconnachie 2911209M, Jeremi Rozanski 2881882R
+# Created on:    2026-10
+# Last Modified: 2026-10
+# Description:   Parallel, cached and resumable parameter sweeps over the closed-loop MPC simulations
+# Version:       1.0
+###===--------------------------------------------===###
+
+import os
+import sys
+import json
+import hashlib
+import importlib
+import itertools
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+from scipy.stats import qmc
+
+"""
+A sweep is a list of points, each a dict of
+
+    Q, R_mat, Qf   cost weights (diagonal or full matrix)
+    h, Nh          sample time and horizon length
+    x_refs         waypoint list
+
+plus any fixed MPC constructor arguments. grid_design() takes the product
+of value lists and lhs_design() draws a Latin hypercube over ranges.
+
+Every point runs one closed-loop Simulator in a worker process. Workers are
+recycled after a few runs so memory held by CasADi stays bounded, and only
+a few runs are queued at a time. A finished run is written to the cache
+directory as <hash>.json, keyed by a hash of the point, so an interrupted
+sweep picks up where it stopped. A run that raises is recorded as failed.
+A worker that dies takes the pool down with it. The runs that were in
+flight are then rerun one at a time, and the one whose worker dies again
+is recorded as failed. collect() gathers the cache into one
+columnar .npz file.
+"""
+
+MODELS = {
+    'linear': 'Linearised_rocket',
+    'nonlinear': 'MPC_Rcoket_Improved 2',
+}
+TUNING = ['Q', 'R_mat', 'Qf', 'h']
+
+
+def grid_design(space):
+    # every combination of the value lists in space
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[n] for n in names))]
+
+
+def lhs_design(space, n_points, seed=0):
+    # space maps a name to (low, high) or (low, high, 'log'); lists of ranges give one value per entry
+    names, lows, highs, logs, sizes = [], [], [], [], []
+    for name, spec in space.items():
+        specs = spec if isinstance(spec, list) else [spec]
+        for low, high, *scale in specs:
+            log = bool(scale) and scale[0] == 'log'
+            lows.append(np.log10(low) if log else low)
+            highs.append(np.log10(high) if log else high)
+            logs.append(log)
+        names.append(name)
+        sizes.append(len(specs) if isinstance(spec, list) else None)
+
+    unit = qmc.LatinHypercube(len(lows), seed=seed).random(n_points)
+    values = qmc.scale(unit, lows, highs)
+    values[:, logs] = 10 ** values[:, logs]
+
+    points = []
+    for row in values:
+        point, i = {}, 0
+        for name, size in zip(names, sizes):
+            if size is None:
+                point[name] = float(row[i])
+                i += 1
+            else:
+                point[name] = row[i:i + size].tolist()
+                i += size
+        if 'Nh' in point:
+            point['Nh'] = int(round(point['Nh']))
+        points.append(point)
+    return points
+
+
+def to_jsonable(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(v) for v in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def point_key(point):
+    return hashlib.sha1(json.dumps(to_jsonable(point), sort_keys=True).encode()).hexdigest()[:16]
+
+
+def quiet_worker():
+    # IPOPT and the simulators print every tick, keep the workers silent at the file descriptor level
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+
+
+def closed_loop_metrics(sim, solve_times, settle_tol):
+    h = sim.mpc.h
+    x_final = np.asarray(sim.x_refs[-1], dtype=float)
+    xhist = sim.xhist[:, :len(solve_times) + 1]
+    uhist = sim.uhist[:, :len(solve_times)]
+
+    # settle time: from then on the rocket stays within settle_tol of the last waypoint
+    dist = np.linalg.norm(xhist[:2].T - x_final[:2], axis=1)
+    outside = np.flatnonzero(dist >= settle_tol)
+    if len(outside) == 0:
+        settle_time = 0.0
+    elif outside[-1] < len(dist) - 1:
+        settle_time = (outside[-1] + 1) * h
+    else:
+        settle_time = np.nan
+
+    # overshoot past the last waypoint in the direction of approach, downrange and in altitude
+    approach = np.where(x_final[:2] >= xhist[:2, 0], 1.0, -1.0)
+    overshoot = np.max((xhist[:2].T - x_final[:2]) * approach, axis=0)
+    overshoot_x, overshoot_y = np.maximum(overshoot, 0.0).tolist()
+
+    # control effort with every input normalised by its bound
+    u_scale = np.maximum(np.abs(sim.mpc.umin), np.abs(sim.mpc.umax))
+    effort = float(np.sum((uhist / u_scale[:, None]) ** 2) * h)
+
+    err = sim.tracking_error()
+    return {
+        'settle_time': settle_time,
+        'overshoot_x': overshoot_x,
+        'overshoot_y': overshoot_y,
+        'control_effort': effort,
+        'rms_error': float(np.sqrt(np.mean(err ** 2))),
+        'refs_reached': int(sim.current_ref_index),
+        'solve_time_mean': float(np.mean(solve_times)),
+        'solve_time_p95': float(np.percentile(solve_times, 95)),
+        'solve_time_max': float(np.max(solve_times)),
+    }
+
+
+def run_point(model, point, fixed, Tfinal, threshold, settle_tol):
+    try:
+        module = importlib.import_module(MODELS[model])
+        from horizon import Horizon
+
+        kwargs = dict(fixed)
+        kwargs['tuning'] = {k: point[k] for k in TUNING if k in point}
+        x_refs = kwargs.pop('x_refs', None)
+        x_refs = [np.asarray(x, dtype=float) for x in point.get('x_refs', x_refs)]
+        if 'Nh' in point:
+            if model == 'linear':
+                kwargs['Nh'] = int(point['Nh'])
+            else:
+                kwargs['horizon'] = Horizon.uniform_steps(kwargs['tuning'].get('h', 0.05), int(point['Nh']))
+
+        mpc = module.MPC(**kwargs)
+        sim = module.Simulator(mpc, x_refs, threshold=threshold, Tfinal=Tfinal)
+        sim.run_simulation()
+    except Exception as err:
+        # solver failure or any other error in the run: the run is recorded, not retried
+        return {'failed': True, 'error': f"{type(err).__name__}: {err}"[:200]}
+
+    if model == 'linear':
+        data = sim.recorder.data()
+        solve_times = data['t_total'] - data['t_plant']
+    else:
+        solve_times = sim.solve_time_hist
+    return {'failed': False, 'error': '', **closed_loop_metrics(sim, solve_times, settle_tol)}
+
+
+class Sweep:
+    def __init__(self, model, points, fixed=None, cache_dir='sweep_cache', Tfinal=15.0, threshold=20.0,
+                 settle_tol=None, n_workers=None, max_tasks_per_child=4):
+        if model not in MODELS:
+            raise ValueError(f"Unknown model '{model}', expected one of {list(MODELS)}.")
+        self.model = model
+        self.points = [to_jsonable(p) for p in points]
+        self.fixed = to_jsonable(fixed or {})
+        self.cache_dir = cache_dir
+        self.Tfinal = Tfinal
+        self.threshold = threshold
+        self.settle_tol = threshold if settle_tol is None else settle_tol
+        self.n_workers = n_workers or os.cpu_count()
+        self.max_tasks_per_child = max_tasks_per_child
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def key(self, point):
+        # the settings that change a run's outcome are part of its key
+        return point_key({'model': self.model, 'point': point, 'fixed': self.fixed,
+                          'Tfinal': self.Tfinal, 'threshold': self.threshold, 'settle_tol': self.settle_tol})
+
+    def cache_path(self, key):
+        return os.path.join(self.cache_dir, key + '.json')
+
+    def pending(self):
+        return [p for p in self.points if not os.path.exists(self.cache_path(self.key(p)))]
+
+    def store(self, point, result):
+        # write then rename, a killed sweep never leaves half a result behind
+        key = self.key(point)
+        tmp = self.cache_path(key) + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'key': key, 'model': self.model, 'point': point, 'result': to_jsonable(result)}, f)
+        os.replace(tmp, self.cache_path(key))
+
+    def run(self):
+        todo = self.pending()
+        print(f"Sweep: {len(self.points) - len(todo)} of {len(self.points)} points cached, running {len(todo)}")
+        args = (self.fixed, self.Tfinal, self.threshold, self.settle_tol)
+
+        if self.n_workers == 1:
+            for i, point in enumerate(todo):
+                self.store(point, run_point(self.model, point, *args))
+                print(f"Sweep: {i + 1}/{len(todo)} done")
+            return self.collect()
+
+        # a worker that dies outright (segfault, out of memory) breaks the whole pool; the runs that were in
+        # flight are rerun one at a time on a fresh pool, so the crash is pinned on the point that caused it
+        remaining, done = todo, 0
+        while remaining:
+            remaining, lost, done = self.run_pool(remaining, args, done, len(todo))
+            for point in lost:
+                _, crashed, done = self.run_pool([point], args, done, len(todo), n_workers=1)
+                if crashed:
+                    self.store(point, {'failed': True, 'error': 'worker process died'})
+                    done += 1
+                    print(f"Sweep: {done}/{len(todo)} done, worker process died")
+        return self.collect()
+
+    def run_pool(self, todo, args, done, total, n_workers=None):
+        # runs todo on one pool; returns the points not yet started and the ones lost if the pool breaks,
+        # and the running done count
+        n_workers = n_workers or self.n_workers
+        # at most two runs per worker are queued, so pending results never pile up in memory
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=quiet_worker,
+                                 max_tasks_per_child=self.max_tasks_per_child) as pool:
+            queue = iter(todo)
+            running = {}
+            for point in itertools.islice(queue, 2 * n_workers):
+                running[pool.submit(run_point, self.model, point, *args)] = point
+            while running:
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                if any(isinstance(future.exception(), BrokenProcessPool) for future in finished):
+                    break
+                for future in finished:
+                    self.store(running.pop(future), future.result())
+                    done += 1
+                    print(f"Sweep: {done}/{total} done")
+                    for nxt in itertools.islice(queue, 1):
+                        running[pool.submit(run_point, self.model, nxt, *args)] = nxt
+
+            # runs that finished before the pool broke keep their results
+            wait(running)
+            lost = []
+            for future, point in running.items():
+                if future.exception() is None:
+                    self.store(point, future.result())
+                    done += 1
+                else:
+                    lost.append(point)
+            return list(queue), lost, done
+
+    def collect(self, path=None):
+        # one column per parameter and metric, list valued parameters are kept as JSON strings
+        rows = []
+        for point in self.points:
+            cache = self.cache_path(self.key(point))
+            if os.path.exists(cache):
+                with open(cache) as f:
+                    rows.append(json.load(f))
+
+        columns = {'key': np.array([r['key'] for r in rows])}
+        for name in sorted({k for r in rows for k in r['point']}):
+            values = [r['point'].get(name) for r in rows]
+            if all(isinstance(v, (int, float)) or v is None for v in values):
+                # points that leave a scalar parameter at its default get NaN
+                columns[name] = np.array([np.nan if v is None else v for v in values], dtype=float)
+            else:
+                columns[name] = np.array([json.dumps(v) for v in values])
+        for name in sorted({k for r in rows for k in r['result']}):
+            values = [r['result'].get(name, np.nan) for r in rows]
+            columns[name] = np.array(values) if name == 'error' else np.array(values, dtype=float)
+
+        if path is not None:
+            np.savez_compressed(path, **columns)
+        return columns
+
+
+if __name__ == '__main__':
+    waypoints = [
+        [[290, 160, 0, 2, 0, 0], [340, 160, 0, 2, 0, 0], [390, 160, 0, 4, 0, 0]],
+        [[290, 160, 0, 2, 0, 0], [390, 160, 0, 4, 0, 0], [540, 160, 0, 4, 0, 0]],
+    ]
+    if len(sys.argv) > 1 and sys.argv[1] == 'lhs':
+        points = lhs_design({'Q': [(100, 1e4, 'log'), (1e3, 1e5, 'log'), (1e4, 1e6, 'log'), (0, 10), (0, 10), (1e4, 1e6, 'log')],
+                             'Nh': (20, 60)}, n_points=16)
+        for p in points:
+            p['x_refs'] = waypoints[0]
+    else:
+        points = grid_design({'Nh': [20, 30, 50], 'h': [0.1, 0.05], 'x_refs': waypoints})
+
+    sweep = Sweep('linear', points, fixed={'solver_nl': 'ipopt', 'solver_qp': 'osqp', 'ltv': True},
+                  cache_dir='sweep_cache', Tfinal=15.0)
+    table = sweep.run()
+    sweep.collect('sweep_results.npz')
+    for i in np.argsort(table['rms_error']):
+        print(f"{table['key'][i]} Nh={table['Nh'][i]:.0f} | rms error {table['rms_error'][i]:.1f}, "
+              f"refs {table['refs_reached'][i]:.0f}, settle {table['settle_time'][i]:.1f}s, "
+              f"effort {table['control_effort'][i]:.1f}, solve {1000 * table['solve_time_mean'][i]:.1f} ms")
@@ -9,117 +9,20 @@
 
 import numpy as np
 import matplotlib.pyplot as plt
+from ascent import TRAJECTORY_PY, simulate_ascent
+from recorder import MemmapRecorder
 
 
-dt = 0.1
-n_vertical = 900
-n_gravity  = 10000
-n_steps    = n_vertical + n_gravity
+# vertical ascent for 89.9 s, pitch kick to 75 deg, then a gravity turn; the stepping lives in ascent.py.
+# The steps are streamed to trajectory.dat and the plots read at most 20000 of them back from it
+store = simulate_ascent(TRAJECTORY_PY, recorder=MemmapRecorder('trajectory.dat'))
+result = store.thin(20000)
 
-
-Tphase1_stage1 = 9.116e6*4  
-M0_1_stage1    = 1.4016e6  
-mdot1_stage1   = 10150      
-
-
-Rearth = 6.371e6  
-
-
-time  = np.zeros(n_steps)
-vel   = np.zeros(n_steps)
-velx  = np.zeros(n_steps)
-velz  = np.zeros(n_steps)
-xpos  = np.zeros(n_steps)
-zpos  = np.zeros(n_steps)
-gamma = np.zeros(n_steps)
-acc   = np.zeros(n_steps)
-
-gamma[0] = np.deg2rad(90.0)
-
-acc[0] = Tphase1_stage1 / (M0_1_stage1 - mdot1_stage1 * time[0]) - 9.81
-
-
-for k in range(1, n_vertical):
-    time[k] = time[k-1] + dt
-
-    velz[k] = velz[k-1] + acc[k-1]*dt
-   
-    velx[k] = 0.0
-    
-    vel[k]  = np.sqrt(velx[k]**2 + velz[k]**2)
-    
-    cur_mass = M0_1_stage1 - mdot1_stage1 * time[k]
-    if cur_mass < 1e-6:
-
-        cur_mass = 1e-6
-        Tphase1_stage1 = 0.0
-    
-    acc[k] = (Tphase1_stage1 / cur_mass) - 9.81
-    
-    xpos[k] = 0.0
-    zpos[k] = zpos[k-1] + velz[k-1]*dt + 0.5 * acc[k-1] * (dt**2)
-   
-    gamma[k] = gamma[k-1]
-
-gamma[n_vertical - 1] = np.deg2rad(75.0)
-
-t_staging = time[n_vertical - 1]
-
-M0_2      = cur_mass 
-mdot2     = 8218  
-Tphase2   = 9.116e6*4    
-m_dry_2   = 0.0 
-
-        
-for k in range(n_vertical, n_steps):
-    
-    if k == n_vertical + 200:
-        M0_2      = 450e3     
-        mdot2     = 2379     
-        Tphase2   = 7.887e6    
-        m_dry_2   = 100.3e3       
-        
-    time[k] = time[k-1] + dt
-    
-    dt_stage2 = time[k] - t_staging
-
-    cur_mass_2 = M0_2 - mdot2 * dt_stage2
-    
-    if cur_mass_2 <= m_dry_2:
-        cur_mass_2 = m_dry_2
-        Tphase2 = 0.0
-
-    thrust_acc_2 = Tphase2 / cur_mass_2
-    
-    vel[k] = (
-        vel[k-1]
-        + dt * (thrust_acc_2 - 9.81 * np.sin(gamma[k-1]))
-    )
-    
-    velx[k] = vel[k] * np.cos(gamma[k-1])
-    velz[k] = vel[k] * np.sin(gamma[k-1])
-    
-    xpos[k] = (
-        xpos[k-1]
-        + velx[k-1]*dt
-        + 0.5 * thrust_acc_2 * np.cos(gamma[k-1]) * (dt**2)
-    )
-    zpos[k] = (
-        zpos[k-1]
-        + velz[k-1]*dt
-        + 0.5 * (thrust_acc_2*np.sin(gamma[k-1]) - 9.81) * (dt**2)
-    )
-    
-    if vel[k-1] > 1e-6:
-        gamma[k] = (
-            gamma[k-1]
-            + vel[k]*np.cos(gamma[k-1]) * dt / (Rearth + zpos[k-1])
-            - 9.81*np.cos(gamma[k-1]) * dt / vel[k-1]
-        )
-    else:
-        gamma[k] = gamma[k-1]
-    
-    acc[k] = thrust_acc_2
+time  = result['time']
+vel   = result['vel']
+xpos  = result['x']
+zpos  = result['z']
+gamma = result['gamma']
 
 fig, ax1 = plt.subplots()
 
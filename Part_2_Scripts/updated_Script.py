@@ -13,6 +13,9 @@
 
 import numpy as np
 from dataclasses import dataclass
+from launcher_kernels import LauncherModel, stage_breakdown
+from root_finding import solve_for_payload
+from staging import optimal_split, optimal_split_numeric
 
 """
 This script uses a dataclass to store the information about the stages 
@@ -132,83 +135,70 @@ class Launcher:
 
         self.phases = self.data.phases      
         self.stages = self.data.stages      
+        self.compile()
 
-    def Thrust_to_weight(self, phase: str) -> float: 
-        phase_info = None
-        for p in self.phases:
-            if p["name"] == phase:
-                phase_info = p
-                break
-        if phase_info is None:
-            raise ValueError(f"Invalid phase '{phase}' in Thrust_to_weight().")
-
-        total_thrust_sl = 0.0
-        for engine_name in phase_info["active_engine"]:
-            stage_obj = self.stages[engine_name]
-            total_thrust_sl += stage_obj.thrust_sl * stage_obj.number
+    def compile(self):
+        #array-backed copy of the stages and phases, call again after editing them
+        self.model = LauncherModel(self.stages, self.phases, drop_after={"core": self.data.mass_payload_1},
+                                   fixed_efficiency={"upper": 0.15}, gravity=self.data.gravity)
 
-        tw_ratio = total_thrust_sl / (self.total_mass * self.data.gravity)
-        return tw_ratio
+    def Thrust_to_weight(self, phase: str) -> float: 
+        return float(self.model.thrust_to_weight(phase, self.total_mass))
     
+    #Final mass calculation for arrays of designs, every argument broadcasts against the others
+    #Isp and delta_v have the phase as last axis, payload_1 is dropped after the core phase
+    def final_payload_mass_batch(self, str_eff, Isp=None, delta_v=None, payload_1=None, total_mass=None):
+        if payload_1 is not None and total_mass is None:
+            total_mass = self.total_mass + np.asarray(payload_1, dtype=float) - self.data.mass_payload_1
+        return self.model.payload(self.total_mass if total_mass is None else total_mass, str_eff, weighted=True,
+                                  Isp=Isp, delta_v=delta_v, drop=payload_1)
+
+    def stage_report(self, str_eff):
+        m = self.model
+        b = stage_breakdown(self.total_mass, m.phase_efficiencies(str_eff, weighted=True), m.phase_Isp, m.phase_delta_v,
+                            m.drop_mass, m.gravity)
+        for k, i in enumerate(m.burn_stage):
+            if np.isnan(b["m_start"][k]):
+                break
+            print(f"Stage {m.stage_keys[i]} => Δv={m.phase_delta_v[k]:.1f} m/s | "
+                f"m_propellant={b['m_propellant'][k]:.1f} kg | "
+                f"m_structure={b['m_structure'][k]:.1f} kg")
 
     def final_payload_mass(self, str_eff, verbose=True):
-        current_m0 = self.total_mass  
-        upper_stage_eff = 0.15  
-
-        for phase in self.phases:
-            active_stages = phase["active_stages"]
-            
-  
-            stage_key = phase["drop_stages"][0]  
-            stg = self.stages[stage_key]
-
-       
-            total_active_mass = sum(self.stages[s].launch_mass for s in active_stages)
-            weighted_efficiency = sum(
-                (self.stages[s].launch_mass / total_active_mass) * 
-                (upper_stage_eff if s == "upper" else str_eff)
-                for s in active_stages
-            )
-
-            alpha = weighted_efficiency / (1 - weighted_efficiency)
-            
-            Ve = stg.Isp * self.data.gravity
-            K = np.exp(stg.delta_v / Ve)
-            m_after_burn = current_m0 / K
-            m_structure = alpha * (current_m0 - m_after_burn)
-
-            if m_after_burn <= 0:
-                return 0.0
-
-            if verbose:
-                print(f"Stage {stage_key} => Δv={stg.delta_v:.1f} m/s | "
-                    f"m_propellant={current_m0 - m_after_burn:.1f} kg | "
-                    f"m_structure={m_structure:.1f} kg")
-
-            
-            current_m0 = m_after_burn - m_structure
-
-   
-            if stage_key == "core":
-                current_m0 -= self.data.mass_payload_1
-
-            if current_m0 <= 0:
-                return 0.0
-
-        return current_m0  
+        if verbose:
+            self.stage_report(str_eff)
+        return float(self.final_payload_mass_batch(str_eff))
     
-    def optimal_efficiency(self, target_payload: float):
-         
-        current_eff =  0.99
-        
-        while current_eff > 0:
-            payload = self.final_payload_mass(str_eff=current_eff, verbose=False)
-            if payload >= target_payload:
-                print(f"Found structural efficiency ~ {current_eff:.2f} => payload ~ {payload:.1f} kg")
-                return
-            current_eff -= 0.01
-        
-        print("Could not achieve the desired payload with the given model.")
+    def optimal_efficiency(self, target_payload: float, xtol=1e-10):
+        # largest structural efficiency that still delivers target_payload, the payload falls as the efficiency rises
+        result = solve_for_payload(self.final_payload_mass_batch, target_payload, 0.0, 0.99, xtol=xtol)
+        if result.converged:
+            print(f"Found structural efficiency ~ {result.value:.4f} => payload ~ {result.payload:.1f} kg "
+                  f"({result.evaluations} evaluations)")
+        else:
+            print("Could not achieve the desired payload with the given model.")
+        return result
+
+    def required_total_mass(self, target_payload: float, str_eff=None, xtol=1e-6):
+        # lift-off mass that delivers target_payload at str_eff, the payload grows with the lift-off mass
+        str_eff = self.structural_efficiency if str_eff is None else str_eff
+        return solve_for_payload(lambda m0: self.final_payload_mass_batch(str_eff, total_mass=m0), target_payload,
+                                 self.data.mass_payload_1, 100 * self.total_mass, xtol=xtol)
+
+    def optimal_delta_v(self, str_eff=None, total_dv=None, method="lagrange"):
+        # payload-optimal split of the total delta-v (by default the current one) over the stages, returns (delta_v, payload)
+        # "numeric" runs SLSQP on final_payload_mass_batch itself instead of the Lagrange solution
+        str_eff = self.structural_efficiency if str_eff is None else str_eff
+        m = self.model
+        total_dv = m.phase_delta_v.sum() if total_dv is None else total_dv
+        if method == "numeric":
+            dv, payload, _ = optimal_split_numeric(lambda dv: self.final_payload_mass_batch(str_eff, delta_v=dv),
+                                                   total_dv, len(m.phase_delta_v), m.phase_delta_v)
+            return dv, float(payload)
+        dv, payload, _ = optimal_split(self.total_mass, total_dv, m.phase_Isp, m.phase_efficiencies(str_eff, weighted=True),
+                                       m.drop_mass, m.gravity)
+        # optimal_split returns a 0-d array for a single budget, both methods give the payload as a float
+        return dv, float(payload)
             
 
 if __name__ == "__main__":
@@ -223,4 +213,11 @@ if __name__ == "__main__":
     print("\nSearching for an optimal structural efficiency to get desired payload...")
     launcher.optimal_efficiency(10000)
 
+    mass = launcher.required_total_mass(10000)
+    print(f"Lift-off mass for 10000 kg at efficiency {launcher.structural_efficiency:.2f} ~ {mass.value:.1f} kg "
+          f"({mass.evaluations} evaluations)")
+
+    dv, payload = launcher.optimal_delta_v()
+    print(f"Payload-optimal delta-v split {np.round(dv, 1)} m/s => payload ~ {payload:.1f} kg")
+
 